@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from enum import Enum
@@ -17,6 +18,75 @@ class Settings(BaseSettings):
     ENVIRONMENT: EnvironmentType = EnvironmentType.development
     VERSION: str = "1.0.0"
 
+    # Connection pool, per process (same DB_* variables as the ingest and legacy services)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 disables the server-side timeout
+    DB_PGBOUNCER: bool = False  # DATABASE_URL points at PgBouncer in transaction-pooling mode
+    DATABASE_SESSION_URL: Optional[str] = None  # Direct URL for LISTEN and advisory locks behind PgBouncer
+
+    # Read replicas for read-only endpoints (get_read_db)
+    DATABASE_REPLICA_URLS: str = ""  # Comma separated; empty sends all reads to the primary
+    REPLICA_MAX_LAG_SECONDS: float = 5.0  # Replicas further behind are skipped
+    REPLICA_LAG_CHECK_SECONDS: int = 5  # How often each process measures replica lag
+    READ_YOUR_WRITES_SECONDS: float = 10.0  # After a user's write, their reads go to the primary this long
+
+    # Threshold alerts
+    ALERT_HYSTERESIS_RATIO: float = 0.1  # Clear only once a reading drops 10% below the limit
+    ALERT_REALERT_MINUTES: int = 360  # Minimum gap between alerts for the same user/station/pollutant
+
+    # Live updates over /ws
+    REALTIME_QUEUE_SIZE: int = 100  # Events buffered per connection before the oldest are dropped
+
+    # Retention (daily cleanup)
+    NOTIFICATION_RETENTION_DAYS: int = 30
+    REPUTATION_EVENT_RETENTION_DAYS: int = 30  # Applied ledger events only
+    SYSTEM_LOG_RETENTION_DAYS: int = 90
+    WEATHER_RETENTION_DAYS: int = 365
+    FEEDBACK_FILE_RETENTION_DAYS: int = 365  # Attachments are removed, feedback is kept
+    JOB_RETENTION_DAYS: int = 30  # Background job status rows
+    RETENTION_CHUNK_SIZE: int = 5000  # Rows per DELETE transaction
+    RETENTION_PAUSE_SECONDS: float = 0.2  # Pause between chunks
+
+    # Forecasts
+    PREDICTION_INTERVAL_MINUTES: int = 30  # Also the max-age of forecast responses
+
+    # Scheduled jobs (cleanup, predictions, reputation) run in one elected process
+    RUN_SCHEDULER_IN_API: bool = True  # Set false when `python -m air_quality_backend.worker` runs them
+    SCHEDULER_LOCK_ID: int = 72_410_046  # PostgreSQL advisory lock key held by the leader
+    SCHEDULER_LEADER_POLL_SECONDS: float = 15.0  # Standby retry and leader connection check interval
+
+    # HTTP response cache for public read routes (@cache_policy)
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_REDIS_URL: Optional[str] = None  # Shared by all workers (needs `redis`); per-process LRU when unset
+    HTTP_CACHE_MAX_ENTRIES: int = 5000
+    HTTP_CACHE_MAX_BYTES: int = 128 * 1024 * 1024  # Total bodies held by the in-process LRU
+    # Larger responses are served but not cached; fits the full station list (~8 MB at 20k stations)
+    HTTP_CACHE_MAX_BODY_BYTES: int = 16 * 1024 * 1024
+    # Ingest readings invalidate "measurements" at most this often (once across workers with Redis);
+    # cached readings then lag the ingest service by at most this plus the listener's 5 s poll
+    HTTP_CACHE_INGEST_INVALIDATION_SECONDS: float = 15.0
+
+    # Health checks at /health/live and /health/ready
+    HEALTH_CACHE_SECONDS: float = 5.0  # Readiness reports are reused for this long
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2.0  # Per probe; slower counts as unavailable
+    HEALTH_POOL_SATURATION: float = 0.9  # Share of pool + overflow in use reported as degraded
+    HEALTH_JOB_LAG_SECONDS: int = 120  # Scheduled jobs overdue by more are reported as degraded
+
+    # Metrics at /metrics
+    METRICS_ENABLED: bool = True
+
+    # SQL budget checks (always on, and enforced, when ENVIRONMENT=testing)
+    SQL_BUDGET_CHECKS: bool = False  # Count statements per request, flag N+1 patterns
+    SQL_BUDGET_ENFORCE: bool = False  # Fail requests over their @query_budget with a 500
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5  # Repeats of one statement in a request flagged as N+1
+
+    # Query profiling (diagnostics at /system/query-profile)
+    QUERY_PROFILING: bool = False
+    QUERY_PROFILE_SLOW_MS: float = 50.0  # Statements slower than this are EXPLAINed
+
     # Explicit path to .env file
     model_config = SettingsConfigDict(
         env_file=r"C:\Users\satya\OneDrive\Documents\softwareeng\AQI_monitoring\Air_Quality_Monitoring_System\.env",
@@ -1,17 +1,51 @@
-from sqlalchemy import create_engine
+from fastapi import Request
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from .config import settings
+from .engine_factory import build_engine
+from .utils.metrics import InstrumentedQueuePool
+from .utils.replicas import ReplicaRouter
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(
+engine = build_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    statement_timeout_ms=settings.DB_STATEMENT_TIMEOUT_MS,
+    pgbouncer=settings.DB_PGBOUNCER,
+    application_name="aqi-api"
 )
 
+# The ingest LISTEN and the scheduler's advisory lock hold session state, which
+# PgBouncer's transaction pooling doesn't keep; they connect directly when given a URL
+session_engine = build_engine(
+    settings.DATABASE_SESSION_URL,
+    poolclass=NullPool,
+    application_name="aqi-api-session"
+) if settings.DATABASE_SESSION_URL else engine
+
+# Read replicas for get_read_db; a down replica must not stall the lag checks
+replica_engines = [
+    build_engine(
+        url.strip(),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        statement_timeout_ms=settings.DB_STATEMENT_TIMEOUT_MS,
+        pgbouncer=settings.DB_PGBOUNCER,
+        application_name="aqi-api-replica",
+        connect_args={"connect_timeout": 2}
+    )
+    for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
+replica_router = ReplicaRouter(engine, replica_engines)
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -33,3 +67,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request):
+    """
+    Like get_db, for endpoints that only read: the session is bound to a read
+    replica that is within REPLICA_MAX_LAG_SECONDS, or to the primary when
+    none is, no replicas are configured, or the user wrote recently.
+    """
+    db = SessionLocal(bind=replica_router.engine_for(request))
+    try:
+        yield db
+    finally:
+        db.close()
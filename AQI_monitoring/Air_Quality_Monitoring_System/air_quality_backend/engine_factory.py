@@ -0,0 +1,119 @@
+# engine_factory.py
+#
+# Shared SQLAlchemy engine setup for the API (air_quality_backend), the ingest
+# service (api_part) and the legacy backend (AQI_monitoring/backend). This is
+# the only implementation: the services have no common package, so the other
+# two have an engine_factory.py that loads this file by path and re-exports
+# it. It must not import anything from the project.
+#
+# Every service reads the same DB_* environment variables (see
+# pool_options_from_env), so the connections each process may open add up
+# predictably against PostgreSQL's max_connections:
+#     processes x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return default if value is None else value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pool_options_from_env(**defaults) -> dict:
+    """
+    build_engine keyword arguments from the environment, over the given defaults:
+
+    DB_POOL_SIZE             connections kept open per process
+    DB_MAX_OVERFLOW          extra connections allowed under bursts
+    DB_POOL_TIMEOUT          seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE          seconds after which a connection is replaced
+    DB_STATEMENT_TIMEOUT_MS  server-side statement timeout (0 = none)
+    DB_PGBOUNCER             true when DATABASE_URL points at PgBouncer in transaction mode
+    """
+    options = {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30.0,
+        "pool_recycle": 1800,
+        "statement_timeout_ms": 0,
+        "pgbouncer": False,
+        **defaults,
+    }
+    for name, cast in (("pool_size", int), ("max_overflow", int), ("pool_timeout", float),
+                       ("pool_recycle", int), ("statement_timeout_ms", int)):
+        value = os.getenv(f"DB_{name.upper()}")
+        if value:
+            options[name] = cast(value)
+    options["pgbouncer"] = _env_bool("DB_PGBOUNCER", options["pgbouncer"])
+    return options
+
+
+def build_engine(url: str, *, pool_size: int = 5, max_overflow: int = 10, pool_timeout: float = 30.0,
+                 pool_recycle: int = 1800, statement_timeout_ms: int = 0, pgbouncer: bool = False,
+                 application_name: str = None, **engine_kwargs) -> Engine:
+    """
+    create_engine with the pool and session settings shared by all services.
+
+    In PgBouncer transaction-pooling mode, a server connection only belongs to
+    the client for one transaction, so nothing may rely on session state:
+    - the statement timeout is applied per transaction (SET LOCAL) instead of
+      as a startup option, which PgBouncer rejects
+    - drivers that prepare statements server-side have it turned off
+      (psycopg2, used throughout this project, never does)
+    - LISTEN and session advisory locks don't work; give those a direct URL
+    """
+    connect_args = dict(engine_kwargs.pop("connect_args", {}))
+    if application_name:
+        connect_args["application_name"] = application_name
+
+    driver = url.split(":", 1)[0]
+    if pgbouncer:
+        if "asyncpg" in driver:
+            connect_args.setdefault("prepared_statement_cache_size", 0)
+            connect_args.setdefault("statement_cache_size", 0)
+        elif "psycopg" in driver and "psycopg2" not in driver:
+            connect_args.setdefault("prepare_threshold", None)
+    elif statement_timeout_ms:
+        connect_args["options"] = f"-c statement_timeout={int(statement_timeout_ms)}"
+
+    if engine_kwargs.get("poolclass") is NullPool:
+        pool_options = {}
+    else:
+        pool_options = {"pool_size": pool_size, "max_overflow": max_overflow,
+                        "pool_timeout": pool_timeout, "pool_recycle": pool_recycle}
+
+    engine = create_engine(
+        url,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+        **pool_options,
+        **engine_kwargs,
+    )
+
+    if pgbouncer and statement_timeout_ms:
+        @event.listens_for(engine, "begin")
+        def set_statement_timeout(connection):
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}")
+
+    return engine
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Occupancy of the engine's pool, for metrics and health endpoints."""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"pool": type(pool).__name__}
+    size = pool.size()
+    capacity = size + max(0, getattr(pool, "_max_overflow", 0))
+    checked_out = pool.checkedout()
+    return {
+        "pool": type(pool).__name__,
+        "size": size,
+        "capacity": capacity,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "saturation": round(checked_out / capacity, 2) if capacity else 0.0,
+    }
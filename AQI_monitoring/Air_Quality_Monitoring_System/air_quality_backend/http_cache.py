@@ -0,0 +1,388 @@
+# http_cache.py
+#
+# Server-side HTTP response cache for public read routes, shared by the API
+# (air_quality_backend) and the legacy backend (AQI_monitoring/backend). Like
+# engine_factory.py this is the only implementation: it has no project
+# imports, and the legacy backend's http_cache.py loads it by path.
+#
+# Routes opt in with @cache_policy (below the route decorator, like
+# @query_budget). Before calling the app, the middleware resolves the route a
+# request will be dispatched to, the same way the router does (first route
+# whose path template and method match, included routers flattened), and
+# serves GET/HEAD requests for routes with a policy from the cache. It sets
+# Cache-Control and coalesces concurrent misses for the same key into one call
+# to the endpoint (single flight). Bodies are buffered up to max_body_bytes,
+# streamed ones included; a larger body streams through uncached. Writers
+# call HttpCache.invalidate(*tags) after committing; entries of those tags
+# are not served again.
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Sequence, Union
+from starlette.requests import Request
+from starlette.responses import Response
+
+POLICY_ATTRIBUTE = "__cache_policy__"
+
+# Response headers not replayed from the cache
+HOP_HEADERS = {"content-length", "set-cookie", "x-cache", "age", "connection", "transfer-encoding"}
+
+
+class CachePolicy:
+    def __init__(self, ttl: int, vary_query: Union[bool, Sequence[str]], vary_user: bool, tags: Sequence[str]):
+        self.ttl = ttl
+        self.vary_query = vary_query
+        self.vary_user = vary_user
+        self.tags = tuple(tags)
+
+
+def cache_policy(ttl: int, vary_query: Union[bool, Sequence[str]] = True, vary_user: bool = False,
+                 tags: Iterable[str] = ()):
+    """
+    Cache an endpoint's 200 responses for `ttl` seconds.
+
+    vary_query: True keys on every query parameter, a list on just those,
+    False on none. vary_user keys on the Authorization header and marks the
+    response private. Writers invalidate entries through their tags.
+    """
+    def decorate(endpoint):
+        setattr(endpoint, POLICY_ATTRIBUTE, CachePolicy(ttl, vary_query, vary_user, tuple(tags)))
+        return endpoint
+    return decorate
+
+
+# -------------------------
+# Backends
+# -------------------------
+
+class MemoryBackend:
+    """Per-process LRU bounded by entry count and total body size."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, blob)
+        self._bytes = 0
+        self._versions = {}
+        self._claims = {}  # name -> claimed until
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    async def set(self, key: str, blob: bytes, ttl: int):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.time() + ttl, blob)
+            self._bytes += len(blob)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._discard(next(iter(self._entries)))
+
+    async def versions(self, tags: Sequence[str]) -> list:
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags: Sequence[str]):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def claim(self, name: str, seconds: float) -> bool:
+        with self._lock:
+            now = time.time()
+            if self._claims.get(name, 0) > now:
+                return False
+            self._claims[name] = now + seconds
+            return True
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": "memory", "entries": len(self._entries), "bytes": self._bytes}
+
+
+class RedisBackend:
+    """Shared across processes; needs the redis package (redis.asyncio) and a Redis-compatible server."""
+
+    def __init__(self, url: str, prefix: str):
+        import redis
+        import redis.asyncio
+
+        self.prefix = prefix
+        self._client = redis.asyncio.from_url(url)
+        # Invalidation also runs from sync code (scheduler threads, sync endpoints)
+        self._sync_client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self.prefix + key)
+
+    async def set(self, key: str, blob: bytes, ttl: int):
+        await self._client.set(self.prefix + key, blob, ex=ttl)
+
+    async def versions(self, tags: Sequence[str]) -> list:
+        if not tags:
+            return []
+        values = await self._client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(value) if value else 0 for value in values]
+
+    def bump(self, tags: Sequence[str]):
+        pipeline = self._sync_client.pipeline()
+        for tag in tags:
+            pipeline.incr(f"{self.prefix}tag:{tag}")
+        pipeline.execute()
+
+    def claim(self, name: str, seconds: float) -> bool:
+        # One process across the cluster gets each window
+        return bool(self._sync_client.set(f"{self.prefix}claim:{name}", 1, nx=True, px=max(1, int(seconds * 1000))))
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+# -------------------------
+# Stored responses
+# -------------------------
+
+def _pack(status: int, headers: dict, body: bytes) -> bytes:
+    meta = json.dumps({"status": status, "headers": headers, "stored_at": time.time()}).encode()
+    return len(meta).to_bytes(4, "big") + meta + body
+
+
+def _unpack(blob: bytes) -> tuple:
+    size = int.from_bytes(blob[:4], "big")
+    meta = json.loads(blob[4:4 + size])
+    return meta, blob[4 + size:]
+
+
+async def _resume(chunks: list, rest):
+    """The chunks already read, then the rest of the body as it streams."""
+    for chunk in chunks:
+        yield chunk
+    async for chunk in rest:
+        yield chunk
+
+
+# -------------------------
+# Routes
+# -------------------------
+
+class RouteTable:
+    """
+    An app's endpoint routes in dispatch order, each with its policy.
+
+    Included routers are flattened: newer FastAPI keeps them as branches
+    (original_router, with the include prefix in include_context) rather than
+    copying their routes into the app. Mounts are skipped; they never have a
+    policy.
+    """
+
+    def __init__(self, routes: list):
+        self.routes = []  # (prefix, route, policy)
+        self._add(routes, "")
+        # Indexes of the routes with a policy, the only ones that can make a request cacheable
+        self.cached = [i for i, (_, _, policy) in enumerate(self.routes) if policy is not None]
+
+    def _add(self, routes: list, prefix: str):
+        for route in routes:
+            included = getattr(route, "original_router", None)
+            if included is not None:
+                context = getattr(route, "include_context", None)
+                self._add(included.routes, prefix + (getattr(context, "prefix", "") or ""))
+            elif hasattr(route, "endpoint") and hasattr(route, "path_regex"):
+                self.routes.append((prefix, route, getattr(route.endpoint, POLICY_ATTRIBUTE, None)))
+
+    def _matches(self, index: int, path: str, method: str) -> bool:
+        prefix, route, _ = self.routes[index]
+        if not path.startswith(prefix):
+            return False
+        methods = getattr(route, "methods", None)
+        return (not methods or method in methods) and route.path_regex.match(path[len(prefix):]) is not None
+
+    def resolve(self, path: str, method: str) -> Optional[tuple]:
+        """(route, policy) of the route a request for path would be dispatched to, if it has a policy."""
+        for index in self.cached:
+            if self._matches(index, path, method):
+                # Served by this route unless one declared before it matches too
+                for earlier in range(index):
+                    if self._matches(earlier, path, method):
+                        _, route, policy = self.routes[earlier]
+                        return (route, policy) if policy is not None else None
+                _, route, policy = self.routes[index]
+                return route, policy
+        return None
+
+
+# -------------------------
+# Middleware
+# -------------------------
+
+class HttpCache:
+    def __init__(self, backend, max_body_bytes: int):
+        self.backend = backend
+        self.max_body_bytes = max_body_bytes
+        self.counts = {"hit": 0, "miss": 0, "coalesced": 0, "uncacheable": 0, "invalidation": 0}
+        self._inflight = {}
+        # Built on the first request, once every router is included; rebuilt if routes are added later
+        self._table = None
+        self._table_size = None
+
+    def invalidate(self, *tags: str):
+        """Stop serving cached responses of these tags, in every process sharing the backend."""
+        try:
+            self.backend.bump(tags)
+            self.counts["invalidation"] += 1
+        except Exception as e:
+            # Cached entries then only age out by TTL; the write itself already succeeded
+            print(f"❌ HTTP cache invalidation of {', '.join(tags)} failed: {str(e)}")
+
+    def invalidate_throttled(self, tag: str, seconds: float) -> bool:
+        """
+        Invalidate tag unless that was done through this method less than
+        `seconds` ago, by this process or (on a shared backend) any other.
+        Returns False when throttled; the caller retries later so the last
+        write is still picked up.
+        """
+        try:
+            claimed = self.backend.claim(f"invalidate:{tag}", seconds)
+        except Exception as e:
+            print(f"❌ HTTP cache invalidation throttle for {tag} failed: {str(e)}")
+            claimed = True
+        if claimed:
+            self.invalidate(tag)
+        return claimed
+
+    def _resolve(self, request: Request) -> Optional[tuple]:
+        """(route, policy) of the route this request will be dispatched to, or None without a policy."""
+        routes = request.scope["app"].router.routes
+        if self._table is None or self._table_size != len(routes):
+            self._table, self._table_size = RouteTable(routes), len(routes)
+        # Routes match the path below the root path (an app mounted under a prefix)
+        path = request.scope["path"]
+        root_path = request.scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        return self._table.resolve(path, request.method)
+
+    @staticmethod
+    def _label(request: Request, route):
+        """
+        Set the scope keys the router would have set, for a response served
+        without calling the app: the metrics, profiler and SQL budget
+        middlewares around the cache then file hits under their route template.
+        """
+        request.scope["route"] = route
+        request.scope["endpoint"] = route.endpoint
+
+    async def _key(self, request: Request, policy: CachePolicy) -> str:
+        if policy.vary_query is True:
+            query = sorted(request.query_params.multi_items())
+        elif policy.vary_query:
+            query = sorted((name, value) for name, value in request.query_params.multi_items()
+                           if name in policy.vary_query)
+        else:
+            query = []
+        user = request.headers.get("authorization", "") if policy.vary_user else ""
+        versions = await self.backend.versions(policy.tags)
+        raw = json.dumps([request.url.path, query, user, list(zip(policy.tags, versions))])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _serve(self, request: Request, blob: bytes, state: str) -> Response:
+        meta, body = _unpack(blob)
+        headers = dict(meta["headers"])
+        headers["x-cache"] = state
+        headers["age"] = str(max(0, int(time.time() - meta["stored_at"])))
+        etag = headers.get("etag")
+        if etag and request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={name: headers[name] for name in
+                                                      ("etag", "cache-control", "x-cache", "age") if name in headers})
+        return Response(content=body if request.method == "GET" else b"", status_code=meta["status"], headers=headers)
+
+    async def _fill(self, request: Request, call_next, policy: CachePolicy, key: str) -> tuple:
+        """Call the endpoint; returns (response to send, cache blob or None)."""
+        response = await call_next(request)
+        # A HEAD response has no body to store for later GETs
+        if request.method != "GET" or response.status_code != 200 or "set-cookie" in response.headers:
+            return response, None
+        cache_control = response.headers.get("cache-control", "")
+        if "no-store" in cache_control or ("private" in cache_control and not policy.vary_user):
+            return response, None
+
+        length = response.headers.get("content-length")
+        if length is not None and int(length) > self.max_body_bytes:
+            return response, None
+
+        # Streamed bodies have no content-length: buffer them until they turn out too large to store
+        iterator = response.body_iterator.__aiter__()
+        chunks, size = [], 0
+        async for chunk in iterator:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                response.body_iterator = _resume(chunks, iterator)
+                return response, None
+        body = b"".join(chunks)
+        headers = {name: value for name, value in response.headers.items() if name not in HOP_HEADERS}
+        if not cache_control:
+            scope = "private" if policy.vary_user else "public"
+            headers["cache-control"] = f"{scope}, max-age={policy.ttl}"
+        if policy.vary_user:
+            headers["vary"] = "Authorization"
+        blob = _pack(response.status_code, headers, body)
+        await self.backend.set(key, blob, policy.ttl)
+        return self._serve(request, blob, "MISS"), blob
+
+    async def __call__(self, request: Request, call_next):
+        if request.method not in ("GET", "HEAD"):
+            return await call_next(request)
+        resolved = self._resolve(request)
+        if resolved is None:
+            return await call_next(request)
+        route, policy = resolved
+
+        key = await self._key(request, policy)
+        blob = await self.backend.get(key)
+        if blob is not None:
+            self.counts["hit"] += 1
+            self._label(request, route)
+            return self._serve(request, blob, "HIT")
+
+        # Single flight: one request per key runs the endpoint, the others wait for its result
+        pending = self._inflight.get(key)
+        if pending is not None:
+            blob = await asyncio.shield(pending)
+            if blob is not None:
+                self.counts["coalesced"] += 1
+                self._label(request, route)
+                return self._serve(request, blob, "HIT")
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        blob = None
+        try:
+            response, blob = await self._fill(request, call_next, policy, key)
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(blob)
+        self.counts["miss" if blob is not None else "uncacheable"] += 1
+        return response
+
+
+def build_cache(redis_url: Optional[str], max_entries: int, max_bytes: int, max_body_bytes: int,
+                prefix: str = "httpcache:") -> HttpCache:
+    backend = RedisBackend(redis_url, prefix) if redis_url else MemoryBackend(max_entries, max_bytes)
+    return HttpCache(backend, max_body_bytes)
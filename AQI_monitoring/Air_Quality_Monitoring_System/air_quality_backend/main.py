@@ -1,9 +1,24 @@
+from datetime import datetime, timezone
 from fastapi import FastAPI
+from fastapi.responses import Response, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from apscheduler.schedulers.background import BackgroundScheduler
 from starlette.middleware.cors import CORSMiddleware
-from .utils.notifications import cleanup_old_notifications
-from .database import SessionLocal
+from .utils.notifications import (
+    rebuild_alert_index, refresh_alert_preferences, publish_alerts, PREFERENCES_CHANNEL, ALERTS_CHANNEL
+)
+from .utils.pubsub import start_ingest_listener, on_notify
+from .utils.forecast_cache import forecast_cache, FORECASTS_CHANNEL
+from .utils.query_profiler import install_query_profiler, profile_requests
+from .utils.station_search import rebuild_station_search
+from .utils.sql_budget import install_sql_budget, sql_budget_enabled, check_query_budget
+from .utils.health import liveness, readiness, watch_scheduler
+from .utils.replicas import track_writes, track_replica_lag, WRITES_CHANNEL
+from .utils.response_cache import response_cache
+from .utils.metrics import (
+    registry, CONTENT_TYPE, install_query_metrics, instrument_requests, track_pool, tracked
+)
+from .database import engine, replica_engines, replica_router
 from .routers import (
     auth,
     users,
@@ -14,10 +29,12 @@ from .routers import (
     forum,
     preferences,
     predictions,
-    feedback
+    feedback,
+    realtime,
+    system
 )
 from .config import settings
-from .routers.predictions import generate_predictions
+from .scheduler import leader
 
 app = FastAPI(
     title="Air Quality Monitoring System API",
@@ -41,6 +58,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-side cache for @cache_policy routes; innermost, so metrics and SQL budgets still see cached hits
+if settings.HTTP_CACHE_ENABLED:
+    app.middleware("http")(response_cache)
+
+# Opt-in SQL profiling per endpoint
+if settings.QUERY_PROFILING:
+    for db_engine in [engine, *replica_engines]:
+        install_query_profiler(db_engine)
+    app.middleware("http")(profile_requests)
+
+# Request latency, SQL per request and pool metrics at /metrics
+if settings.METRICS_ENABLED:
+    for db_engine in [engine, *replica_engines]:
+        install_query_metrics(db_engine)
+    track_pool(engine)
+    if replica_router.enabled:
+        track_replica_lag(replica_router)
+    app.middleware("http")(instrument_requests)
+
+# Per-request SQL counts, N+1 detection and @query_budget enforcement (development/CI)
+if sql_budget_enabled():
+    for db_engine in [engine, *replica_engines]:
+        install_sql_budget(db_engine)
+    app.middleware("http")(check_query_budget)
+
+# Read-your-writes: after a user's write, their get_read_db sessions use the
+# primary in every worker (announced through NOTIFY)
+if replica_router.enabled:
+    app.middleware("http")(track_writes(replica_router))
+    on_notify(WRITES_CHANNEL, replica_router.apply_announced_writes)
+
 # Static file serving for feedback uploads
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
@@ -55,84 +103,109 @@ app.include_router(forum.router)
 app.include_router(preferences.router)
 app.include_router(predictions.router)
 app.include_router(feedback.router)
+app.include_router(realtime.router)
+app.include_router(system.router)
+
+# Per-process caches; every worker refreshes its own
+local_scheduler = BackgroundScheduler()
+
+# Preference writes in any process reach this one's alert index through NOTIFY;
+# the periodic rebuild covers NOTIFYs missed while the listener reconnected.
+# The first build runs at startup, in the background: until it is ready, alert
+# checks query the preferences table
+on_notify(PREFERENCES_CHANNEL, refresh_alert_preferences)
+# Threshold alerts created in any process reach this one's /ws clients the same way
+on_notify(ALERTS_CHANNEL, publish_alerts)
+# New forecast generations, committed by whichever process ran the cycle
+on_notify(FORECASTS_CHANNEL, forecast_cache.expire)
+local_scheduler.add_job(
+    tracked("alert_index", rebuild_alert_index),
+    'interval',
+    id="alert_index",
+    minutes=10,
+    next_run_time=datetime.now(timezone.utc),
+    timezone="UTC",
+    max_instances=1,
+    coalesce=True
+)
+
+# Pick up stations added by the ingest service or other workers; first load at
+# startup, in the background (/stations/search queries the database until then)
+local_scheduler.add_job(
+    tracked("station_search", rebuild_station_search),
+    'interval',
+    id="station_search",
+    minutes=10,
+    next_run_time=datetime.now(timezone.utc),
+    timezone="UTC",
+    max_instances=1,
+    coalesce=True
+)
+
+# Measure replica lag for read routing; the first check runs at startup
+if replica_router.enabled:
+    local_scheduler.add_job(
+        tracked("replica_lag", replica_router.check_lag),
+        'interval',
+        id="replica_lag",
+        seconds=settings.REPLICA_LAG_CHECK_SECONDS,
+        next_run_time=datetime.now(timezone.utc),
+        timezone="UTC",
+        max_instances=1,
+        coalesce=True
+    )
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize application services on startup"""
     print(f"🚀 Starting Air Quality API version {settings.VERSION}")
     print(f"💾 Database: {settings.DATABASE_URL}")
-
-def scheduled_cleanup():
-    """Daily maintenance tasks"""
-    with SessionLocal() as db:
-        try:
-            print("🔄 Running scheduled cleanup...")
-            cleanup_old_notifications(db)
-            print("✅ Cleanup completed successfully")
-        except Exception as e:
-            print(f"❌ Cleanup failed: {str(e)}")
-        finally:
-            db.close()
-
-def scheduled_predictions():
-    """Generate predictions every 30 minutes"""
-    with SessionLocal() as db:
-        try:
-            print("🔮 Generating predictions...")
-            generate_predictions(db)
-            print("✅ Predictions generated successfully")
-        except Exception as e:
-            print(f"❌ Prediction generation failed: {str(e)}")
-        finally:
-            db.close()
+    start_ingest_listener()
 
 @app.on_event("startup")
-def init_scheduler_and_run_predictions():
-    """Initialize scheduler and conditionally run predictions on startup"""
-    scheduler = BackgroundScheduler()
-    
-    # Daily cleanup at 3 AM UTC
-    scheduler.add_job(
-        scheduled_cleanup,
-        'cron',
-        hour=3,
-        minute=0,
-        timezone="UTC"
-    )
-    
-    # Predictions every 30 minutes
-    scheduler.add_job(
-        scheduled_predictions,
-        'interval',
-        minutes=30,
-        timezone="UTC"
-    )
-    
-    scheduler.start()
-    print("⏰ Scheduled tasks initialized (cleanup & predictions)")
-
-    print("🔮 Running initial predictions on startup...")
-    with SessionLocal() as db:
-        try:
-            generate_predictions(db)
-            print("✅ Initial predictions generated successfully")
-        except Exception as e:
-            print(f"❌ Initial prediction generation failed: {str(e)}")
-        finally:
-            db.close()
+def init_schedulers():
+    """Start this process's cache refresh jobs, and campaign for the cluster-wide jobs"""
+    local_scheduler.start()
+    watch_scheduler(local_scheduler)
+
+    # Cleanup, predictions & reputation run in one elected process; campaigning
+    # happens in the background so startup doesn't wait on it (or on inference)
+    if settings.RUN_SCHEDULER_IN_API:
+        leader.start()
+        print("⏰ Local jobs started; campaigning for scheduler leadership")
+    else:
+        print("⏰ Local jobs started; scheduled jobs run in the worker (python -m air_quality_backend.worker)")
+
+@app.on_event("shutdown")
+def stop_schedulers():
+    leader.stop(timeout=30)
+    local_scheduler.shutdown(wait=False)
+
+@app.get("/metrics", tags=["System"], include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint; values are per worker process"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+@app.get("/health/live", tags=["System"])
+async def liveness_check():
+    """Liveness probe: the process is serving requests; checks no dependencies"""
+    return liveness()
+
+@app.get("/health/ready", tags=["System"])
+async def readiness_check():
+    """
+    Readiness probe: database latency, pool saturation, scheduler jobs, the
+    latest prediction cycle and ingest freshness. Cached for
+    HEALTH_CACHE_SECONDS; 503 when the database is unreachable, "degraded"
+    (still 200) when anything else is off.
+    """
+    report = await readiness()
+    return JSONResponse(report, status_code=503 if report["status"] == "unavailable" else 200)
 
 @app.get("/health", tags=["System"])
 async def health_check():
-    """Endpoint for service health monitoring"""
-    return {
-        "status": "OK",
-        "version": settings.VERSION,
-        "database": "active" if SessionLocal().execute("SELECT 1").scalar() else "inactive",
-        "services": {
-            "predictions": "active",
-            "notifications": "active"
-        }
-    }
+    """Endpoint for service health monitoring (same report as /health/ready)"""
+    return await readiness_check()
 
 if __name__ == "__main__":
     import uvicorn
@@ -140,6 +213,6 @@ if __name__ == "__main__":
         "air_quality_backend.main:app",
         host="127.0.0.1",
         port=8002,
-        reload=settings.DEBUG,
-        log_level="info" if settings.DEBUG else "warning"
+        reload=settings.ENVIRONMENT == "development",
+        log_level="info" if settings.ENVIRONMENT == "development" else "warning"
     )
\ No newline at end of file
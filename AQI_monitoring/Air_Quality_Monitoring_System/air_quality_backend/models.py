@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, ForeignKey,
-    DateTime, Boolean, DECIMAL, Enum, ARRAY
+    DateTime, Boolean, DECIMAL, REAL, Enum, ARRAY, Index
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -73,6 +73,17 @@ class Station(Base):
     contributions = relationship("PublicContribution", back_populates="station", cascade="all, delete, delete-orphan")
     preferences = relationship("UserPreference", back_populates="station", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Default listing: active stations ordered by name
+        Index("ix_stations_active_name", "station_name", postgresql_where=is_active.is_(True)),
+        # Substring (ILIKE '%...%') filter on source
+        Index("ix_stations_source_trgm", "source", postgresql_using="gin",
+              postgresql_ops={"source": "gin_trgm_ops"}),
+        # Fuzzy/substring name search (similarity, ILIKE)
+        Index("ix_stations_name_trgm", "station_name", postgresql_using="gin",
+              postgresql_ops={"station_name": "gin_trgm_ops"}),
+    )
+
 
 class Measurement(Base):  # Renamed from TspAqi
     __tablename__ = "measurements"
@@ -134,12 +145,12 @@ class Prediction(Base):
     __tablename__ = "predictions"
 
     station_id = Column(Integer, primary_key=True, index=True)  # Primary key
-    pm25_predicted = Column(ARRAY(DECIMAL(10, 4)))  # List of 48 values
-    pm10_predicted = Column(ARRAY(DECIMAL(10, 4)))
-    no2_predicted = Column(ARRAY(DECIMAL(10, 4)))
-    co_predicted = Column(ARRAY(DECIMAL(10, 4)))
-    so2_predicted = Column(ARRAY(DECIMAL(10, 4)))
-    ozone_predicted = Column(ARRAY(DECIMAL(10, 4)))
+    pm25_predicted = Column(ARRAY(REAL))  # List of 48 float32 values
+    pm10_predicted = Column(ARRAY(REAL))
+    no2_predicted = Column(ARRAY(REAL))
+    co_predicted = Column(ARRAY(REAL))
+    so2_predicted = Column(ARRAY(REAL))
+    ozone_predicted = Column(ARRAY(REAL))
     aqi_predicted = Column(ARRAY(Integer))  # List of 48 integers
     nearby_station = Column(String, nullable=False)
     prediction_time = Column(DateTime)  # Time of the last forecast point (48 hours ahead)
@@ -164,6 +175,74 @@ class Notification(Base):
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        # Inbox: a user's notifications newest first
+        Index("ix_notifications_user_created", "user_id", created_at.desc()),
+    )
+
+
+class BroadcastNotification(Base):
+    __tablename__ = "broadcast_notifications"
+
+    # Sent to every user once; per-user state lives in broadcast_reads and only once read
+    broadcast_id = Column(Integer, primary_key=True, index=True)
+    notification_type = Column(Enum(NotificationType, name="notification_type"), nullable=False)
+    title = Column(String(100), nullable=False)
+    message = Column(String, nullable=False)
+    station_id = Column(Integer, ForeignKey("stations.station_id"))
+    aqi_value = Column(Integer)
+    aqi_category = Column(Enum(
+        'good', 'moderate', 'unhealthy_sensitive',
+        'unhealthy', 'very_unhealthy', 'hazardous',
+        name='aqi_category'
+    ))
+    created_at = Column(DateTime, server_default=func.now(), index=True)
+
+
+class BroadcastRead(Base):
+    __tablename__ = "broadcast_reads"
+
+    broadcast_id = Column(Integer, ForeignKey("broadcast_notifications.broadcast_id", ondelete="CASCADE"),
+                          primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    read_at = Column(DateTime, server_default=func.now())
+
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    # Progress of long-running sends, shared by every worker and kept across restarts
+    job_id = Column(String(32), primary_key=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    total = Column(Integer)
+    processed = Column(Integer, nullable=False, default=0)
+    sent = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+
+class AlertState(Base):
+    __tablename__ = "alert_states"
+
+    # One row per (user, station, pollutant); rows change only when an alert enters, repeats or clears
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    station_id = Column(Integer, ForeignKey("stations.station_id", ondelete="CASCADE"), primary_key=True)
+    pollutant = Column(String(10), primary_key=True)
+    is_active = Column(Boolean, nullable=False, default=False)
+    threshold = Column(DECIMAL(10, 2), nullable=False)
+    last_value = Column(DECIMAL(10, 2))
+    entered_at = Column(DateTime(timezone=True))
+    last_alerted_at = Column(DateTime(timezone=True))
+    cleared_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_alert_states_station_active", "station_id", postgresql_where=is_active.is_(True)),
+    )
+
 
 class PublicContribution(Base):
     __tablename__ = "public_contributions"
@@ -186,6 +265,11 @@ class PublicContribution(Base):
     )
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        # Moderation queue: contributions by status, newest first
+        Index("ix_public_contributions_status_created", "status", created_at.desc()),
+    )
+
     user = relationship("User", back_populates="contributions")
     station = relationship("Station")
     qualitative = relationship(
@@ -219,6 +303,10 @@ class Post(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_posts_created_at", created_at.desc()),
+    )
+
     user = relationship("User", back_populates="posts")
     comments = relationship("Comment", back_populates="post")
 
@@ -236,6 +324,10 @@ class Comment(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_comments_post_id", "post_id"),
+    )
+
     post = relationship("Post", back_populates="comments")
     user = relationship("User", back_populates="comments")
     parent = relationship("Comment", remote_side=[comment_id], backref="replies")
@@ -254,6 +346,23 @@ class UserReputation(Base):
     user = relationship("User", back_populates="reputation")
 
 
+class ReputationEvent(Base):
+    __tablename__ = "reputation_events"
+
+    event_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    action = Column(String(20), nullable=False)  # post, comment, upvote, login, report_verified, ...
+    aura_delta = Column(Integer, nullable=False, default=0)
+    credibility_delta = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+    applied_at = Column(DateTime)  # Set once folded into user_reputation
+
+    __table_args__ = (
+        # Only the unapplied tail is ever scanned by the aggregator
+        Index("ix_reputation_events_pending", "event_id", postgresql_where=applied_at.is_(None)),
+    )
+
+
 class ReportStatus(enum.Enum):
     pending = "pending"
     verified = "verified"
@@ -294,6 +403,11 @@ class UserPreference(Base):
     user = relationship("User", back_populates="preferences")
     station = relationship("Station", back_populates="preferences")
 
+    # Subscribers of a station, used by threshold alerts
+    __table_args__ = (
+        Index("ix_user_preferences_station_id", "station_id"),
+    )
+
     @property
     def station_name(self):
         return self.station.station_name if self.station else None
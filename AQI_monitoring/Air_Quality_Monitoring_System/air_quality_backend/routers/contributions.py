@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..database import get_db
@@ -12,7 +12,9 @@ from ..schemas import (
 )
 from ..utils.auth import get_current_active_user
 from sqlalchemy.orm import joinedload
-from ..utils.notifications import check_measurement_thresholds
+from ..utils.notifications import notify_threshold_subscribers
+from ..utils.pubsub import announce_reading
+from ..utils.response_cache import response_cache
 
 
 router = APIRouter(prefix="/contributions", tags=["Contributions"])
@@ -121,6 +123,7 @@ async def get_contribution_details(
 @router.patch("/{contribution_id}", response_model=PublicContributionResponse)
 async def update_contribution_status(
     contribution_id: int,
+    background_tasks: BackgroundTasks,
     new_status: ContributionStatus = Body(...),
     db: Session = Depends(get_db),
     _: User = Depends(verify_admin)
@@ -164,9 +167,11 @@ async def update_contribution_status(
                 )
                 db.add(measurement)
 
-            station = db.query(Station).get(contribution.station_id)
-            if station:
-                await check_measurement_thresholds(db, measurement, station)
+            # Live push is announced to every process on commit; cache invalidation and
+            # alerts run after it, the latter on its own session
+            announce_reading(db, contribution.station_id)
+            background_tasks.add_task(response_cache.invalidate, "measurements")
+            background_tasks.add_task(notify_threshold_subscribers, contribution.station_id)
 
         if contribution.additional_info:
             qualitative = QualitativeContribution(
@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from typing import List
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models import Post, Comment, UserReputation, Report, User, ReportStatus, UserPostVote, UserCommentVote
 from datetime import datetime, timezone, timedelta
 from ..schemas import (
     PostCreate, PostResponse, CommentCreate, CommentResponse, UserRole,
-    UserReputationResponse, ReportCreate, ReportResponse, UserVotesResponse, StatusUpdate
+    UserReputationResponse, ReportCreate, ReportResponse, UserVotesResponse, StatusUpdate,
+    LeaderboardEntry
 )
 from ..utils.auth import get_current_active_user
-from ..utils.reputation import update_aura_points, update_credibility_points
+from ..utils.reputation import update_aura_points, update_credibility_points, DEFAULT_CREDIBILITY
+from ..utils.responses import list_response
+from ..utils.sql_budget import query_budget
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -31,19 +35,26 @@ async def create_post(post: PostCreate, db: Session = Depends(get_db),
                       current_user: User = Depends(get_current_active_user)):
     new_post = Post(**post.model_dump(), user_id=current_user.user_id)
     db.add(new_post)
+    update_aura_points(db, current_user.user_id, action="post")
     db.commit()
     db.refresh(new_post)
-    update_aura_points(db, current_user.user_id, action="post")
     logger.debug(f"Created post: {new_post.post_id}")
     return {**new_post.__dict__, "username": current_user.username}
 
 @router.get("/posts", response_model=List[PostResponse])
+@query_budget(2)
 async def get_posts(
     sort: str = Query("new", enum=["new", "top", "trending"]),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    query = db.query(Post).join(User)
+    # Author and the current user's vote come in the same query
+    query = db.query(Post, User.username, UserPostVote.vote_type).join(
+        User, User.user_id == Post.user_id
+    ).outerjoin(UserPostVote, and_(
+        UserPostVote.post_id == Post.post_id,
+        UserPostVote.user_id == current_user.user_id
+    ))
     if sort == "new":
         query = query.order_by(Post.created_at.desc())
     elif sort == "top":
@@ -52,20 +63,12 @@ async def get_posts(
         query = query.filter(Post.created_at >= datetime.now(timezone.utc) - timedelta(days=1))
         query = query.order_by((Post.upvotes - Post.downvotes).desc())
     
-    posts = query.all()
-    posts_with_votes = []
-    for post in posts:
-        vote = db.query(UserPostVote).filter(
-            UserPostVote.user_id == current_user.user_id,
-            UserPostVote.post_id == post.post_id
-        ).first()
-        posts_with_votes.append({
-            **post.__dict__,
-            "username": post.user.username,
-            "user_vote": vote.vote_type if vote else None
-        })
+    posts_with_votes = [
+        {**post.__dict__, "username": username, "user_vote": vote_type}
+        for post, username, vote_type in query.all()
+    ]
     logger.debug(f"Fetched {len(posts_with_votes)} posts")
-    return posts_with_votes
+    return list_response(posts_with_votes, PostResponse)
 
 # Comments
 @router.post("/comments", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
@@ -95,9 +98,9 @@ async def create_comment(
         downvotes=0
     )
     db.add(new_comment)
+    update_aura_points(db, current_user.user_id, action="comment")
     db.commit()
     db.refresh(new_comment)
-    update_aura_points(db, current_user.user_id, action="comment")
     logger.debug(f"Created comment: {new_comment.comment_id}, parent: {new_comment.parent_comment_id}")
     return {
         "comment_id": new_comment.comment_id,
@@ -212,37 +215,40 @@ async def delete_comment(
     db.commit()
 
 @router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
+@query_budget(3)
 async def get_comments(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     post = db.query(Post).filter(Post.post_id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    comments = db.query(Comment).join(User).filter(Comment.post_id == post_id).all()
-    comments_with_votes = []
-    for comment in comments:
-        vote = db.query(UserCommentVote).filter(
-            UserCommentVote.user_id == current_user.user_id,
-            UserCommentVote.comment_id == comment.comment_id
-        ).first()
-        comments_with_votes.append({
+    comments = db.query(Comment, User.username, UserCommentVote.vote_type).join(
+        User, User.user_id == Comment.user_id
+    ).outerjoin(UserCommentVote, and_(
+        UserCommentVote.comment_id == Comment.comment_id,
+        UserCommentVote.user_id == current_user.user_id
+    )).filter(Comment.post_id == post_id).all()
+    comments_with_votes = [
+        {
             "comment_id": comment.comment_id,
             "post_id": comment.post_id,
             "user_id": comment.user_id,
-            "username": comment.user.username,
+            "username": username,
             "content": comment.content,
             "created_at": comment.created_at,
             "updated_at": comment.updated_at,
             "upvotes": comment.upvotes,
             "downvotes": comment.downvotes,
             "parent_comment_id": comment.parent_comment_id,
-            "user_vote": vote.vote_type if vote else None
-        })
+            "user_vote": vote_type
+        }
+        for comment, username, vote_type in comments
+    ]
     logger.debug(f"Fetched {len(comments_with_votes)} comments for post {post_id}")
-    return comments_with_votes
+    return list_response(comments_with_votes, CommentResponse)
 
 # Voting - Posts
 @router.post("/posts/{post_id}/upvote")
@@ -426,7 +432,7 @@ async def downvote_comment(
 @router.get("/user/votes", response_model=UserVotesResponse)
 async def get_user_votes(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     post_votes = db.query(UserPostVote).filter(UserPostVote.user_id == current_user.user_id).all()
     comment_votes = db.query(UserCommentVote).filter(UserCommentVote.user_id == current_user.user_id).all()
@@ -441,20 +447,37 @@ async def get_user_votes(
     }
 
 # Reputation
+@router.get("/reputation/leaderboard", response_model=List[LeaderboardEntry])
+async def get_reputation_leaderboard(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Top users by aura points, served from the aggregated reputation table"""
+    rows = db.query(
+        UserReputation.user_id,
+        User.username,
+        UserReputation.aura_points,
+        UserReputation.streak_points,
+        UserReputation.credibility_points
+    ).join(User, User.user_id == UserReputation.user_id).order_by(
+        UserReputation.aura_points.desc(),
+        UserReputation.credibility_points.desc()
+    ).limit(limit).all()
+    return [row._asdict() for row in rows]
+
 @router.get("/reputation/{user_id}", response_model=UserReputationResponse)
-async def get_user_reputation(user_id: int, db: Session = Depends(get_db)):
+async def get_user_reputation(user_id: int, db: Session = Depends(get_read_db)):
     reputation = db.query(UserReputation).filter(UserReputation.user_id == user_id).first()
     if not reputation:
+        # Read-only session (may be a replica): the starting values are returned, not stored;
+        # the reputation fold creates the row with the user's first event
         reputation = UserReputation(
             user_id=user_id,
             aura_points=0,
             streak_points=0,
-            credibility_points=100,
+            credibility_points=DEFAULT_CREDIBILITY,
             last_streak_date=None
         )
-        db.add(reputation)
-        db.commit()
-        db.refresh(reputation)
     return reputation
 
 # Reports
@@ -488,8 +511,7 @@ async def update_report_status(
         raise HTTPException(status_code=404, detail="Report not found")
     
     report.status = ReportStatus(status_update.new_status.value)
+    update_credibility_points(db, report, report.status)
     db.commit()
     db.refresh(report)
-    
-    update_credibility_points(db, report, report.status)
     return report
\ No newline at end of file
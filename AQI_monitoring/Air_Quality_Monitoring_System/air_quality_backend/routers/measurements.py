@@ -2,13 +2,18 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, Background
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models import Measurement, Station, User, UserRole
 from ..schemas import MeasurementCreate, MeasurementResponse
 from ..utils.auth import get_current_active_user
-from ..utils.notifications import check_measurement_thresholds
+from ..utils.notifications import notify_threshold_subscribers
+from ..utils.pubsub import announce_reading
+from ..utils.responses import list_response
+from ..utils.sql_budget import query_budget
+from ..utils.response_cache import response_cache
+from ..http_cache import cache_policy
 import logging
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, contains_eager
 
 router = APIRouter(prefix="/measurements", tags=["Measurements"])
 
@@ -57,6 +62,7 @@ async def create_measurement(
             existing_measurement.source = measurement.source
             existing_measurement.time1 = existing_measurement.timestamp
             existing_measurement.timestamp = current_time
+            announce_reading(db, station.station_id)
             db.commit()
             db.refresh(existing_measurement)
             new_measurement = existing_measurement
@@ -75,15 +81,12 @@ async def create_measurement(
                 timestamp=current_time
             )
             db.add(new_measurement)
+            announce_reading(db, station.station_id)
             db.commit()
             db.refresh(new_measurement)
 
-        background_tasks.add_task(
-            check_measurement_thresholds,
-            db,
-            new_measurement,
-            station
-        )
+        response_cache.invalidate("measurements")
+        background_tasks.add_task(notify_threshold_subscribers, station.station_id)
 
         return new_measurement
     except Exception as e:
@@ -91,8 +94,9 @@ async def create_measurement(
         raise HTTPException(500, str(e))
 
 @router.get("/", response_model=List[MeasurementResponse])
+@query_budget(1)
 async def get_measurements(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         station_id: Optional[int] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
@@ -110,12 +114,13 @@ async def get_measurements(
     if end_time:
         query = query.filter(Measurement.timestamp <= end_time)
 
-    return query.order_by(Measurement.timestamp.desc()).limit(limit).offset(offset).all()
+    measurements = query.order_by(Measurement.timestamp.desc()).limit(limit).offset(offset).all()
+    return list_response(measurements, MeasurementResponse)
 
 @router.get("/{measurement_id}", response_model=MeasurementResponse)
 async def get_measurement(
         measurement_id: int,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     measurement = db.query(Measurement).get(measurement_id)
     if not measurement:
@@ -123,8 +128,10 @@ async def get_measurement(
     return measurement
 
 @router.get("/nearby/", response_model=List[MeasurementResponse])
+@cache_policy(ttl=30, tags=("measurements",))
+@query_budget(1)
 async def get_nearby_measurements(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         lat: float = Query(..., description="Center latitude"),
         lon: float = Query(..., description="Center longitude"),
         radius_km: float = Query(10, description="Search radius in kilometers"),
@@ -135,7 +142,8 @@ async def get_nearby_measurements(
 
     time_threshold = datetime.now(timezone.utc) - timedelta(hours=hours)
 
-    measurements = db.query(Measurement).join(Station).filter(
+    # The joined station fills Measurement.station instead of a lazy load per row
+    measurements = db.query(Measurement).join(Station).options(contains_eager(Measurement.station)).filter(
         Station.latitude.between(min_lat, max_lat),
         Station.longitude.between(min_lon, max_lon),
         Measurement.timestamp >= time_threshold
@@ -154,4 +162,5 @@ async def delete_measurement(
         raise HTTPException(status_code=404, detail="Measurement not found")
 
     db.delete(measurement)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    response_cache.invalidate("measurements")
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import and_
+import base64
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, select, literal, tuple_, union_all, func, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import List, Optional
 
 from ..database import get_db
-from ..models import Notification, User, Station, UserRole
+from ..models import Notification, User, Station, UserRole, BroadcastNotification, BroadcastRead
 from ..schemas import NotificationResponse, NotificationCreate
 from ..utils.auth import get_current_active_user
+from ..utils.job_tracker import create_job, get_job
+from ..utils.notifications import insert_notifications_for_users, run_notification_job
+from ..utils.responses import list_response
+from ..utils.sql_budget import query_budget
+
+# Explicit recipient lists up to this size are sent inline, larger ones as a job
+INLINE_SEND_LIMIT = 1000
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
@@ -25,27 +35,115 @@ async def verify_admin(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 
+def encode_cursor(row) -> str:
+    raw = f"{row['created_at'].isoformat()}|{int(row['is_broadcast'])}|{row['notification_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, is_broadcast, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), bool(int(is_broadcast)), int(notification_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def inbox_query(user: User, is_read: Optional[bool]):
+    """
+    Personal notifications and broadcasts as one stream, via UNION ALL.
+
+    Broadcasts show up for users who existed when they were sent; their read
+    state comes from broadcast_reads, where a row exists only once read.
+    """
+    personal = select(
+        Notification.notification_id.label("notification_id"),
+        Notification.user_id.label("user_id"),
+        Notification.notification_type.label("notification_type"),
+        Notification.title.label("title"),
+        Notification.message.label("message"),
+        Notification.station_id.label("station_id"),
+        Notification.aqi_value.label("aqi_value"),
+        Notification.aqi_category.label("aqi_category"),
+        func.coalesce(Notification.is_read, False).label("is_read"),
+        Notification.created_at.label("created_at"),
+        literal(False).label("is_broadcast")
+    ).where(Notification.user_id == user.user_id)
+
+    broadcast_is_read = BroadcastRead.user_id.is_not(None)
+    broadcasts = select(
+        BroadcastNotification.broadcast_id,
+        literal(user.user_id, Integer),
+        BroadcastNotification.notification_type,
+        BroadcastNotification.title,
+        BroadcastNotification.message,
+        BroadcastNotification.station_id,
+        BroadcastNotification.aqi_value,
+        BroadcastNotification.aqi_category,
+        broadcast_is_read,
+        BroadcastNotification.created_at,
+        literal(True)
+    ).outerjoin(BroadcastRead, and_(
+        BroadcastRead.broadcast_id == BroadcastNotification.broadcast_id,
+        BroadcastRead.user_id == user.user_id
+    ))
+    if user.created_at:
+        broadcasts = broadcasts.where(BroadcastNotification.created_at >= user.created_at)
+
+    if is_read is not None:
+        personal = personal.where(Notification.is_read == is_read)
+        broadcasts = broadcasts.where(broadcast_is_read == is_read)
+
+    return union_all(personal, broadcasts).subquery()
+
+
+def broadcast_response(broadcast: BroadcastNotification, user_id: int, is_read: bool) -> dict:
+    return {
+        "notification_id": broadcast.broadcast_id,
+        "user_id": user_id,
+        "notification_type": broadcast.notification_type,
+        "title": broadcast.title,
+        "message": broadcast.message,
+        "station_id": broadcast.station_id,
+        "aqi_value": broadcast.aqi_value,
+        "aqi_category": broadcast.aqi_category,
+        "is_read": is_read,
+        "created_at": broadcast.created_at,
+        "is_broadcast": True
+    }
+
+
 # -------------------------
 # Endpoints
 # -------------------------
 
 @router.get("/", response_model=List[NotificationResponse])
+@query_budget(2)
 async def get_user_notifications(
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_active_user),
         is_read: Optional[bool] = None,
         limit: int = Query(100, le=500),
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
 ):
-    """Get notifications for current user"""
-    query = db.query(Notification).filter(
-        Notification.user_id == current_user.user_id  # type: ignore
-    )
+    """
+    Get notifications for current user, personal and broadcast, newest first
 
-    if is_read is not None:
-        query = query.filter(Notification.is_read == is_read)
+    Pass the X-Next-Cursor header of a response as `cursor` to get the next
+    page; `offset` is still honoured when no cursor is given.
+    """
+    inbox = inbox_query(current_user, is_read)
+    order = (inbox.c.created_at, inbox.c.is_broadcast, inbox.c.notification_id)
+    query = select(inbox).order_by(*[column.desc() for column in order]).limit(limit)
 
-    return query.order_by(Notification.created_at.desc()).limit(limit).offset(offset).all()
+    if cursor:
+        query = query.where(tuple_(*order) < tuple_(*decode_cursor(cursor)))
+    else:
+        query = query.offset(offset)
+
+    rows = [dict(row) for row in db.execute(query).mappings()]
+    headers = {"X-Next-Cursor": encode_cursor(rows[-1])} if len(rows) == limit else None
+    return list_response(rows, NotificationResponse, headers=headers)
 
 
 @router.get("/{notification_id}", response_model=NotificationResponse)
@@ -92,41 +190,83 @@ async def mark_as_read(
     return notification
 
 
+@router.patch("/broadcasts/{broadcast_id}/read", response_model=NotificationResponse)
+async def mark_broadcast_as_read(
+        broadcast_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_user)
+):
+    """Mark broadcast notification as read"""
+    broadcast = db.query(BroadcastNotification).get(broadcast_id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Notification not found")
+
+    db.execute(
+        pg_insert(BroadcastRead).values(
+            broadcast_id=broadcast_id,
+            user_id=current_user.user_id
+        ).on_conflict_do_nothing()
+    )
+    db.commit()
+    return broadcast_response(broadcast, current_user.user_id, is_read=True)
+
+
 @router.post("/send", status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 async def send_notification(
     notification_data: NotificationCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _: User = Depends(verify_admin)
 ):
-    """Send notification to users (Admin only)"""
+    """
+    Send notification to users (Admin only)
+
+    Without user_ids the notification is stored once as a broadcast. Small
+    recipient lists are inserted right away; large ones run as a background
+    job and the response is then 202 with a job_id to poll at
+    /notifications/jobs/{job_id}.
+    """
     # Validate station exists if provided
     if notification_data.station_id:
         station = db.query(Station).get(notification_data.station_id)
         if not station:
             raise HTTPException(status_code=400, detail="Invalid station ID")
 
-    # Send to all users if no specific IDs provided
-    if not notification_data.user_ids:
-        users = db.query(User).filter(User.is_active).all()
-        notification_data.user_ids = [user.user_id for user in users]
-
-    notifications = []
-    for user_id in notification_data.user_ids:
-        user = db.query(User).get(user_id)
-        if not user:
-            continue  # Skip invalid users
-
-        notification = Notification(
-            **notification_data.model_dump(exclude={"user_ids"}),
-            user_id=user_id,
-            created_at=datetime.now(timezone.utc)
-        )
-        notifications.append(notification)
+    payload = notification_data.model_dump(mode="json", exclude={"user_ids"})
+    user_ids = list(dict.fromkeys(notification_data.user_ids))
+
+    # Send to all users if no specific IDs provided: stored once, fanned out on read
+    if not user_ids:
+        broadcast = BroadcastNotification(**notification_data.model_dump(exclude={"user_ids"}))
+        db.add(broadcast)
+        db.commit()
+        return {"message": "Notification broadcast to all users", "broadcast_id": broadcast.broadcast_id}
+
+    if len(user_ids) <= INLINE_SEND_LIMIT:
+        # Invalid user ids are skipped by the join against users
+        sent = insert_notifications_for_users(db, payload, User.user_id.in_(user_ids))
+        db.commit()
+        return {"message": f"Notifications sent to {sent} users"}
+
+    job = create_job("notification_send", total=len(user_ids))
+    background_tasks.add_task(run_notification_job, job["job_id"], payload, user_ids)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"message": "Notification send queued", "job_id": job["job_id"]}
+    )
 
-    db.bulk_save_objects(notifications)
-    db.commit()
 
-    return {"message": f"Notifications sent to {len(notifications)} users"}
+@router.get("/jobs/{job_id}")
+async def get_notification_job(
+    job_id: str,
+    _: User = Depends(verify_admin)
+):
+    """Progress of a queued notification send (Admin only)"""
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 @router.delete("/{notification_id}", status_code=status.HTTP_204_NO_CONTENT)
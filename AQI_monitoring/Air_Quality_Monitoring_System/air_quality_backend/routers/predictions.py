@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta, timezone
-import joblib
+from datetime import datetime, timedelta
+from typing import List, Optional
 import os
-import numpy as np
-import json
-from ..database import get_db
-from ..models import Prediction, Station, Measurement
+import time
+from ..database import get_read_db
+from ..models import Prediction, Measurement
+from ..schemas import PredictionResponse
+from ..utils.responses import ORJSONResponse
+from ..utils.metrics import prediction_cycle, prediction_stations
+from ..utils.model_registry import model_registry, MODELS_DIR
+from ..utils.sql_budget import query_budget
+from ..utils.forecast_cache import (
+    forecast_cache, forecast_row, forecast_etag, cache_headers, not_modified, utcnow, announce_generation
+)
 
 router = APIRouter(prefix="/predictions", tags=["Predictions"])
-MODELS_DIR = os.path.join(os.path.dirname(__file__), '../utils/models')
+
+FORECAST_HOURS = 48
+MAX_BULK_STATIONS = 500
 
 # Mapping from database pollutant names to model file names
 pollutant_mapping = {
@@ -31,8 +40,20 @@ def load_model(nearby_station_name: str, pollutant: str):
     mapped_pollutant = pollutant_mapping.get(pollutant, pollutant)
     model_path = os.path.join(MODELS_DIR, f"{nearby_station_name}_{mapped_pollutant}_model.pkl")
     if not os.path.exists(model_path):
+        model_registry.record_missing()
+        return None
+    # joblib (and numpy, and the model libraries on unpickling) load on the
+    # first prediction cycle, not when the API imports this router
+    import joblib
+    try:
+        model = joblib.load(model_path)
+    except Exception as e:
+        # A corrupt file skips that pollutant instead of aborting the whole cycle
+        print(f"❌ Failed to load model {model_path}: {e}")
+        model_registry.record_failure(model_path, e)
         return None
-    return joblib.load(model_path)
+    model_registry.record_load()
+    return model
 
 def forecast_48_hours(current_values: dict, starting_timestamp: datetime, models: dict):
     pollutants = ['pm25', 'pm10', 'no2', 'ozone', 'co', 'so2']
@@ -89,18 +110,29 @@ def forecast_48_hours(current_values: dict, starting_timestamp: datetime, models
     
     return forecast
 def generate_predictions(db: Session):
+    # One generation per cycle; it identifies the forecasts in the cache and ETags
+    generated_at = utcnow()
+    started = time.perf_counter()
+    model_registry.start_cycle()
     predictions = db.query(Prediction).all()
-    
+
+    # Latest reading of every predicted station in one query; ascending order leaves the newest per station
+    latest_measurements = {
+        measurement.station_id: measurement
+        for measurement in db.query(Measurement).filter(
+            Measurement.station_id.in_([prediction.station_id for prediction in predictions])
+        ).order_by(Measurement.timestamp)
+    }
+
     for prediction in predictions:
         station_id = prediction.station_id
         nearby_station_name = prediction.nearby_station
         
-        recent_measurement = db.query(Measurement).filter(
-            Measurement.station_id == station_id
-        ).order_by(Measurement.timestamp.desc()).first()
+        recent_measurement = latest_measurements.get(station_id)
         
         if not recent_measurement:
             print(f"No recent measurement for station {station_id}")
+            prediction_stations.inc(outcome="no_measurement")
             continue
         
         current_values = {
@@ -115,6 +147,7 @@ def generate_predictions(db: Session):
         models = {p: load_model(nearby_station_name, p) for p in ['pm25', 'pm10', 'no2', 'co', 'so2', 'ozone', 'aqi']}
         if not any(models.values()):
             print(f"No models loaded for station {nearby_station_name}")
+            prediction_stations.inc(outcome="no_models")
             continue
         
         try:
@@ -128,26 +161,115 @@ def generate_predictions(db: Session):
             prediction.so2_predicted = forecast['so2']
             prediction.ozone_predicted = forecast['ozone']
             prediction.aqi_predicted = forecast['aqi']
-            prediction.prediction_time = datetime.now(timezone.utc) + timedelta(hours=48)
-            prediction.created_at = datetime.now(timezone.utc)
+            prediction.prediction_time = generated_at + timedelta(hours=48)
+            prediction.created_at = generated_at
+            prediction_stations.inc(outcome="predicted")
         except Exception as e:
             print(f"Prediction failed for station {station_id}: {e}")
+            prediction_stations.inc(outcome="failed")
             continue
     
+    # Snapshot before commit expires the objects, so filling the cache costs no query
+    rows = [forecast_row(prediction) for prediction in predictions]
+    announce_generation(db, generated_at)
     db.commit()
+    forecast_cache.fill(rows, generated_at)
+    prediction_cycle.observe(time.perf_counter() - started)
     print("✅ Predictions generated successfully")
+# -------------------------
+# Read helpers
+# -------------------------
+
+POLLUTANTS = ('pm25', 'pm10', 'no2', 'ozone', 'co', 'so2', 'aqi')
+METADATA_FIELDS = ('station_id', 'nearby_station', 'prediction_time', 'created_at')
+
+
+def parse_pollutants(pollutants: Optional[str]) -> List[str]:
+    if not pollutants:
+        return list(POLLUTANTS)
+    names = list(dict.fromkeys(name.strip() for name in pollutants.split(",") if name.strip()))
+    unknown = [name for name in names if name not in POLLUTANTS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown pollutants: {', '.join(unknown)}. Available: {', '.join(POLLUTANTS)}"
+        )
+    return names
+
+
+def parse_station_ids(station_ids: str) -> List[int]:
+    try:
+        ids = list(dict.fromkeys(int(part) for part in station_ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="station_ids must be comma separated integers"
+        )
+    if not ids or len(ids) > MAX_BULK_STATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {MAX_BULK_STATIONS} station_ids are required"
+        )
+    return ids
+
+
+def forecast_slice(row: dict, pollutants: List[str], hours: int) -> dict:
+    """The metadata plus the first `hours` values of each requested pollutant."""
+    data = {name: row[name] for name in METADATA_FIELDS}
+    for name in pollutants:
+        values = row[f"{name}_predicted"]
+        data[f"{name}_predicted"] = values[:hours] if values is not None else None
+    return data
+
+
 # -------------------------
 # Endpoints
 # -------------------------
 
-@router.get("/{station_id}")
-async def get_predictions(station_id: int, db: Session = Depends(get_db)):
+@router.get("/", response_model=List[PredictionResponse])
+@query_budget(1)
+async def get_bulk_predictions(
+        request: Request,
+        station_ids: str = Query(..., description="Comma separated station ids, e.g. 1,2,3"),
+        pollutants: Optional[str] = Query(None, description="Comma separated subset of pm25,pm10,no2,ozone,co,so2,aqi"),
+        hours: int = Query(FORECAST_HOURS, ge=1, le=FORECAST_HOURS),
+        db: Session = Depends(get_read_db)
+):
+    """Forecasts for many stations in one call; stations without a forecast are left out."""
+    names = parse_pollutants(pollutants)
+    ids = parse_station_ids(station_ids)
+    forecast_cache.ensure_fresh(db)
+
+    etag = forecast_etag(sorted(ids), names, hours)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    rows = [forecast_cache.get(station_id) for station_id in ids]
+    content = [forecast_slice(row, names, hours) for row in rows if row is not None]
+    return ORJSONResponse(content, headers=cache_headers(etag))
+
+
+@router.get("/{station_id}", response_model=PredictionResponse)
+@query_budget(1)
+async def get_predictions(
+        station_id: int,
+        request: Request,
+        pollutants: Optional[str] = Query(None, description="Comma separated subset of pm25,pm10,no2,ozone,co,so2,aqi"),
+        hours: int = Query(FORECAST_HOURS, ge=1, le=FORECAST_HOURS),
+        db: Session = Depends(get_read_db)
+):
     """Retrieve predictions for a specific station_id."""
-    prediction = db.query(Prediction).filter(
-        Prediction.station_id == station_id
-    ).first()
-    
-    if not prediction:
+    names = parse_pollutants(pollutants)
+    forecast_cache.ensure_fresh(db)
+
+    row = forecast_cache.get(station_id)
+    if not row:
         raise HTTPException(404, "No prediction found for this station")
-    
-    return prediction
+
+    etag = forecast_etag(station_id, names, hours)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    return ORJSONResponse(forecast_slice(row, names, hours), headers=cache_headers(etag))
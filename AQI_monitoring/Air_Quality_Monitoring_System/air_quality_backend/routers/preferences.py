@@ -11,6 +11,7 @@ from ..schemas import (
     UserPreferenceResponse
 )
 from ..utils.auth import get_current_active_user
+from ..utils.notifications import alert_index, announce_preference_change
 
 router = APIRouter(prefix="/preferences", tags=["Preferences"])
 
@@ -71,8 +72,11 @@ async def create_preference(
     )
 
     db.add(new_preference)
+    db.flush()
+    announce_preference_change(db, new_preference.user_id, new_preference.station_id)
     db.commit()
     db.refresh(new_preference)
+    alert_index.upsert(new_preference)
     new_preference = db.query(UserPreference).options(
         joinedload(UserPreference.station)
     ).filter(
@@ -107,8 +111,10 @@ async def update_preference(
         setattr(preference, field, value)
 
     preference.updated_at = datetime.now(timezone.utc)
+    announce_preference_change(db, preference.user_id, preference.station_id)
     db.commit()
     db.refresh(preference)
+    alert_index.upsert(preference)
     return preference
 
 
@@ -119,5 +125,8 @@ async def delete_preference(
         current_user: User = Depends(get_current_active_user)
 ):
     preference = await get_user_preference_or_404(preference_id, db, current_user)
+    station_id, user_id = preference.station_id, preference.user_id
     db.delete(preference)
+    announce_preference_change(db, user_id, station_id)
     db.commit()
+    alert_index.remove(station_id, user_id)
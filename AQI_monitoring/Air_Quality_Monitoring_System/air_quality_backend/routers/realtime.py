@@ -0,0 +1,78 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from ..database import SessionLocal
+from ..utils.auth import get_user_from_token
+from ..utils.pubsub import hub
+
+router = APIRouter(tags=["Realtime"])
+
+
+def parse_station_ids(value: Optional[str]) -> Optional[set]:
+    if not value:
+        return None
+    return {int(part) for part in value.split(",") if part.strip()}
+
+
+def parse_bbox(value: Optional[str]) -> Optional[tuple]:
+    if not value:
+        return None
+    min_lat, min_lon, max_lat, max_lon = (float(part) for part in value.split(","))
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def lookup_user(token: str):
+    with SessionLocal() as db:
+        return get_user_from_token(db, token)
+
+
+async def forward_events(websocket: WebSocket, subscription):
+    while True:
+        event = await subscription.queue.get()
+        await websocket.send_json(event)
+
+
+@router.websocket("/ws")
+async def live_updates(
+        websocket: WebSocket,
+        station_ids: Optional[str] = None,
+        bbox: Optional[str] = None,
+        token: Optional[str] = None
+):
+    """
+    Push live readings and alerts instead of polling.
+
+    Query parameters:
+    - station_ids: comma separated station ids, e.g. `1,2,3`
+    - bbox: `min_lat,min_lon,max_lat,max_lon`
+    - token: access token; when given, the user's threshold alerts are pushed too
+
+    Without station_ids or bbox, readings from every station are sent.
+    """
+    try:
+        filters = {"station_ids": parse_station_ids(station_ids), "bbox": parse_bbox(bbox)}
+    except ValueError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    if token:
+        # Blocking DB lookup: keep it off the event loop
+        user = await run_in_threadpool(lookup_user, token)
+        if not user or not user.is_active:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        filters["user_id"] = user.user_id
+
+    await websocket.accept()
+    subscription = hub.subscribe(**filters)
+    sender = asyncio.create_task(forward_events(websocket, subscription))
+    try:
+        # Client messages are not used; reading only detects the disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        hub.unsubscribe(subscription)
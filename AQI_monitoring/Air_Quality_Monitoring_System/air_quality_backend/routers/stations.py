@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from datetime import datetime, timezone
 from typing import List, Optional
-from ..database import get_db
-from ..models import Station, User, UserRole
+from ..database import get_db, get_read_db
+from ..models import Station, Measurement, User, UserRole
 from ..schemas import (
     StationCreate,
     StationResponse,
-    StationUpdate
+    StationUpdate,
+    StationSearchResult,
+    StationSummaryResponse
 )
 from ..utils.auth import get_current_active_user
+from ..utils.station_search import station_search, search_database, DEFAULT_LIMIT
+from ..utils.responses import rows_response
+from ..utils.sql_budget import query_budget
+from ..utils.response_cache import response_cache
+from ..http_cache import cache_policy
 
 router = APIRouter(prefix="/stations", tags=["Stations"])
 
@@ -39,6 +46,56 @@ def calculate_bounding_box(lat: float, lon: float, radius_km: float):
     )
 
 
+# Columns behind each StationSummaryResponse field
+SUMMARY_COLUMNS = {
+    "station_id": Station.station_id,
+    "station_name": Station.station_name,
+    "latitude": Station.latitude,
+    "longitude": Station.longitude,
+    "epa_name": Station.epa_name,
+    "epa_link": Station.epa_link,
+    "is_active": Station.is_active,
+    "source": Station.source,
+    "created_at": Station.created_at,
+    "updated_at": Station.updated_at,
+    "aqi": Measurement.aqi,
+    "pm25": Measurement.pm25,
+    "pm10": Measurement.pm10,
+    "no2": Measurement.no2,
+    "co": Measurement.co,
+    "so2": Measurement.so2,
+    "ozone": Measurement.ozone,
+    "measured_at": Measurement.timestamp,
+}
+MEASUREMENT_FIELDS = {"aqi", "pm25", "pm10", "no2", "co", "so2", "ozone", "measured_at"}
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(SUMMARY_COLUMNS)
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in SUMMARY_COLUMNS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(SUMMARY_COLUMNS)}"
+        )
+    return names
+
+
+def summary_query(db: Session, names: List[str]):
+    """
+    Select only the requested columns, one row per station.
+
+    Measurements hold one row per station, so the outer join does not multiply
+    rows, and it is skipped entirely when no reading field is requested.
+    """
+    query = db.query(*[SUMMARY_COLUMNS[name].label(name) for name in names]).select_from(Station)
+    if MEASUREMENT_FIELDS.intersection(names):
+        query = query.outerjoin(Measurement, Measurement.station_id == Station.station_id)
+    return query
+
+
 # -------------------------
 # Endpoints
 # -------------------------
@@ -64,18 +121,25 @@ async def create_station(
     db.add(new_station)
     db.commit()
     db.refresh(new_station)
+    station_search.upsert(new_station)
+    response_cache.invalidate("stations")
     return new_station
 
 
-@router.get("/", response_model=List[StationResponse])
+@router.get("/", response_model=List[StationSummaryResponse])
+@cache_policy(ttl=60, tags=("stations", "measurements"))
+@query_budget(1)
 async def get_stations(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         active_only: bool = Query(True),
         source: Optional[str] = Query(None),
+        fields: Optional[str] = Query(None, description="Comma separated subset of fields to return"),
         limit: int = Query(10000, le=50000),
         offset: int = 0
 ):
-    query = db.query(Station).options(joinedload(Station.measurements))
+    """List stations with their latest reading; use GET /stations/{id} for full detail"""
+    names = parse_fields(fields)
+    query = summary_query(db, names)
 
     if active_only:
         query = query.filter(Station.is_active)
@@ -83,13 +147,32 @@ async def get_stations(
     if source:
         query = query.filter(Station.source.ilike(f"%{source}%"))
 
-    return query.order_by(Station.station_name).limit(limit).offset(offset).all()
+    rows = query.order_by(Station.station_name).limit(limit).offset(offset).all()
+    # Rows are already shaped like StationSummaryResponse; skip per-object validation
+    return rows_response(rows, names)
+
+
+@router.get("/search", response_model=List[StationSearchResult])
+@cache_policy(ttl=300, tags=("stations",))
+async def search_stations(
+        response: Response,
+        db: Session = Depends(get_read_db),
+        q: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=50)
+):
+    """Ranked, typo-tolerant station name search for autocomplete"""
+    if not station_search.ready:
+        # The index loads in the background after startup; until then plain
+        # substring matches from the database, not cached
+        response.headers["Cache-Control"] = "no-store"
+        return search_database(db, q, limit)
+    return station_search.search(q, limit)
 
 
 @router.get("/{station_id}", response_model=StationResponse)
 async def get_station(
         station_id: int,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """Get detailed station information"""
     station = db.query(Station).options(
@@ -105,23 +188,27 @@ async def get_station(
     return station
 
 
-@router.get("/nearby/", response_model=List[StationResponse])
+@router.get("/nearby/", response_model=List[StationSummaryResponse])
+@cache_policy(ttl=60, tags=("stations", "measurements"))
+@query_budget(1)
 async def get_nearby_stations(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         lat: float = Query(...),
         lon: float = Query(...),
         radius_km: float = Query(10, ge=1, le=100),
+        fields: Optional[str] = Query(None, description="Comma separated subset of fields to return"),
         limit: int = Query(50, le=200)
 ):
     min_lat, max_lat, min_lon, max_lon = calculate_bounding_box(lat, lon, radius_km)
+    names = parse_fields(fields)
 
-    stations = db.query(Station).filter(
+    rows = summary_query(db, names).filter(
         Station.latitude.between(min_lat, max_lat),
         Station.longitude.between(min_lon, max_lon),
         Station.is_active
-    ).options(joinedload(Station.measurements)).limit(limit).all()
+    ).limit(limit).all()
 
-    return stations
+    return rows_response(rows, names)
 
 
 @router.patch("/{station_id}", response_model=StationResponse)
@@ -145,6 +232,8 @@ async def update_station(
     station.updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(station)
+    station_search.upsert(station)
+    response_cache.invalidate("stations")
     return station
 
 
@@ -161,3 +250,5 @@ async def delete_station(
 
     db.delete(station)
     db.commit()
+    station_search.remove(station_id)
+    response_cache.invalidate("stations")
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from ..config import settings
+from ..database import engine
+from ..models import User, UserRole
+from ..utils.auth import get_current_active_user
+from ..utils.query_profiler import build_report, reset_profile
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+async def verify_admin(current_user: User = Depends(get_current_active_user)):
+    if current_user.role != UserRole.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
+
+
+def require_profiling():
+    if not settings.QUERY_PROFILING:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Query profiling is disabled; set QUERY_PROFILING=true"
+        )
+
+
+@router.get("/query-profile", dependencies=[Depends(require_profiling)])
+def get_query_profile(_: User = Depends(verify_admin)):
+    """
+    SQL issued per endpoint since startup or the last reset (Admin only)
+
+    Slow SELECTs are EXPLAINed and come with suggested indexes.
+    """
+    return build_report(engine)
+
+
+@router.delete("/query-profile", status_code=status.HTTP_204_NO_CONTENT,
+               dependencies=[Depends(require_profiling)])
+async def clear_query_profile(_: User = Depends(verify_admin)):
+    """Reset collected query statistics (Admin only)"""
+    reset_profile()
@@ -0,0 +1,204 @@
+# air_quality_backend/scheduler.py
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import func
+from .config import settings
+from .database import SessionLocal, session_engine
+from .models import Prediction
+from .routers.predictions import generate_predictions
+from .utils.health import watch_scheduler, unwatch_scheduler
+from .utils.metrics import track_job
+from .utils.reputation import fold_reputation_events
+from .utils.retention import run_retention
+
+
+# -------------------------
+# Cluster-wide jobs (one leader runs them)
+# -------------------------
+
+def scheduled_cleanup():
+    """Daily maintenance tasks"""
+    with SessionLocal() as db:
+        try:
+            print("🔄 Running scheduled cleanup...")
+            with track_job("cleanup"):
+                reports = run_retention(db)
+            for report in reports:
+                print(f"🧹 {report['table']}: removed {report['rows']} rows in {report['seconds']}s")
+            print("✅ Cleanup completed successfully")
+        except Exception as e:
+            print(f"❌ Cleanup failed: {str(e)}")
+        finally:
+            db.close()
+
+def scheduled_predictions():
+    """Generate predictions every PREDICTION_INTERVAL_MINUTES"""
+    with SessionLocal() as db:
+        try:
+            print("🔮 Generating predictions...")
+            with track_job("predictions"):
+                generate_predictions(db)
+            print("✅ Predictions generated successfully")
+        except Exception as e:
+            print(f"❌ Prediction generation failed: {str(e)}")
+        finally:
+            db.close()
+
+def scheduled_reputation_fold():
+    """Fold queued reputation events into user_reputation"""
+    with SessionLocal() as db:
+        try:
+            with track_job("reputation_fold"):
+                applied = fold_reputation_events(db)
+            if applied:
+                print(f"🏅 Applied {applied} reputation events")
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Reputation aggregation failed: {str(e)}")
+        finally:
+            db.close()
+
+
+def forecasts_stale() -> bool:
+    """True when the latest forecasts are older than one prediction interval (or missing)."""
+    with SessionLocal() as db:
+        latest = db.query(func.max(Prediction.created_at)).scalar()
+    if latest is None:
+        return True
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - latest > timedelta(minutes=settings.PREDICTION_INTERVAL_MINUTES)
+
+
+def build_scheduler() -> BackgroundScheduler:
+    """Scheduler with the jobs that must run once per deployment, not once per process."""
+    scheduler = BackgroundScheduler()
+
+    # Daily cleanup at 3 AM UTC
+    scheduler.add_job(
+        scheduled_cleanup,
+        'cron',
+        id="cleanup",
+        hour=3,
+        minute=0,
+        timezone="UTC"
+    )
+
+    # Predictions every PREDICTION_INTERVAL_MINUTES
+    scheduler.add_job(
+        scheduled_predictions,
+        'interval',
+        id="predictions",
+        minutes=settings.PREDICTION_INTERVAL_MINUTES,
+        timezone="UTC",
+        max_instances=1,
+        coalesce=True
+    )
+
+    # Reputation ledger aggregation every minute
+    scheduler.add_job(
+        scheduled_reputation_fold,
+        'interval',
+        id="reputation_fold",
+        minutes=1,
+        timezone="UTC",
+        max_instances=1,
+        coalesce=True
+    )
+
+    return scheduler
+
+
+# -------------------------
+# Leader election
+# -------------------------
+
+class SchedulerLeader:
+    """
+    Runs the cluster-wide jobs in exactly one process at a time.
+
+    Every candidate (API workers with RUN_SCHEDULER_IN_API, and the standalone
+    worker) polls pg_try_advisory_lock(SCHEDULER_LOCK_ID) on a connection of
+    its own. The holder starts the scheduler and keeps that connection open,
+    checking it every SCHEDULER_LEADER_POLL_SECONDS. If the process dies or
+    the connection drops, PostgreSQL releases the lock and a standby takes
+    over at its next poll.
+    """
+
+    def __init__(self):
+        self.scheduler: Optional[BackgroundScheduler] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.scheduler is not None
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop campaigning; a leader finishes its running jobs and releases the lock."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        """Campaign until stop() is called; blocks."""
+        while not self._stop.is_set():
+            connection = None
+            try:
+                raw = session_engine.raw_connection()
+                raw.detach()  # Held for the life of the lock, not returned to the pool
+                connection = raw.driver_connection
+                connection.autocommit = True
+                while not self._stop.is_set():
+                    cursor = connection.cursor()
+                    if self.is_leader:
+                        # Raises once the session, and with it the lock, is gone
+                        cursor.execute("SELECT 1")
+                    else:
+                        cursor.execute("SELECT pg_try_advisory_lock(%s)", (settings.SCHEDULER_LOCK_ID,))
+                        if cursor.fetchone()[0]:
+                            self._lead()
+                    self._stop.wait(settings.SCHEDULER_LEADER_POLL_SECONDS)
+            except Exception as e:
+                print(f"❌ Scheduler leader connection failed, retrying: {str(e)}")
+            finally:
+                self._resign()
+                if connection is not None:
+                    try:
+                        # Closing the session releases the advisory lock
+                        connection.close()
+                    except Exception:
+                        pass
+            self._stop.wait(settings.SCHEDULER_LEADER_POLL_SECONDS)
+
+    def start(self) -> threading.Thread:
+        """Campaign from a daemon thread, so callers (API startup) don't wait for it."""
+        self._thread = threading.Thread(target=self.run, name="scheduler-leader", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _lead(self):
+        scheduler = build_scheduler()
+        watch_scheduler(scheduler)
+        scheduler.start()
+        self.scheduler = scheduler
+        print("👑 Elected scheduler leader; running cleanup, predictions & reputation jobs")
+
+        # Catch up right away after a restart or failover, in the scheduler's threads
+        if forecasts_stale():
+            print("🔮 Forecasts are stale; generating predictions now")
+            scheduler.get_job("predictions").modify(next_run_time=datetime.now(timezone.utc))
+
+    def _resign(self):
+        if self.scheduler is None:
+            return
+        scheduler, self.scheduler = self.scheduler, None
+        unwatch_scheduler(scheduler)
+        # Let running jobs finish before the lock is released
+        scheduler.shutdown(wait=True)
+        print("⏹️ Scheduler leadership released")
+
+
+leader = SchedulerLeader()
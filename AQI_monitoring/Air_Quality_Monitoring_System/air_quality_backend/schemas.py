@@ -151,6 +151,36 @@ class StationResponse(StationBase):
     class Config:
         from_attributes = True
 
+class StationSummaryResponse(BaseModel):
+    """Station list entry with its latest reading flattened in; any subset via ?fields="""
+    station_id: Optional[int] = None
+    station_name: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    epa_name: Optional[str] = None
+    epa_link: Optional[str] = None
+    is_active: Optional[bool] = None
+    source: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    aqi: Optional[int] = None
+    pm25: Optional[float] = None
+    pm10: Optional[float] = None
+    no2: Optional[float] = None
+    co: Optional[float] = None
+    so2: Optional[float] = None
+    ozone: Optional[float] = None
+    measured_at: Optional[datetime] = None
+
+
+class StationSearchResult(BaseModel):
+    station_id: int
+    station_name: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    score: float
+
+
 class UserResponse(BaseModel):
     user_id: int
     username: str
@@ -182,6 +212,7 @@ class PostResponse(PostBase):
     updated_at: datetime | None
     upvotes: int
     downvotes: int
+    user_vote: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -219,6 +250,13 @@ class UserReputationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class LeaderboardEntry(BaseModel):
+    user_id: int
+    username: str
+    aura_points: int
+    streak_points: int
+    credibility_points: int
+
 class ReportStatus(str, Enum):
     pending = "pending"
     verified = "verified"
@@ -282,6 +320,8 @@ class NotificationResponse(NotificationBase):
     user_id: int
     is_read: bool
     created_at: datetime
+    # Broadcast ids are a separate sequence; mark those read via /notifications/broadcasts/{id}/read
+    is_broadcast: bool = False
 
     class Config:
         from_attributes = True
@@ -434,14 +474,15 @@ from typing import Optional
 from datetime import datetime
 
 class PredictionResponse(BaseModel):
+    # Every pollutant array is included by default; ?pollutants= limits them to a subset (the rest are omitted)
     station_id: int
-    pm25_predicted: List[Optional[float]]  # List of 48 values
-    pm10_predicted: List[Optional[float]]
-    no2_predicted: List[Optional[float]]
-    co_predicted: List[Optional[float]]
-    so2_predicted: List[Optional[float]]
-    ozone_predicted: List[Optional[float]]
-    aqi_predicted: List[Optional[int]]  # List of 48 integers
+    pm25_predicted: Optional[List[Optional[float]]] = None  # Up to 48 hourly values
+    pm10_predicted: Optional[List[Optional[float]]] = None
+    no2_predicted: Optional[List[Optional[float]]] = None
+    co_predicted: Optional[List[Optional[float]]] = None
+    so2_predicted: Optional[List[Optional[float]]] = None
+    ozone_predicted: Optional[List[Optional[float]]] = None
+    aqi_predicted: Optional[List[Optional[int]]] = None
     nearby_station: str
     prediction_time: datetime
     created_at: datetime
@@ -0,0 +1,101 @@
+# air_quality_backend/utils/alert_index.py
+import bisect
+import threading
+from sqlalchemy.orm import Session
+from ..models import UserPreference
+
+POLLUTANTS = ('pm25', 'pm10', 'no2', 'co', 'so2', 'ozone', 'aqi')
+
+
+class ThresholdIndex:
+    """
+    In-process index of subscriber thresholds, per station and per pollutant.
+
+    Each (station, pollutant) holds a list of (threshold, user_id) tuples kept
+    sorted by threshold, so the subscribers whose limit is exceeded by a
+    reading are a prefix found with one binary search.
+
+    The index is per process. It is rebuilt on startup and periodically by the
+    scheduler. Between rebuilds, the preferences router updates it directly,
+    and announces each write over NOTIFY so every other process reloads the
+    changed preference (notifications.refresh_alert_preferences).
+    """
+
+    def __init__(self, defaults: dict):
+        self._defaults = defaults
+        self._lock = threading.RLock()
+        self._entries = {}      # station_id -> {pollutant: [(threshold, user_id), ...]}
+        self._user_limits = {}  # (station_id, user_id) -> {pollutant: threshold}
+        self.ready = False
+
+    def _limits_for(self, pref) -> dict:
+        # Same fallback as the original per-user loop: `pref.<param> or default`
+        return {p: float(getattr(pref, p) or self._defaults[p]) for p in POLLUTANTS}
+
+    def _insert(self, entries: dict, user_limits: dict, station_id: int, user_id: int, limits: dict):
+        station_entries = entries.setdefault(station_id, {p: [] for p in POLLUTANTS})
+        for pollutant, threshold in limits.items():
+            bisect.insort(station_entries[pollutant], (threshold, user_id))
+        user_limits[(station_id, user_id)] = limits
+
+    def _remove(self, station_id: int, user_id: int):
+        limits = self._user_limits.pop((station_id, user_id), None)
+        if limits is None:
+            return
+        station_entries = self._entries.get(station_id, {})
+        for pollutant, threshold in limits.items():
+            column = station_entries.get(pollutant, [])
+            pos = bisect.bisect_left(column, (threshold, user_id))
+            if pos < len(column) and column[pos] == (threshold, user_id):
+                column.pop(pos)
+        if not any(station_entries.values()):
+            self._entries.pop(station_id, None)
+
+    def rebuild(self, db: Session) -> int:
+        """Reload every preference from the database. Returns the number indexed."""
+        rows = db.query(
+            UserPreference.user_id,
+            UserPreference.station_id,
+            *[getattr(UserPreference, p) for p in POLLUTANTS]
+        ).all()
+
+        entries, user_limits = {}, {}
+        for row in rows:
+            self._insert(entries, user_limits, row.station_id, row.user_id, self._limits_for(row))
+
+        with self._lock:
+            self._entries = entries
+            self._user_limits = user_limits
+            self.ready = True
+        return len(rows)
+
+    def upsert(self, pref: UserPreference):
+        with self._lock:
+            self._remove(pref.station_id, pref.user_id)
+            self._insert(self._entries, self._user_limits, pref.station_id, pref.user_id, self._limits_for(pref))
+
+    def remove(self, station_id: int, user_id: int):
+        with self._lock:
+            self._remove(station_id, user_id)
+
+    def exceeded(self, station_id: int, values: dict) -> dict:
+        """
+        Find subscribers whose thresholds are exceeded by a reading.
+
+        Returns {user_id: [(pollutant, value, threshold), ...]}.
+        """
+        crossed = {}
+        with self._lock:
+            station_entries = self._entries.get(station_id)
+            if not station_entries:
+                return crossed
+            for pollutant in POLLUTANTS:
+                value = values.get(pollutant)
+                if not value:
+                    continue
+                column = station_entries[pollutant]
+                # Everything before the first threshold >= value is exceeded
+                end = bisect.bisect_left(column, (float(value),))
+                for threshold, user_id in column[:end]:
+                    crossed.setdefault(user_id, []).append((pollutant, value, threshold))
+        return crossed
@@ -2,20 +2,23 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from functools import lru_cache
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from ..config import settings
 from ..database import get_db
 from ..models import User
 
-# Password context configuration
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    bcrypt__rounds=12,
-    deprecated="auto"
-)
+@lru_cache(maxsize=None)
+def pwd_context():
+    """Password context, built on first use so passlib/bcrypt stay out of startup."""
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["bcrypt"],
+        bcrypt__rounds=12,
+        deprecated="auto"
+    )
 
 # OAuth2 scheme configuration
 oauth2_scheme = OAuth2PasswordBearer(
@@ -25,11 +28,11 @@ oauth2_scheme = OAuth2PasswordBearer(
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def create_access_token(
@@ -49,6 +52,23 @@ def create_access_token(
     )
 
 
+def get_user_from_token(db: Session, token: str) -> Optional[User]:
+    """Resolve a bearer token to its user, or None if it is invalid."""
+    try:
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY.get_secret_value(),
+            algorithms=[settings.ALGORITHM]
+        )
+        email: str = payload.get("sub")  # Changed to email
+    except JWTError:
+        return None
+    if not email:
+        return None
+
+    return db.query(User).filter(User.email == email).first()
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -59,19 +79,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY.get_secret_value(),
-            algorithms=[settings.ALGORITHM]
-        )
-        email: str = payload.get("sub")  # Changed to email
-        if not email:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user: Optional[User] = db.query(User).filter(User.email == email).first()
+    user = get_user_from_token(db, token)
     if not user:
         raise credentials_exception
 
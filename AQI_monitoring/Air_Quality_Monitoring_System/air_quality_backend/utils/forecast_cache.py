@@ -0,0 +1,130 @@
+# air_quality_backend/utils/forecast_cache.py
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import Prediction
+
+FORECAST_COLUMNS = (
+    'station_id', 'nearby_station', 'prediction_time', 'created_at',
+    'pm25_predicted', 'pm10_predicted', 'no2_predicted', 'ozone_predicted',
+    'co_predicted', 'so2_predicted', 'aqi_predicted'
+)
+
+# A cycle still running this long after it was due is given up on and the
+# cache re-read from the database, at most once per RELOAD_INTERVAL_SECONDS;
+# covers generations whose NOTIFY was missed
+STALE_GRACE = timedelta(minutes=5)
+RELOAD_INTERVAL_SECONDS = 60
+
+# Each committed cycle is announced here with its generation, so every process reloads
+FORECASTS_CHANNEL = "aqi_forecasts"
+
+
+def utcnow() -> datetime:
+    # Prediction timestamps are stored as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def forecast_row(prediction: Prediction) -> dict:
+    return {name: getattr(prediction, name) for name in FORECAST_COLUMNS}
+
+
+class ForecastCache:
+    """
+    Every station's latest forecast, held per process.
+
+    Forecasts only change once per prediction cycle, so the cycle's start time
+    is the generation: generate_predictions replaces the whole cache with the
+    rows it has just written, and responses carry an ETag for the generation
+    and a max-age running until the next cycle is due. Other processes learn
+    of a new generation through NOTIFY and re-read the table (one query) on
+    their next forecast request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self.generated_at: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._expired = False
+
+    def fill(self, rows: list, generated_at: datetime):
+        with self._lock:
+            self._rows = {row['station_id']: row for row in rows}
+            self.generated_at = generated_at
+            self._checked_at = time.monotonic()
+            self._expired = False
+
+    def load(self, db: Session):
+        predictions = db.query(*[getattr(Prediction, name) for name in FORECAST_COLUMNS]).all()
+        rows = [dict(zip(FORECAST_COLUMNS, row)) for row in predictions]
+        generated_at = max((row['created_at'] for row in rows if row['created_at']), default=utcnow())
+        self.fill(rows, generated_at)
+
+    @property
+    def next_run(self) -> datetime:
+        return self.generated_at + timedelta(minutes=settings.PREDICTION_INTERVAL_MINUTES)
+
+    @property
+    def generation(self) -> str:
+        return self.generated_at.strftime("%Y%m%d%H%M%S")
+
+    def expire(self, payloads: list):
+        """
+        NOTIFY handler: reload on the next request unless this process already
+        holds the announced generation. Runs on the pubsub listener thread.
+        """
+        if self.generated_at is not None and any(payload != self.generation for payload in payloads):
+            self._expired = True
+
+    def ensure_fresh(self, db: Session):
+        """Load on first use, after a new generation is announced, and once the next cycle is overdue."""
+        if self.generated_at is not None and not self._expired:
+            if utcnow() < self.next_run + STALE_GRACE:
+                return
+            if time.monotonic() - self._checked_at < RELOAD_INTERVAL_SECONDS:
+                return
+        self.load(db)
+
+    def get(self, station_id: int) -> Optional[dict]:
+        return self._rows.get(station_id)
+
+    def max_age(self) -> int:
+        return max(0, int((self.next_run - utcnow()).total_seconds()))
+
+
+forecast_cache = ForecastCache()
+
+
+def announce_generation(db: Session, generated_at: datetime):
+    """NOTIFY every process of a new forecast generation; delivered on commit. Does not commit."""
+    db.execute(text("SELECT pg_notify(:channel, :payload)"),
+               {"channel": FORECASTS_CHANNEL, "payload": generated_at.strftime("%Y%m%d%H%M%S")})
+
+
+def forecast_etag(*parts) -> str:
+    """ETag for a forecast response: the generation plus the request's shape."""
+    key = "|".join(str(part) for part in parts)
+    digest = hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+    return f'"{forecast_cache.generation}-{digest}"'
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": f"public, max-age={forecast_cache.max_age()}"}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response when the client already holds this ETag, else None."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
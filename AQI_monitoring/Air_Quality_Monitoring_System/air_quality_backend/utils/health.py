@@ -0,0 +1,240 @@
+# air_quality_backend/utils/health.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from apscheduler.events import (
+    EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
+)
+from sqlalchemy import select, func, text
+from ..config import settings
+from ..database import engine, replica_router
+from ..engine_factory import pool_stats
+from ..models import Prediction
+from .model_registry import model_registry
+from .forecast_cache import STALE_GRACE, utcnow
+from .ingest import ingest_freshness, STALE_READING_SECONDS
+
+STARTED_AT = time.monotonic()
+
+# Probes run here so a hung database ties up these threads, not the request threadpool
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="health-probe")
+# Probes still running past their timeout; a new one is not started until they finish
+_pending = {}
+
+_schedulers = []
+_job_runs = {}
+_job_lock = threading.Lock()
+
+_report = {"at": 0.0, "value": None}
+_refresh_lock = asyncio.Lock()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+# -------------------------
+# Scheduler
+# -------------------------
+
+def _on_job_event(event):
+    with _job_lock:
+        run = _job_runs.setdefault(event.job_id, {})
+        if event.code == EVENT_JOB_SUBMITTED:
+            # How late the run was handed to the executor, after its scheduled time
+            run["submitted_at"] = _now()
+            run["lag_seconds"] = round((run["submitted_at"] - event.scheduled_run_times[-1]).total_seconds(), 3)
+        elif event.code == EVENT_JOB_MISSED:
+            run["outcome"] = "missed"
+            run["missed_at"] = _now()
+        else:
+            run["outcome"] = "error" if event.exception else "ok"
+            run["finished_at"] = _now()
+
+
+def watch_scheduler(scheduler):
+    """Report this scheduler's jobs in readiness checks."""
+    scheduler.add_listener(_on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+    with _job_lock:
+        _schedulers.append(scheduler)
+
+
+def unwatch_scheduler(scheduler):
+    scheduler.remove_listener(_on_job_event)
+    with _job_lock:
+        if scheduler in _schedulers:
+            _schedulers.remove(scheduler)
+        for job in scheduler.get_jobs():
+            _job_runs.pop(job.id, None)
+
+
+def scheduler_status() -> dict:
+    """Jobs of the schedulers in this process; cluster jobs appear only in the elected leader."""
+    with _job_lock:
+        schedulers = list(_schedulers)
+        runs = {job_id: dict(run) for job_id, run in _job_runs.items()}
+    if not schedulers:
+        return {"status": "not_running", "jobs": {}}
+
+    now = _now()
+    jobs = {}
+    degraded = not all(scheduler.running for scheduler in schedulers)
+    for job in (job for scheduler in schedulers for job in scheduler.get_jobs()):
+        run = runs.get(job.id, {})
+        overdue = (now - job.next_run_time).total_seconds() if job.next_run_time else 0
+        late = overdue > settings.HEALTH_JOB_LAG_SECONDS
+        degraded = degraded or late or run.get("outcome") in ("error", "missed")
+        jobs[job.id] = {
+            "next_run_at": _iso(job.next_run_time),
+            "overdue_seconds": round(max(0.0, overdue), 1),
+            "last_submitted_at": _iso(run.get("submitted_at")),
+            "last_finished_at": _iso(run.get("finished_at")),
+            "last_outcome": run.get("outcome"),
+            "last_lag_seconds": run.get("lag_seconds")
+        }
+    return {"status": "degraded" if degraded else "ok", "jobs": jobs}
+
+
+# -------------------------
+# Database
+# -------------------------
+
+def pool_status() -> dict:
+    stats = pool_stats(engine)
+    return {
+        "status": "degraded" if stats.get("saturation", 0) >= settings.HEALTH_POOL_SATURATION else "ok",
+        **stats
+    }
+
+
+def _ping_database() -> dict:
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(text(f"SET LOCAL statement_timeout = {int(settings.HEALTH_DB_TIMEOUT_SECONDS * 1000)}"))
+        connection.execute(text("SELECT 1")).scalar()
+    return {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def _ingest_status() -> dict:
+    median, p95, oldest, stale, newest = ingest_freshness()
+    return {
+        # No reading at all within the stale window means the ingest service has stopped
+        "status": "ok" if newest is not None and newest <= STALE_READING_SECONDS else "degraded",
+        "newest_reading_age_seconds": round(newest, 1) if newest is not None else None,
+        "median_age_seconds": round(median, 1) if median is not None else None,
+        "p95_age_seconds": round(p95, 1) if p95 is not None else None,
+        "stale_stations": stale
+    }
+
+
+def _models_status() -> dict:
+    """
+    Forecast models, judged by the latest prediction cycle in the database
+    rather than by this process's loads: cycles run in one process only (the
+    elected leader or the worker). Each cycle stamps the stations it predicted
+    with its start time, so a cycle that failed everywhere leaves the newest
+    stamp behind the schedule.
+    """
+    registry = model_registry.status()
+    with engine.connect() as connection:
+        connection.execute(text(f"SET LOCAL statement_timeout = {int(settings.HEALTH_DB_TIMEOUT_SECONDS * 1000)}"))
+        latest = connection.execute(
+            select(Prediction.created_at, func.count())
+            .where(Prediction.created_at.is_not(None))
+            .group_by(Prediction.created_at)
+            .order_by(Prediction.created_at.desc())
+            .limit(1)
+        ).first()
+    last_cycle_at, predicted = latest if latest else (None, 0)
+
+    # The next cycle starts an interval after the last one; allow it STALE_GRACE to finish
+    due = timedelta(minutes=settings.PREDICTION_INTERVAL_MINUTES) + STALE_GRACE
+    if not registry["model_files"]:
+        state = "unavailable"
+    elif last_cycle_at is None or utcnow() - last_cycle_at > due:
+        state = "degraded"
+    else:
+        state = "ok"
+    return {
+        "status": state,
+        "last_cycle_at": _iso(last_cycle_at),
+        "last_cycle_stations": predicted,
+        **registry
+    }
+
+
+async def _probe(name: str, check: Callable[[], dict]) -> dict:
+    """Run a blocking check off the event loop, giving up after HEALTH_DB_TIMEOUT_SECONDS."""
+    pending = _pending.get(name)
+    if pending is not None and not pending.done():
+        return {"status": "unavailable", "error": "previous probe still running"}
+
+    future = asyncio.get_running_loop().run_in_executor(_executor, check)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), settings.HEALTH_DB_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        _pending[name] = future
+        return {"status": "unavailable", "error": f"no response within {settings.HEALTH_DB_TIMEOUT_SECONDS}s"}
+    except Exception as e:
+        return {"status": "unavailable", "error": str(e)}
+
+
+# -------------------------
+# Reports
+# -------------------------
+
+def liveness() -> dict:
+    """The process is up and its event loop is serving; touches no dependency."""
+    return {
+        "status": "ok",
+        "version": settings.VERSION,
+        "uptime_seconds": round(time.monotonic() - STARTED_AT, 1)
+    }
+
+
+async def _build_readiness() -> dict:
+    database = await _probe("database", _ping_database)
+    if database["status"] == "ok":
+        ingest = await _probe("ingest", _ingest_status)
+        models = await _probe("models", _models_status)
+    else:
+        ingest = {"status": "unavailable", "error": "database unavailable"}
+        models = {"status": "unavailable", "error": "database unavailable"}
+
+    checks = {
+        "database": database,
+        "pool": pool_status(),
+        "scheduler": scheduler_status(),
+        "models": models,
+        "replicas": replica_router.status(),
+        "ingest": ingest
+    }
+    # Only the database takes the instance out of rotation; the rest is reported
+    if database["status"] != "ok":
+        overall = "unavailable"
+    elif any(check["status"] not in ("ok", "not_running", "not_configured") for check in checks.values()):
+        overall = "degraded"
+    else:
+        overall = "ok"
+    return {"status": overall, "version": settings.VERSION, "checked_at": _now().isoformat(), "checks": checks}
+
+
+async def readiness() -> dict:
+    """
+    Dependency report, recomputed at most every HEALTH_CACHE_SECONDS.
+
+    Concurrent probes wait for the one refresh in progress, so load balancer
+    polling costs the database a couple of queries per interval per process.
+    """
+    async with _refresh_lock:
+        if _report["value"] is None or time.monotonic() - _report["at"] >= settings.HEALTH_CACHE_SECONDS:
+            _report["value"] = await _build_readiness()
+            _report["at"] = time.monotonic()
+        return _report["value"]
@@ -0,0 +1,47 @@
+# air_quality_backend/utils/ingest.py
+import time
+from sqlalchemy import text
+from sqlalchemy.engine import Row
+from ..database import SessionLocal
+from .metrics import registry, Gauge
+
+# Readings older than this count as stale in the ingest metrics
+STALE_READING_SECONDS = 3600
+FRESHNESS_CACHE_SECONDS = 15
+_freshness = {"at": 0.0, "values": None}
+
+
+def ingest_freshness() -> Row:
+    """
+    Age of the latest reading across active stations, cached between scrapes.
+
+    A row of (median, p95, oldest, stale, newest): ages in seconds (None when
+    there are no readings) and the count of stale stations.
+    """
+    if time.monotonic() - _freshness["at"] > FRESHNESS_CACHE_SECONDS:
+        with SessionLocal() as db:
+            row = db.execute(text("""
+                SELECT percentile_cont(0.5) WITHIN GROUP (ORDER BY age) AS median,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY age) AS p95,
+                       max(age) AS oldest,
+                       count(*) FILTER (WHERE age > :stale) AS stale,
+                       min(age) AS newest
+                FROM (
+                    SELECT extract(epoch FROM now() - m.timestamp) AS age
+                    FROM measurements m JOIN stations s ON s.station_id = m.station_id
+                    WHERE s.is_active
+                ) ages
+            """), {"stale": STALE_READING_SECONDS}).one()
+        _freshness["values"] = row
+        _freshness["at"] = time.monotonic()
+    return _freshness["values"]
+
+
+registry.register(Gauge(
+    "aqi_ingest_lag_seconds", "Age of active stations' latest readings, across stations", ("quantile",),
+    collect=lambda: dict(zip([("0.5",), ("0.95",), ("1",)], [v or 0 for v in ingest_freshness()[:3]]))
+))
+registry.register(Gauge(
+    "aqi_stale_stations", f"Active stations without a reading in the last {STALE_READING_SECONDS}s",
+    collect=lambda: {(): ingest_freshness()[3]}
+))
@@ -0,0 +1,48 @@
+# air_quality_backend/utils/job_tracker.py
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from ..database import SessionLocal
+from ..models import BackgroundJob
+
+JOB_FIELDS = ("job_id", "kind", "status", "total", "processed", "sent", "error",
+              "created_at", "started_at", "finished_at", "updated_at")
+
+
+def _as_dict(job: BackgroundJob) -> dict:
+    return {field: getattr(job, field) for field in JOB_FIELDS}
+
+
+def create_job(kind: str, total: Optional[int] = None) -> dict:
+    """
+    Register a new background job and return its status record.
+
+    Jobs are rows in background_jobs, so any worker can report on a job
+    another one runs, and finished jobs outlive restarts until the cleanup job
+    drops them (JOB_RETENTION_DAYS). A job whose process died mid-run stays
+    "running"; updated_at shows when it last made progress.
+    """
+    now = datetime.now(timezone.utc)
+    job = BackgroundJob(job_id=uuid.uuid4().hex, kind=kind, status="queued", total=total,
+                        processed=0, sent=0, created_at=now, updated_at=now)
+    with SessionLocal() as db:
+        db.add(job)
+        record = _as_dict(job)
+        db.commit()
+    return record
+
+
+def update_job(job_id: str, **fields):
+    """Record progress; commits on its own session, so pollers see it right away."""
+    with SessionLocal() as db:
+        db.query(BackgroundJob).filter(BackgroundJob.job_id == job_id).update(
+            {**fields, "updated_at": datetime.now(timezone.utc)}, synchronize_session=False
+        )
+        db.commit()
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Snapshot of a job's status, or None if unknown."""
+    with SessionLocal() as db:
+        job = db.get(BackgroundJob, job_id)
+        return _as_dict(job) if job else None
@@ -0,0 +1,272 @@
+# air_quality_backend/utils/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Optional, Sequence
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# Per-request query tally; a mutable holder so threadpool endpoints report back into it
+_current_request: ContextVar[Optional[dict]] = ContextVar("metrics_request", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    A metric family; children are keyed by the tuple of their label values.
+
+    Values are set directly, or read from collect() (returning {label tuple: value})
+    at scrape time.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 collect: Optional[Callable[[], dict]] = None):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.collect = collect
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels[name] for name in self.labels)
+
+    def samples(self) -> list:
+        """[(suffix, label values, extra label, value)]"""
+        if self.collect is not None:
+            try:
+                return [("", key, "", value) for key, value in self.collect().items()]
+            except Exception:
+                # A failing collector must not break the whole scrape
+                return []
+        with self._lock:
+            return [("", key, "", value) for key, value in self._values.items()]
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labels, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def samples(self) -> list:
+        with self._lock:
+            snapshot = {key: (list(entry["counts"]), entry["sum"], entry["count"])
+                        for key, entry in self._values.items()}
+        samples = []
+        for key, (counts, total, count) in snapshot.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", key, f'le="{_format_value(bound)}"', cumulative))
+            samples.append(("_sum", key, "", total))
+            samples.append(("_count", key, "", count))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+# HTTP
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requests served, by route template and status", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency until response headers", ("method", "route")))
+http_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements issued per request", ("method", "route"), COUNT_BUCKETS))
+http_db_seconds = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in SQL per request", ("method", "route")))
+
+# Database
+db_query_seconds = registry.register(Histogram(
+    "db_query_duration_seconds", "Duration of every SQL statement, requests and background alike",
+    buckets=QUERY_BUCKETS))
+db_pool_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting for a pooled connection", buckets=QUERY_BUCKETS))
+db_pool_timeouts = registry.register(Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT"))
+
+# Background work
+job_duration = registry.register(Histogram(
+    "scheduler_job_duration_seconds", "Scheduled job run time", ("job",), JOB_BUCKETS))
+job_failures = registry.register(Counter(
+    "scheduler_job_failures_total", "Scheduled job runs that raised", ("job",)))
+job_last_success = registry.register(Gauge(
+    "scheduler_job_last_success_timestamp_seconds", "Unix time of the last successful run", ("job",)))
+prediction_cycle = registry.register(Histogram(
+    "prediction_cycle_duration_seconds", "Wall time of a full prediction cycle", buckets=JOB_BUCKETS))
+prediction_stations = registry.register(Counter(
+    "prediction_stations_total", "Stations processed by prediction cycles, by outcome", ("outcome",)))
+ingest_notifications = registry.register(Counter(
+    "aqi_ingest_notifications_total", "Reading updates announced by the ingest service"))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts.inc()
+            raise
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started)
+
+
+def track_pool(engine: Engine):
+    """Expose the pool's occupancy, read at scrape time."""
+    pool = engine.pool
+    registry.register(Gauge("db_pool_size", "Configured pool size", collect=lambda: {(): pool.size()}))
+    registry.register(Gauge("db_pool_checked_out", "Connections in use", collect=lambda: {(): pool.checkedout()}))
+    registry.register(Gauge("db_pool_overflow", "Connections open beyond the pool size",
+                            collect=lambda: {(): max(0, pool.overflow())}))
+    registry.register(Gauge("db_pool_capacity", "Pool size plus allowed overflow",
+                            collect=lambda: {(): pool.size() + max(0, pool._max_overflow)}))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("metrics_query_start", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    db_query_seconds.observe(elapsed)
+    request = _current_request.get()
+    if request is not None:
+        request["queries"] += 1
+        request["seconds"] += elapsed
+
+
+def install_query_metrics(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+async def instrument_requests(request: Request, call_next):
+    """Middleware recording latency, status and SQL usage per route template."""
+    holder = {"queries": 0, "seconds": 0.0}
+    token = _current_request.set(holder)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        _current_request.reset(token)
+        # Path templates keep label cardinality bounded; unmatched paths share one label
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        http_requests.inc(method=request.method, route=path, status=status)
+        http_latency.observe(elapsed, method=request.method, route=path)
+        http_db_queries.observe(holder["queries"], method=request.method, route=path)
+        http_db_seconds.observe(holder["seconds"], method=request.method, route=path)
+
+
+@contextmanager
+def track_job(job: str):
+    """Time a scheduled job; exceptions are counted as failures and re-raised."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        job_failures.inc(job=job)
+        raise
+    else:
+        job_last_success.set(time.time(), job=job)
+    finally:
+        job_duration.observe(time.perf_counter() - started, job=job)
+
+
+def tracked(job: str, fn: Callable) -> Callable:
+    """Wrap a scheduler job function in track_job."""
+    @wraps(fn)
+    def run(*args, **kwargs):
+        with track_job(job):
+            return fn(*args, **kwargs)
+    return run
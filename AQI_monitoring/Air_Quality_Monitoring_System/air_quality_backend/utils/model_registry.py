@@ -0,0 +1,84 @@
+# air_quality_backend/utils/model_registry.py
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), 'models')
+# Model files are named {nearby_station}_{pollutant}_model.pkl
+MODEL_SUFFIX = "_model.pkl"
+
+
+class ModelRegistry:
+    """
+    Load state of the forecast models, reported as detail by health checks.
+
+    Models are loaded from disk by each prediction cycle and not kept between
+    cycles (the directory holds ~185 MB of them), so this records the outcome
+    of every load rather than holding the models. The counts cover the latest
+    cycle only; last_error is kept for diagnosis. They are per process and
+    only move in the process running the cycles, so readiness itself is
+    judged from the predictions table (see health.py).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = 0
+        self.missing = 0
+        self.failed = 0
+        self.cycle_started_at: Optional[datetime] = None
+        self.last_loaded_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._inventory = {"mtime": None, "files": 0, "stations": 0}
+
+    def start_cycle(self):
+        with self._lock:
+            self.loaded = self.missing = self.failed = 0
+            self.cycle_started_at = datetime.now(timezone.utc)
+
+    def record_load(self):
+        with self._lock:
+            self.loaded += 1
+            self.last_loaded_at = datetime.now(timezone.utc)
+
+    def record_missing(self):
+        with self._lock:
+            self.missing += 1
+
+    def record_failure(self, path: str, error: Exception):
+        with self._lock:
+            self.failed += 1
+            self.last_error = f"{os.path.basename(path)}: {error}"
+
+    def inventory(self, directory: str = MODELS_DIR) -> dict:
+        """Model files and stations on disk; re-listed only when the directory changes."""
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return {"files": 0, "stations": 0}
+        with self._lock:
+            if self._inventory["mtime"] != mtime:
+                files = [name for name in os.listdir(directory) if name.endswith(MODEL_SUFFIX)]
+                stations = {name[:-len(MODEL_SUFFIX)].rsplit("_", 1)[0] for name in files}
+                self._inventory = {"mtime": mtime, "files": len(files), "stations": len(stations)}
+            return {"files": self._inventory["files"], "stations": self._inventory["stations"]}
+
+    def status(self, directory: str = MODELS_DIR) -> dict:
+        """Model files on disk, and this process's loads in its latest cycle."""
+        inventory = self.inventory(directory)
+        with self._lock:
+            return {
+                "model_files": inventory["files"],
+                "stations": inventory["stations"],
+                "this_process": {
+                    "loaded": self.loaded,
+                    "missing": self.missing,
+                    "failed": self.failed,
+                    "cycle_started_at": self.cycle_started_at.isoformat() if self.cycle_started_at else None,
+                    "last_loaded_at": self.last_loaded_at.isoformat() if self.last_loaded_at else None,
+                    "last_error": self.last_error
+                }
+            }
+
+
+model_registry = ModelRegistry()
@@ -1,8 +1,14 @@
 # notifications/utils.py
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, select, update, literal, cast, case, and_, or_, func, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from ..models import UserPreference, Measurement, Notification, Station
-from ..schemas import NotificationType
+from ..config import settings
+from ..database import SessionLocal
+from ..models import UserPreference, Measurement, Notification, Station, NotificationType, AlertState, User
+from .alert_index import ThresholdIndex
+from .job_tracker import update_job
+from .pubsub import hub, alert_event
 
 class DefaultSafetyLimits:
     PM25 = 35.0  # µg/m³
@@ -13,83 +19,377 @@ class DefaultSafetyLimits:
     OZONE = 50.0
     AQI = 100
 
-async def check_measurement_thresholds(
+# Fallback limit per pollutant when a preference leaves it unset
+THRESHOLD_DEFAULTS = {
+    'pm25': DefaultSafetyLimits.PM25,
+    'pm10': DefaultSafetyLimits.PM10,
+    'no2': DefaultSafetyLimits.NO2,
+    'co': DefaultSafetyLimits.CO,
+    'so2': DefaultSafetyLimits.SO2,
+    'ozone': DefaultSafetyLimits.OZONE,
+    'aqi': DefaultSafetyLimits.AQI
+}
+
+# Rows per INSERT ... ON CONFLICT when recording alert states
+ALERT_STATE_CHUNK = 5000
+
+# Users covered by one INSERT ... SELECT when sending admin notifications
+SEND_CHUNK_SIZE = 50000
+
+NOTIFICATION_INSERT_COLUMNS = [
+    "user_id", "notification_type", "title", "message", "station_id",
+    "aqi_value", "aqi_category", "is_read", "created_at"
+]
+
+# Per-process subscriber index used to evaluate alerts without querying preferences
+alert_index = ThresholdIndex(THRESHOLD_DEFAULTS)
+
+# Preference writes are announced here ("user_id:station_id"), so every process updates its alert index
+PREFERENCES_CHANNEL = "aqi_preferences"
+
+# New threshold alerts are announced here (comma separated notification ids), so
+# every process pushes them to its own /ws clients
+ALERTS_CHANNEL = "aqi_alerts"
+
+# Notification ids per NOTIFY; payloads are limited to 8000 bytes
+ALERT_NOTIFY_CHUNK = 500
+
+
+def get_aqi_category(aqi_val: int) -> str:
+    return (
+        "good" if aqi_val <= 50 else
+        "moderate" if aqi_val <= 100 else
+        "unhealthy_sensitive" if aqi_val <= 150 else
+        "unhealthy" if aqi_val <= 200 else
+        "very_unhealthy" if aqi_val <= 300 else
+        "hazardous"
+    )
+
+
+def is_new_or_updated(measurement: Measurement) -> bool:
+    # Ensure time1 and timestamp are timezone-aware
+    time1 = measurement.time1
+    timestamp = measurement.timestamp
+    if time1 and time1.tzinfo is None:
+        time1 = time1.replace(tzinfo=timezone.utc)
+    if timestamp and timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return time1 is None or (timestamp > time1)
+
+
+def check_measurement_thresholds(
         db: Session,
         measurement: Measurement,
         station: Station
-):
-    """Check measurement against all user preferences and send notifications if updated"""
-    try:
-        preferences = db.query(UserPreference).filter(
-            UserPreference.station_id == station.station_id
-        ).all()
+) -> list:
+    """
+    Create threshold alerts for the subscribers of a station.
+
+    Crossing subscribers come from the in-memory alert index when it is loaded,
+    otherwise from one SELECT over user_preferences. They are then filtered
+    through alert_states, so a user is alerted when a pollutant enters the
+    exceeded state or stays there past the re-alert interval. All pollutants a
+    user exceeds are digested into one notification. Returns the notification
+    rows created, with their notification_id. Does not commit.
+    """
+    if not is_new_or_updated(measurement):
+        return []
 
-        aqi_val = measurement.aqi or 0
-        aqi_category = (
-            "good" if aqi_val <= 50 else
-            "moderate" if aqi_val <= 100 else
-            "unhealthy_sensitive" if aqi_val <= 150 else
-            "unhealthy" if aqi_val <= 200 else
-            "very_unhealthy" if aqi_val <= 300 else
-            "hazardous"
+    values = {param: getattr(measurement, param) for param in THRESHOLD_DEFAULTS}
+    if alert_index.ready:
+        crossed = alert_index.exceeded(station.station_id, values)
+    else:
+        crossed = _crossed_from_preferences(db, station.station_id, values)
+
+    _clear_recovered_states(db, station.station_id, values)
+    if not crossed:
+        return []
+
+    alerted_users = _record_alert_states(db, station.station_id, crossed)
+    if not alerted_users:
+        return []
+
+    title = f"Air Quality Alert - {station.station_name}"[:100]
+    aqi_category = get_aqi_category(measurement.aqi or 0)
+    created_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "user_id": user_id,
+            "notification_type": NotificationType.threshold_alert,
+            "title": title,
+            "message": "; ".join(
+                f"{param.upper()} exceeded ({value} > {limit})" for param, value, limit in crossed[user_id]
+            ),
+            "station_id": station.station_id,
+            "aqi_value": measurement.aqi,
+            "aqi_category": aqi_category,
+            "is_read": False,
+            "created_at": created_at
+        }
+        for user_id in alerted_users
+    ]
+    created = db.execute(
+        insert(Notification).returning(Notification.notification_id, sort_by_parameter_order=True), rows
+    ).scalars()
+    for row, notification_id in zip(rows, created):
+        row["notification_id"] = notification_id
+    return rows
+
+
+def _crossed_from_preferences(db: Session, station_id: int, values: dict) -> dict:
+    """Index-less fallback: fetch only the subscribers whose limits are exceeded."""
+    limits = {}
+    exceeded_conditions = []
+    for param, default in THRESHOLD_DEFAULTS.items():
+        column = getattr(UserPreference, param)
+        # Mirrors `pref.<param> or default`: unset and zero limits fall back to the default
+        limits[param] = func.coalesce(func.nullif(column, 0), cast(literal(default), column.type)).label(param)
+        if values[param]:
+            exceeded_conditions.append(limits[param] < values[param])
+
+    if not exceeded_conditions:
+        return {}
+
+    rows = db.execute(
+        select(UserPreference.user_id, *limits.values()).where(
+            UserPreference.station_id == station_id,
+            or_(*exceeded_conditions)
         )
+    ).all()
+
+    crossed = {}
+    for row in rows:
+        for param in THRESHOLD_DEFAULTS:
+            value, limit = values[param], getattr(row, param)
+            if value and value > limit:
+                crossed.setdefault(row.user_id, []).append((param, value, limit))
+    return crossed
+
+
+def _clear_recovered_states(db: Session, station_id: int, values: dict):
+    """
+    Deactivate alerts whose pollutant fell below the exit level (limit minus
+    the hysteresis band), or is missing from the reading.
+
+    A missing value cannot keep an alert active, just as it never raises one;
+    otherwise the user would stay silenced until the re-alert interval ran
+    out. If the pollutant comes back exceeded, it re-enters, and the re-alert
+    interval still holds back an alert right after the previous one.
+    """
+    exit_ratio = 1 - settings.ALERT_HYSTERESIS_RATIO
+    recovered = [
+        and_(AlertState.pollutant == param, AlertState.threshold * exit_ratio >= value)
+        for param, value in values.items() if value is not None
+    ]
+    missing = [param for param, value in values.items() if value is None]
+    if missing:
+        recovered.append(AlertState.pollutant.in_(missing))
+    if not recovered:
+        return
+
+    db.execute(
+        update(AlertState).where(
+            AlertState.station_id == station_id,
+            AlertState.is_active.is_(True),
+            or_(*recovered)
+        ).values(is_active=False, cleared_at=func.now()).execution_options(synchronize_session=False)
+    )
+
+
+def _record_alert_states(db: Session, station_id: int, crossed: dict) -> set:
+    """
+    Upsert the exceeded (user, pollutant) states and return the users to alert.
+
+    Rows that are already active and were alerted within the re-alert interval
+    are left untouched, so steady exceedances cost no writes. A returned row is
+    alerted only if its last_alerted_at was moved to this evaluation's time;
+    that also suppresses re-entry alerts shortly after a state cleared.
+    """
+    now = datetime.now(timezone.utc)
+    realert_cutoff = now - timedelta(minutes=settings.ALERT_REALERT_MINUTES)
+    states = [
+        {
+            "user_id": user_id,
+            "station_id": station_id,
+            "pollutant": param,
+            "is_active": True,
+            "threshold": limit,
+            "last_value": value,
+            "entered_at": now,
+            "last_alerted_at": now
+        }
+        for user_id, parts in crossed.items()
+        for param, value, limit in parts
+    ]
+
+    alerted_users = set()
+    for start in range(0, len(states), ALERT_STATE_CHUNK):
+        stmt = pg_insert(AlertState).values(states[start:start + ALERT_STATE_CHUNK])
+        due = or_(AlertState.last_alerted_at.is_(None), AlertState.last_alerted_at < realert_cutoff)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AlertState.user_id, AlertState.station_id, AlertState.pollutant],
+            set_={
+                "is_active": True,
+                "threshold": stmt.excluded.threshold,
+                "last_value": stmt.excluded.last_value,
+                "entered_at": case((AlertState.is_active, AlertState.entered_at), else_=stmt.excluded.entered_at),
+                "last_alerted_at": case((due, stmt.excluded.last_alerted_at), else_=AlertState.last_alerted_at),
+                "cleared_at": None
+            },
+            where=or_(AlertState.is_active.is_(False), due)
+        ).returning(AlertState.user_id, AlertState.last_alerted_at)
+
+        for user_id, last_alerted_at in db.execute(stmt):
+            if last_alerted_at == now:
+                alerted_users.add(user_id)
+    return alerted_users
+
+
+def notify_threshold_subscribers(station_id: int):
+    """
+    Background entry point for threshold alerts.
+
+    Opens its own session instead of borrowing the request's, which is already
+    closed by the time background tasks run. Alerts are announced to every
+    process, which push them to their connected clients once committed.
+    """
+    with SessionLocal() as db:
+        try:
+            measurement = db.query(Measurement).filter(Measurement.station_id == station_id).first()
+            station = db.query(Station).get(station_id)
+            if not measurement or not station:
+                return
+
+            created = check_measurement_thresholds(db, measurement, station)
+            announce_alerts(db, [row["notification_id"] for row in created])
+            db.commit()
+            if created:
+                print(f"🔔 Sent {len(created)} threshold alerts for station {station_id}")
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Threshold alert fan-out failed for station {station_id}: {str(e)}")
+
+
+def announce_preference_change(db: Session, user_id: int, station_id: int):
+    """
+    NOTIFY every process that this preference changed. PostgreSQL delivers it
+    on commit, so a rolled back write announces nothing. Does not commit.
+    """
+    db.execute(text("SELECT pg_notify(:channel, :payload)"),
+               {"channel": PREFERENCES_CHANNEL, "payload": f"{user_id}:{station_id}"})
+
+
+def announce_alerts(db: Session, notification_ids: list):
+    """NOTIFY every process of new threshold alerts; delivered on commit. Does not commit."""
+    for start in range(0, len(notification_ids), ALERT_NOTIFY_CHUNK):
+        chunk = notification_ids[start:start + ALERT_NOTIFY_CHUNK]
+        payload = ",".join(str(notification_id) for notification_id in chunk)
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": ALERTS_CHANNEL, "payload": payload})
+
+
+def publish_alerts(payloads: list):
+    """
+    Push announced alerts to this process's /ws clients. Runs on the pubsub
+    listener thread; processes without connected clients skip the query.
+    """
+    if not hub.subscriber_count:
+        return
+    notification_ids = {int(part) for payload in payloads for part in payload.split(",") if part.isdigit()}
+    if not notification_ids:
+        return
+
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(
+                Notification.user_id, Notification.station_id, Notification.title, Notification.message,
+                Notification.aqi_value, Notification.aqi_category, Notification.created_at
+            ).where(Notification.notification_id.in_(list(notification_ids)))
+        ).mappings().all()
+    for row in rows:
+        hub.publish(alert_event(row))
+
+
+def refresh_alert_preferences(payloads: list):
+    """
+    Apply announced preference changes to this process's alert index.
+
+    Each (user, station) is reloaded from user_preferences: present rows are
+    upserted, missing ones removed. Runs on the pubsub listener thread.
+    """
+    if not alert_index.ready:
+        return  # The pending rebuild loads the current rows anyway
+    pairs = set()
+    for payload in payloads:
+        user_id, _, station_id = payload.partition(":")
+        if user_id.isdigit() and station_id.isdigit():
+            pairs.add((int(user_id), int(station_id)))
+    if not pairs:
+        return
+
+    with SessionLocal() as db:
+        rows = db.query(UserPreference).filter(
+            tuple_(UserPreference.user_id, UserPreference.station_id).in_(list(pairs))
+        ).all()
+    for pref in rows:
+        alert_index.upsert(pref)
+    for user_id, station_id in pairs - {(pref.user_id, pref.station_id) for pref in rows}:
+        alert_index.remove(station_id, user_id)
+
+
+def rebuild_alert_index():
+    """Reload the in-memory alert index from user_preferences"""
+    with SessionLocal() as db:
+        try:
+            indexed = alert_index.rebuild(db)
+            print(f"🗂️ Alert index loaded with {indexed} preferences")
+        except Exception as e:
+            print(f"❌ Alert index rebuild failed: {str(e)}")
+
+
+def insert_notifications_for_users(db: Session, payload: dict, user_filter) -> int:
+    """
+    Copy one notification payload to every user matching user_filter.
+
+    Runs as a single INSERT ... SELECT FROM users, so unknown user ids are
+    skipped by the database rather than looked up one at a time. Does not commit.
+    """
+    table = Notification.__table__
+    recipients = select(
+        User.user_id,
+        literal(payload["notification_type"], table.c.notification_type.type),
+        literal(payload["title"]),
+        literal(payload["message"]),
+        literal(payload.get("station_id"), table.c.station_id.type),
+        literal(payload.get("aqi_value"), table.c.aqi_value.type),
+        literal(payload.get("aqi_category"), table.c.aqi_category.type),
+        literal(False),
+        func.now()
+    ).where(user_filter)
+
+    result = db.execute(insert(Notification).from_select(NOTIFICATION_INSERT_COLUMNS, recipients))
+    return result.rowcount or 0
+
+
+def run_notification_job(job_id: str, payload: dict, user_ids: list):
+    """
+    Background job sending a notification to a large list of users.
+
+    The list is processed SEND_CHUNK_SIZE ids at a time, committing after each
+    chunk. Progress is reported through the job tracker.
+    """
+    with SessionLocal() as db:
+        try:
+            update_job(job_id, status="running", started_at=datetime.now(timezone.utc))
+            sent = 0
+            for start in range(0, len(user_ids), SEND_CHUNK_SIZE):
+                chunk = user_ids[start:start + SEND_CHUNK_SIZE]
+                sent += insert_notifications_for_users(db, payload, User.user_id.in_(chunk))
+                db.commit()
+                update_job(job_id, processed=start + len(chunk), sent=sent)
 
-        # Ensure time1 and timestamp are timezone-aware
-        time1 = measurement.time1
-        timestamp = measurement.timestamp
-        if time1 and time1.tzinfo is None:
-            time1 = time1.replace(tzinfo=timezone.utc)
-        if timestamp and timestamp.tzinfo is None:
-            timestamp = timestamp.replace(tzinfo=timezone.utc)
-
-        # Determine if this is a new or updated measurement
-        is_new_or_updated = time1 is None or (timestamp > time1)
-
-        if not is_new_or_updated:
-            return
-
-        for pref in preferences:
-            message_parts = []
-            thresholds = {
-                'pm25': pref.pm25 or DefaultSafetyLimits.PM25,
-                'pm10': pref.pm10 or DefaultSafetyLimits.PM10,
-                'no2': pref.no2 or DefaultSafetyLimits.NO2,
-                'co': pref.co or DefaultSafetyLimits.CO,
-                'so2': pref.so2 or DefaultSafetyLimits.SO2,
-                'ozone': pref.ozone or DefaultSafetyLimits.OZONE,
-                'aqi': pref.aqi or DefaultSafetyLimits.AQI
-            }
-
-            for param, limit in thresholds.items():
-                current_value = getattr(measurement, param)
-                if current_value and current_value > limit:
-                    message_parts.append(
-                        f"{param.upper()} exceeded ({current_value} > {limit})"
-                    )
-
-            if message_parts:
-                notification = Notification(
-                    user_id=pref.user_id,
-                    notification_type=NotificationType.threshold_alert,
-                    title=f"Air Quality Alert - {station.station_name}",
-                    message="; ".join(message_parts),
-                    station_id=station.station_id,
-                    aqi_value=measurement.aqi,
-                    aqi_category=aqi_category,
-                    created_at=datetime.now(timezone.utc)
-                )
-                db.add(notification)
-
-        db.commit()
-
-    except Exception as e:
-        db.rollback()
-        raise
-
-async def cleanup_old_notifications(db: Session):
-    """Keep notifications for 30 days only"""
-    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
-    db.query(Notification).filter(
-        Notification.created_at < cutoff
-    ).delete()
-    db.commit()
\ No newline at end of file
+            update_job(job_id, status="completed", sent=sent, finished_at=datetime.now(timezone.utc))
+            print(f"📣 Notification job {job_id} sent {sent} notifications")
+        except Exception as e:
+            db.rollback()
+            update_job(job_id, status="failed", error=str(e), finished_at=datetime.now(timezone.utc))
+            print(f"❌ Notification job {job_id} failed: {str(e)}")
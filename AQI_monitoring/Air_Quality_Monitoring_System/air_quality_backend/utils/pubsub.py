@@ -0,0 +1,217 @@
+# air_quality_backend/utils/pubsub.py
+import asyncio
+import select
+import threading
+import time
+from typing import Iterable, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import SessionLocal, session_engine
+from ..models import Measurement, Station
+from .metrics import ingest_notifications
+from .response_cache import response_cache
+
+# Channel the ingest service and API writes NOTIFY with the station id of every stored reading
+INGEST_CHANNEL = "aqi_updates"
+
+POLLUTANTS = ('pm25', 'pm10', 'no2', 'co', 'so2', 'ozone')
+
+
+class Subscription:
+    """
+    One live connection's filter and outbound queue.
+
+    The queue is bounded; when a slow client lets it fill up, the oldest event
+    is dropped so the newest readings always get through.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int,
+                 station_ids: Optional[Iterable[int]] = None,
+                 bbox: Optional[tuple] = None,
+                 user_id: Optional[int] = None):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.station_ids = set(station_ids) if station_ids else None
+        self.bbox = bbox  # (min_lat, min_lon, max_lat, max_lon)
+        self.user_id = user_id
+        self.dropped = 0
+
+    def matches(self, event: dict) -> bool:
+        if event["type"] == "alert":
+            return self.user_id is not None and event["user_id"] == self.user_id
+
+        if self.station_ids is None and self.bbox is None:
+            return True
+        if self.station_ids is not None and event["station_id"] in self.station_ids:
+            return True
+        if self.bbox is not None and event.get("latitude") is not None:
+            min_lat, min_lon, max_lat, max_lon = self.bbox
+            return min_lat <= event["latitude"] <= max_lat and min_lon <= event["longitude"] <= max_lon
+        return False
+
+    def _put(self, event: dict):
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class PubSubHub:
+    """
+    In-process fan-out of live events to WebSocket subscribers.
+
+    publish() may be called from any thread (request handlers, background
+    tasks, the ingest listener); delivery is handed to each subscriber's event
+    loop. Only clients connected to this process receive its events; writes
+    reach every process through NOTIFY, and each process's listener publishes
+    them to its own hub.
+    """
+
+    def __init__(self, queue_size: int):
+        self._queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, **filters) -> Subscription:
+        """Register a subscriber; must be called from the connection's event loop."""
+        subscription = Subscription(asyncio.get_running_loop(), self._queue_size, **filters)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.matches(event):
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+
+hub = PubSubHub(settings.REALTIME_QUEUE_SIZE)
+
+
+def _number(value):
+    return float(value) if value is not None else None
+
+
+def measurement_event(station: Station, measurement: Measurement) -> dict:
+    """JSON-ready event for a station's latest reading."""
+    return {
+        "type": "measurement",
+        "station_id": station.station_id,
+        "station_name": station.station_name,
+        "latitude": _number(station.latitude),
+        "longitude": _number(station.longitude),
+        **{param: _number(getattr(measurement, param)) for param in POLLUTANTS},
+        "aqi": measurement.aqi,
+        "timestamp": measurement.timestamp.isoformat() if measurement.timestamp else None
+    }
+
+
+def alert_event(notification: dict) -> dict:
+    """JSON-ready event for a threshold alert row created for one user."""
+    return {
+        "type": "alert",
+        "user_id": notification["user_id"],
+        "station_id": notification["station_id"],
+        "title": notification["title"],
+        "message": notification["message"],
+        "aqi_value": notification["aqi_value"],
+        "aqi_category": notification["aqi_category"],
+        "created_at": notification["created_at"].isoformat()
+    }
+
+
+def publish_station_readings(station_ids: Iterable[int]):
+    """Load the latest readings of the given stations and publish them."""
+    with SessionLocal() as db:
+        rows = db.query(Measurement, Station).join(
+            Station, Station.station_id == Measurement.station_id
+        ).filter(Measurement.station_id.in_(list(station_ids))).all()
+    for measurement, station in rows:
+        hub.publish(measurement_event(station, measurement))
+
+
+def announce_reading(db: Session, station_id: int):
+    """
+    NOTIFY every process that a station's reading changed, as the ingest
+    service does. PostgreSQL delivers it on commit; each listener then
+    publishes the reading to its hub. Does not commit.
+    """
+    db.execute(text("SELECT pg_notify(:channel, :payload)"),
+               {"channel": INGEST_CHANNEL, "payload": str(station_id)})
+
+
+# Other channels the listener follows: channel -> handler(payloads), called on
+# the listener thread with the payloads received together
+_channel_handlers = {}
+
+
+def on_notify(channel: str, handler):
+    """Have the listener pass NOTIFYs on channel to handler; register before start_ingest_listener."""
+    _channel_handlers[channel] = handler
+
+
+def _listen_for_ingest():
+    # Readings not yet reflected in the HTTP cache; see HTTP_CACHE_INGEST_INVALIDATION_SECONDS
+    measurements_changed = False
+    while True:
+        connection = None
+        try:
+            raw = session_engine.raw_connection()
+            raw.detach()  # Held for the life of the listener, not returned to the pool
+            connection = raw.driver_connection
+            connection.autocommit = True
+            channels = [INGEST_CHANNEL, *_channel_handlers]
+            for channel in channels:
+                connection.cursor().execute(f"LISTEN {channel}")
+            print(f"📡 Listening for updates on {', '.join(repr(channel) for channel in channels)}")
+
+            while True:
+                if measurements_changed:
+                    measurements_changed = not response_cache.invalidate_throttled(
+                        "measurements", settings.HTTP_CACHE_INGEST_INVALIDATION_SECONDS
+                    )
+                if select.select([connection], [], [], 5) == ([], [], []):
+                    continue
+                connection.poll()
+                payloads = {}
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    payloads.setdefault(notify.channel, []).append(notify.payload)
+                for channel, batch in payloads.items():
+                    if channel in _channel_handlers:
+                        try:
+                            _channel_handlers[channel](batch)
+                        except Exception as e:
+                            print(f"❌ Handling NOTIFY on '{channel}' failed: {str(e)}")
+
+                station_ids = {int(payload) for payload in payloads.get(INGEST_CHANNEL, []) if payload.isdigit()}
+                ingest_notifications.inc(len(station_ids))
+                if station_ids:
+                    measurements_changed = True
+                if station_ids and hub.subscriber_count:
+                    publish_station_readings(station_ids)
+        except Exception as e:
+            print(f"❌ Ingest listener failed, reconnecting: {str(e)}")
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            time.sleep(5)
+
+
+def start_ingest_listener():
+    """Bridge ingest-service NOTIFYs (and on_notify channels) into this process from a daemon thread."""
+    threading.Thread(target=_listen_for_ingest, name="ingest-listener", daemon=True).start()
@@ -0,0 +1,194 @@
+# air_quality_backend/utils/query_profiler.py
+import json
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..config import settings
+
+# Statements of the request being served; a mutable holder so that threadpool
+# endpoints, which run on a copy of the context, report back into it
+_current_request: ContextVar[Optional[dict]] = ContextVar("query_profiler_request", default=None)
+
+_stats = {}  # route -> {normalized sql: {...}}
+_requests = {}  # route -> requests served
+_lock = threading.Lock()
+
+_PARAM_LIST = re.compile(r"%\(\w+\)s(\s*,\s*%\(\w+\)s)*")
+_FILTER_COLUMN = re.compile(r"\(?(\w+)\)?(?:::\w+)?\s*(=|<>|<=|>=|<|>|~~\*|~~|IS NULL|IS NOT NULL)")
+_TABLE_PREFIX = re.compile(r"^\w+\.")
+
+# Sequential scans smaller than this are left alone; they are cheaper than an index
+MIN_SEQ_SCAN_ROWS = 1000
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse parameter lists and whitespace so repeated statements group together."""
+    return " ".join(_PARAM_LIST.sub("?", statement).split())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_profiler_start", []).append(time.perf_counter())
+
+
+def _record(route: str, statement: str, parameters, elapsed_ms: float, executemany: bool):
+    # Caller holds _lock
+    key = normalize_sql(statement)
+    entry = _stats.setdefault(route, {}).setdefault(key, {
+        "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "statement": statement, "parameters": None
+    })
+    entry["calls"] += 1
+    entry["total_ms"] += elapsed_ms
+    if elapsed_ms >= entry["max_ms"]:
+        entry["max_ms"] = elapsed_ms
+        if not executemany:
+            # Kept to EXPLAIN the slowest execution later
+            entry["statement"], entry["parameters"] = statement, parameters
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_profiler_start"].pop()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    request = _current_request.get()
+    if request is not None:
+        request["queries"].append((statement, parameters, elapsed_ms, executemany))
+    else:
+        with _lock:
+            _record("(background)", statement, parameters, elapsed_ms, executemany)
+
+
+def install_query_profiler(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    print(f"🔬 Query profiling enabled (slow threshold {settings.QUERY_PROFILE_SLOW_MS} ms)")
+
+
+async def profile_requests(request: Request, call_next):
+    """Middleware attributing the statements of a request to its route."""
+    holder = {"queries": []}
+    token = _current_request.set(holder)
+    try:
+        return await call_next(request)
+    finally:
+        _current_request.reset(token)
+        # Group by path template (/stations/{station_id}) rather than raw path
+        route = request.scope.get("route")
+        name = f"{request.method} {route.path if route is not None else request.url.path}"
+        with _lock:
+            _requests[name] = _requests.get(name, 0) + 1
+            for statement, parameters, elapsed_ms, executemany in holder["queries"]:
+                _record(name, statement, parameters, elapsed_ms, executemany)
+
+
+def reset_profile():
+    with _lock:
+        _stats.clear()
+        _requests.clear()
+
+
+def _walk_plan(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+def suggest_indexes(plan: dict) -> list:
+    """
+    Derive CREATE INDEX suggestions from an EXPLAIN (FORMAT JSON) plan.
+
+    Flags sequential scans that filter away rows, and sorts fed by a
+    sequential scan; ILIKE/LIKE filters get a trigram index suggestion.
+    """
+    suggestions = []
+    for node in _walk_plan(plan):
+        if node.get("Node Type") != "Seq Scan":
+            continue
+        table = node.get("Relation Name")
+        scanned = node.get("Plan Rows", 0) + node.get("Rows Removed by Filter", 0)
+        if not table or scanned < MIN_SEQ_SCAN_ROWS:
+            continue
+
+        equality, ranges, patterns = [], [], []
+        for column, operator in _FILTER_COLUMN.findall(node.get("Filter", "")):
+            target = patterns if operator in ("~~", "~~*") else equality if operator == "=" else ranges
+            if column not in target:
+                target.append(column)
+
+        columns = equality + ranges
+        if columns:
+            suggestions.append(f"CREATE INDEX ON {table} ({', '.join(columns)});")
+        for column in patterns:
+            suggestions.append(f"CREATE INDEX ON {table} USING gin ({column} gin_trgm_ops);")
+
+    for node in _walk_plan(plan):
+        if node.get("Node Type") != "Sort":
+            continue
+        child = (node.get("Plans") or [{}])[0]
+        if child.get("Node Type") == "Seq Scan" and child.get("Relation Name"):
+            keys = [_TABLE_PREFIX.sub("", key) for key in node.get("Sort Key", [])]
+            suggestions.append(f"CREATE INDEX ON {child['Relation Name']} ({', '.join(keys)});")
+
+    return list(dict.fromkeys(suggestions))
+
+
+def _explain(engine: Engine, statement: str, parameters) -> dict:
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters or {})
+        plan = result.scalar()
+        connection.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def build_report(engine: Engine) -> dict:
+    """
+    Per-route query statistics, with EXPLAIN plans and index suggestions for
+    SELECT statements whose slowest execution exceeded the slow threshold.
+    """
+    with _lock:
+        snapshot = {route: {key: dict(entry) for key, entry in entries.items()}
+                    for route, entries in _stats.items()}
+        requests = dict(_requests)
+
+    routes = {}
+    for route, entries in snapshot.items():
+        queries = []
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+            query = {
+                "sql": key,
+                "calls": entry["calls"],
+                "total_ms": round(entry["total_ms"], 2),
+                "avg_ms": round(entry["total_ms"] / entry["calls"], 2),
+                "max_ms": round(entry["max_ms"], 2),
+            }
+            if entry["max_ms"] >= settings.QUERY_PROFILE_SLOW_MS and key.upper().startswith("SELECT"):
+                try:
+                    plan = _explain(engine, entry["statement"], entry["parameters"])
+                    query["plan"] = plan
+                    query["suggested_indexes"] = suggest_indexes(plan)
+                except Exception as e:
+                    query["explain_error"] = str(e)
+            queries.append(query)
+
+        calls = sum(q["calls"] for q in queries)
+        routes[route] = {
+            "requests": requests.get(route),
+            "queries_per_request": round(calls / requests[route], 2) if requests.get(route) else None,
+            "total_ms": round(sum(q["total_ms"] for q in queries), 2),
+            "queries": queries
+        }
+
+    return {
+        "slow_threshold_ms": settings.QUERY_PROFILE_SLOW_MS,
+        "routes": routes,
+        "suggested_indexes": sorted({
+            index for route in routes.values() for query in route["queries"]
+            for index in query.get("suggested_indexes", [])
+        })
+    }
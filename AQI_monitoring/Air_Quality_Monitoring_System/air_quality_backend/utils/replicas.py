@@ -0,0 +1,201 @@
+# air_quality_backend/utils/replicas.py
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi import Request
+from jose import jwt, JWTError
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.engine import Engine
+from ..config import settings
+from .metrics import registry, Counter, Gauge
+
+# Seconds the replica's replayed WAL trails the primary; 0 when it has replayed
+# everything it received, or when the server is not a standby at all (a plain
+# second instance standing in for a replica in development)
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+# Users remembered as having written recently, oldest first
+MAX_STICKY_CLIENTS = 10000
+
+# Writes are announced here ("<until>:<token subject>"), so every process pins
+# the writer's reads to the primary, whichever worker serves them
+WRITES_CHANNEL = "aqi_writes"
+
+read_routing = registry.register(Counter(
+    "db_read_routing_total", "Read-only sessions by target and reason", ("target", "reason")))
+
+
+class ReplicaRouter:
+    """
+    Chooses the engine for read-only sessions (get_read_db).
+
+    Replicas take turns while their replication lag is within
+    REPLICA_MAX_LAG_SECONDS; otherwise reads fall back to the primary. Lag is
+    measured by check_lag(), run by each process's scheduler, so routing a
+    request never waits on a replica. A user who wrote within
+    READ_YOUR_WRITES_SECONDS reads from the primary, so it sees its own writes.
+    """
+
+    def __init__(self, primary: Engine, replicas: list):
+        self.primary = primary
+        self.replicas = [{"engine": engine, "name": engine.url.render_as_string(hide_password=True),
+                          "lag": None, "error": None, "checked_at": None} for engine in replicas]
+        self._turn = itertools.count()
+        self._sticky = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # -------------------------
+    # Lag
+    # -------------------------
+
+    def check_lag(self):
+        for replica in self.replicas:
+            try:
+                with replica["engine"].connect() as connection:
+                    lag, error = float(connection.execute(text(LAG_QUERY)).scalar()), None
+            except Exception as e:
+                lag, error = None, str(e)
+            with self._lock:
+                replica.update(lag=lag, error=error, checked_at=time.time())
+
+    def fresh_replicas(self) -> list:
+        with self._lock:
+            return [replica["engine"] for replica in self.replicas
+                    if replica["lag"] is not None and replica["lag"] <= settings.REPLICA_MAX_LAG_SECONDS]
+
+    def status(self) -> dict:
+        """Per-replica lag as last measured, for health checks."""
+        with self._lock:
+            replicas = [{key: replica[key] for key in ("name", "lag", "error", "checked_at")}
+                        for replica in self.replicas]
+        fresh = [replica for replica in replicas
+                 if replica["lag"] is not None and replica["lag"] <= settings.REPLICA_MAX_LAG_SECONDS]
+        if not replicas:
+            return {"status": "not_configured", "replicas": []}
+        # Reads still work through the primary, at its expense
+        return {"status": "ok" if len(fresh) == len(replicas) else "degraded", "replicas": replicas}
+
+    # -------------------------
+    # Read-your-writes
+    # -------------------------
+
+    @staticmethod
+    def _client_key(request: Request) -> Optional[str]:
+        """
+        The bearer token's subject (the user's email), so every token of a
+        user shares one entry. Not verified: this only picks the database a
+        read goes to, and the endpoint still authenticates the request.
+        """
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            return jwt.get_unverified_claims(token).get("sub")
+        except JWTError:
+            return None
+
+    def _remember(self, key: str, until: float):
+        with self._lock:
+            if self._sticky.get(key, 0) >= until:
+                return
+            self._sticky[key] = until
+            self._sticky.move_to_end(key)
+            while len(self._sticky) > MAX_STICKY_CLIENTS:
+                self._sticky.popitem(last=False)
+
+    def mark_write(self, request: Request) -> Optional[tuple]:
+        """
+        Pin the user's reads to the primary for READ_YOUR_WRITES_SECONDS in
+        this process; returns (user key, expiry) to announce, or None for
+        anonymous requests.
+        """
+        key = self._client_key(request)
+        if key is None:
+            return None
+        until = time.time() + settings.READ_YOUR_WRITES_SECONDS
+        self._remember(key, until)
+        return key, until
+
+    def announce_write(self, key: str, until: float):
+        """NOTIFY every process of the write, through the primary. Blocking."""
+        with self.primary.connect() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                               {"channel": WRITES_CHANNEL, "payload": f"{until:.3f}:{key}"})
+            connection.commit()
+
+    def apply_announced_writes(self, payloads: list):
+        """NOTIFY handler for WRITES_CHANNEL; runs on the pubsub listener thread."""
+        for payload in payloads:
+            until, _, key = payload.partition(":")
+            try:
+                self._remember(key, float(until))
+            except ValueError:
+                continue
+
+    def wrote_recently(self, request: Request) -> bool:
+        key = self._client_key(request)
+        if key is None:
+            return False
+        with self._lock:
+            return self._sticky.get(key, 0) > time.time()
+
+    # -------------------------
+    # Routing
+    # -------------------------
+
+    def engine_for(self, request: Request) -> Engine:
+        if not self.replicas:
+            return self.primary
+        if self.wrote_recently(request):
+            read_routing.inc(target="primary", reason="read_your_writes")
+            return self.primary
+        fresh = self.fresh_replicas()
+        if not fresh:
+            read_routing.inc(target="primary", reason="no_fresh_replica")
+            return self.primary
+        read_routing.inc(target="replica", reason="fresh")
+        return fresh[next(self._turn) % len(fresh)]
+
+
+def track_writes(router: ReplicaRouter):
+    """
+    Middleware pinning a user's reads to the primary after each successful write.
+
+    The write is announced before the response goes out, so by the time the
+    client sends its next request the other workers' listeners have it (or
+    are milliseconds from it).
+    """
+    async def middleware(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in READ_METHODS and response.status_code < 400:
+            marked = router.mark_write(request)
+            if marked is not None:
+                try:
+                    await run_in_threadpool(router.announce_write, *marked)
+                except Exception as e:
+                    # Other workers may then serve this user from a replica until it catches up
+                    print(f"❌ Announcing write for read-your-writes failed: {str(e)}")
+        return response
+    return middleware
+
+
+def track_replica_lag(router: ReplicaRouter):
+    registry.register(Gauge(
+        "db_replica_lag_seconds", "Replication lag of each read replica as last measured", ("replica",),
+        collect=lambda: {(replica["name"],): replica["lag"] for replica in router.status()["replicas"]
+                         if replica["lag"] is not None}
+    ))
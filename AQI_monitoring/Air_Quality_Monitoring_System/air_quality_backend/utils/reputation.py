@@ -1,75 +1,152 @@
 # air_quality_backend/utils/reputation.py
+from collections import defaultdict
 from datetime import datetime, timedelta
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from ..models import UserReputation, Report, ReportStatus
+from ..models import UserReputation, Report, ReportStatus, ReputationEvent
+
+# Aura points awarded per forum action
+AURA_POINTS = {
+    "post": 5,      # Creating a post
+    "comment": 2,   # Adding a comment
+    "upvote": 1,    # Receiving an upvote
+}
+
+# Credibility adjustments applied when a report is resolved
+CREDIBILITY_REPORTED_VERIFIED = -10
+CREDIBILITY_REPORTER_VERIFIED = 5
+CREDIBILITY_REPORTER_FALSE = -10
+
+DEFAULT_CREDIBILITY = 100
+FOLD_BATCH_SIZE = 1000
+
+
+def record_reputation_event(db: Session, user_id: int, action: str,
+                            aura_delta: int = 0, credibility_delta: int = 0):
+    """
+    Append a reputation event to the ledger.
+
+    The event is only added to the session; it is committed together with the
+    caller's own transaction and folded into user_reputation later by
+    fold_reputation_events.
+    """
+    db.add(ReputationEvent(
+        user_id=user_id,
+        action=action,
+        aura_delta=aura_delta,
+        credibility_delta=credibility_delta
+    ))
+
 
 def update_streak(db: Session, user_id: int):
-    today = datetime.now().date()
-    reputation = db.query(UserReputation).filter(UserReputation.user_id == user_id).first()
-    if not reputation:
-        reputation = UserReputation(user_id=user_id, last_streak_date=today, streak_points=1)
-        db.add(reputation)
-    else:
-        last_streak = reputation.last_streak_date
-        if last_streak == today:
-            pass  # Already logged in today
-        elif last_streak == today - timedelta(days=1):
-            reputation.streak_points += 1
-            reputation.last_streak_date = today
-        else:
-            reputation.streak_points = 1
-            reputation.last_streak_date = today
-    db.commit()
+    """Record a login; the streak itself is computed when the ledger is folded."""
+    record_reputation_event(db, user_id, action="login")
+
 
 def update_aura_points(db: Session, user_id: int, action: str):
     """
-    Update a user's aura points based on the specified action.
+    Queue an aura points update for the specified action.
 
     Args:
         db (Session): SQLAlchemy database session
         user_id (int): ID of the user whose aura points are being updated
         action (str): The action triggering the update (e.g., 'post', 'comment', 'upvote')
     """
-    reputation = db.query(UserReputation).filter(UserReputation.user_id == user_id).first()
-    if not reputation:
-        # Initialize with default values if no record exists
-        reputation = UserReputation(
-            user_id=user_id,
-            aura_points=0,
-            credibility_points=100,  # Consistent with other functions
-            streak_points=0,         # Consistent with update_streak
-            last_streak_date=None    # Will be set by update_streak if needed
-        )
-        db.add(reputation)
-
-    # Adjust aura points based on the action
-    if action == "post":
-        reputation.aura_points += 5   # Creating a post
-    elif action == "comment":
-        reputation.aura_points += 2   # Adding a comment
-    elif action == "upvote":
-        reputation.aura_points += 1   # Receiving an upvote
-    else:
-        # Optionally handle unknown actions; for now, do nothing
-        pass
+    points = AURA_POINTS.get(action)
+    if points is None:
+        # Unknown actions do not affect reputation
+        return
+    record_reputation_event(db, user_id, action=action, aura_delta=points)
 
-    db.commit()
 
 def update_credibility_points(db: Session, report: Report, status: ReportStatus):
-    reporter_reputation = db.query(UserReputation).filter(UserReputation.user_id == report.reporter_id).first()
-    reported_reputation = db.query(UserReputation).filter(UserReputation.user_id == report.reported_user_id).first()
-
-    if not reporter_reputation:
-        reporter_reputation = UserReputation(user_id=report.reporter_id, credibility_points=100)
-        db.add(reporter_reputation)
-    if not reported_reputation:
-        reported_reputation = UserReputation(user_id=report.reported_user_id, credibility_points=100)
-        db.add(reported_reputation)
-
+    """Queue credibility adjustments for the reporter and reported user of a resolved report."""
     if status == ReportStatus.verified:
-        reported_reputation.credibility_points -= 10  # Adjustable value
-        reporter_reputation.credibility_points += 5   # Adjustable value
+        record_reputation_event(db, report.reported_user_id, action="report_verified",
+                                credibility_delta=CREDIBILITY_REPORTED_VERIFIED)
+        record_reputation_event(db, report.reporter_id, action="report_verified",
+                                credibility_delta=CREDIBILITY_REPORTER_VERIFIED)
     elif status == ReportStatus.false:
-        reporter_reputation.credibility_points -= 10  # Adjustable value
+        record_reputation_event(db, report.reporter_id, action="report_false",
+                                credibility_delta=CREDIBILITY_REPORTER_FALSE)
+
+
+def _apply_streak(reputation: UserReputation, login_time: datetime):
+    today = login_time.date()
+    last_streak = reputation.last_streak_date.date() if reputation.last_streak_date else None
+
+    if last_streak is not None and today <= last_streak:
+        return  # Already counted for this day
+    if last_streak == today - timedelta(days=1):
+        reputation.streak_points = (reputation.streak_points or 0) + 1
+    else:
+        reputation.streak_points = 1
+    reputation.last_streak_date = datetime.combine(today, datetime.min.time())
+
+
+def fold_reputation_events(db: Session, batch_size: int = FOLD_BATCH_SIZE) -> int:
+    """
+    Fold pending ledger events into user_reputation in batches.
+
+    Each batch is claimed with SKIP LOCKED so a second aggregator never applies
+    the same events twice. Aggregators do contend on user_reputation rows when
+    their batches share users: missing rows are inserted with ON CONFLICT DO
+    NOTHING, then the batch's rows are locked in user_id order, so concurrent
+    read-modify-writes serialise instead of losing updates. Returns the number
+    of events applied.
+    """
+    applied = 0
+    while True:
+        events = db.query(ReputationEvent).filter(
+            ReputationEvent.applied_at.is_(None)
+        ).order_by(ReputationEvent.event_id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        if not events:
+            break
+
+        events_by_user = defaultdict(list)
+        for event in events:
+            events_by_user[event.user_id].append(event)
+
+        db.execute(
+            pg_insert(UserReputation).values([
+                {
+                    "user_id": user_id,
+                    "aura_points": 0,
+                    "streak_points": 0,
+                    "credibility_points": DEFAULT_CREDIBILITY,
+                    "last_streak_date": None
+                }
+                for user_id in events_by_user
+            ]).on_conflict_do_nothing(index_elements=[UserReputation.user_id])
+        )
+        # Consistent lock order, so two aggregators sharing users cannot deadlock
+        reputations = {
+            reputation.user_id: reputation
+            for reputation in db.query(UserReputation).filter(
+                UserReputation.user_id.in_(events_by_user.keys())
+            ).order_by(UserReputation.user_id).with_for_update().all()
+        }
+
+        for user_id, user_events in events_by_user.items():
+            reputation = reputations[user_id]
+            reputation.aura_points = (reputation.aura_points or 0) + sum(e.aura_delta for e in user_events)
+            reputation.credibility_points = (
+                (reputation.credibility_points if reputation.credibility_points is not None else DEFAULT_CREDIBILITY)
+                + sum(e.credibility_delta for e in user_events)
+            )
+            for event in user_events:
+                if event.action == "login":
+                    _apply_streak(reputation, event.created_at or datetime.now())
+
+        now = datetime.now()
+        for event in events:
+            event.applied_at = now
+
+        db.commit()
+        applied += len(events)
+
+        if len(events) < batch_size:
+            break
 
-    db.commit()
\ No newline at end of file
+    return applied
@@ -0,0 +1,25 @@
+# air_quality_backend/utils/response_cache.py
+from ..config import settings
+from ..http_cache import build_cache
+from .metrics import registry, Counter, Gauge
+
+# Writers call response_cache.invalidate(<tag>) after committing
+response_cache = build_cache(
+    settings.HTTP_CACHE_REDIS_URL,
+    max_entries=settings.HTTP_CACHE_MAX_ENTRIES,
+    max_bytes=settings.HTTP_CACHE_MAX_BYTES,
+    max_body_bytes=settings.HTTP_CACHE_MAX_BODY_BYTES
+)
+
+registry.register(Counter(
+    "http_cache_requests_total", "Requests to cached routes, by result", ("result",),
+    collect=lambda: {(result,): count for result, count in response_cache.counts.items() if result != "invalidation"}
+))
+registry.register(Counter(
+    "http_cache_invalidations_total", "Tag invalidations issued by writers",
+    collect=lambda: {(): response_cache.counts["invalidation"]}
+))
+registry.register(Gauge(
+    "http_cache_bytes", "Bodies held by this process's cache (in-memory backend)",
+    collect=lambda: {(): response_cache.backend.stats().get("bytes", 0)}
+))
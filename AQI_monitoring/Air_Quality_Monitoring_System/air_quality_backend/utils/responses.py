@@ -0,0 +1,137 @@
+# air_quality_backend/utils/responses.py
+import enum
+import types
+import typing
+from decimal import Decimal
+from functools import lru_cache
+from typing import Callable, Iterable, Sequence, Type
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, StreamingResponse
+
+# Lists longer than this are streamed in chunks instead of encoded in one piece
+STREAM_THRESHOLD = 5000
+STREAM_CHUNK_SIZE = 1000
+
+
+def orjson_default(value):
+    """Types orjson does not encode natively (Decimals outside schema fields, as in rows_response)."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    # UTC datetimes end in "Z", as pydantic writes them
+    return orjson.dumps(content, default=orjson_default, option=orjson.OPT_UTC_Z)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson, including Decimal values."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def _scalar_type(annotation):
+    """The type inside Optional[...], or the annotation itself."""
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType) and len(args) == 1:
+        return _scalar_type(args[0])
+    return annotation
+
+
+# What pydantic's JSON output holds for a Decimal, by the field's type
+DECIMAL_AS = {int: int, float: float, Decimal: str}
+
+
+def _nested_model(annotation):
+    """(model, is_list) if the annotation is a model or a list of models, else None."""
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) is list and args:
+        inner = _nested_model(args[0])
+        return (inner[0], True) if inner else None
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType) and len(args) == 1:
+        return _nested_model(args[0])
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None
+
+
+@lru_cache(maxsize=None)
+def serializer_for(schema: Type[BaseModel]) -> Callable[[object], dict]:
+    """
+    Build a function copying a schema's fields out of an ORM object or dict.
+
+    Meant for trusted database rows: values are not validated, only picked, so
+    the result is what response_model validation would have kept at a fraction
+    of the cost. The JSON matches pydantic's: missing attributes take the
+    field's default, and Decimal columns come out as the field's type (float
+    or int; str for Decimal fields). Nested models and lists of models recurse.
+    """
+    plain, nested = [], []
+    for name, field in schema.model_fields.items():
+        default = None if field.is_required() else field.get_default(call_default_factory=True)
+        model = _nested_model(field.annotation)
+        if model:
+            nested.append((name, default, serializer_for(model[0]), model[1]))
+        else:
+            plain.append((name, default, DECIMAL_AS.get(_scalar_type(field.annotation))))
+
+    def serialize(obj) -> dict:
+        if obj is None:
+            return None
+        if isinstance(obj, dict):
+            get = obj.get
+        else:
+            get = lambda name, default: getattr(obj, name, default)
+        data = {}
+        for name, default, convert in plain:
+            value = get(name, default)
+            data[name] = convert(value) if convert and isinstance(value, Decimal) else value
+        for name, default, sub, is_list in nested:
+            value = get(name, default)
+            data[name] = [sub(item) for item in value or ()] if is_list else sub(value)
+        return data
+
+    return serialize
+
+
+def _encode_chunks(items: Sequence, chunk_size: int):
+    yield b"["
+    for start in range(0, len(items), chunk_size):
+        chunk = b",".join(dumps(item) for item in items[start:start + chunk_size])
+        yield chunk if start == 0 else b"," + chunk
+    yield b"]"
+
+
+def stream_json_array(items: Sequence, chunk_size: int = STREAM_CHUNK_SIZE, headers: dict = None) -> StreamingResponse:
+    """
+    Stream an already loaded list as a JSON array, encoding chunk_size items at a time.
+
+    Items must be loaded before the response is returned: the request's
+    database session is closed by the time the body is sent.
+    """
+    return StreamingResponse(_encode_chunks(items, chunk_size), media_type="application/json", headers=headers)
+
+
+def json_list(items: Iterable, headers: dict = None):
+    """orjson response for JSON-ready items, streamed when the list is large."""
+    items = items if isinstance(items, list) else list(items)
+    if len(items) > STREAM_THRESHOLD:
+        return stream_json_array(items, headers=headers)
+    return ORJSONResponse(items, headers=headers)
+
+
+def list_response(items: Iterable, schema: Type[BaseModel], headers: dict = None):
+    """Serialize trusted rows through schema's fields without per-object validation."""
+    serialize = serializer_for(schema)
+    return json_list([serialize(item) for item in items], headers=headers)
+
+
+def rows_response(rows: Iterable, names: Sequence[str], headers: dict = None):
+    """Serialize column tuples (e.g. Query rows) under the given names."""
+    return json_list([dict(zip(names, row)) for row in rows], headers=headers)
+
@@ -0,0 +1,99 @@
+# air_quality_backend/utils/retention.py
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import delete, update, select, inspect
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import (
+    Notification, BroadcastNotification, ReputationEvent, SystemLog, Feedback, WeatherCondition, BackgroundJob
+)
+
+
+def _run_in_chunks(db: Session, model, conditions: list, build_statement,
+                   chunk_size: int, pause_seconds: float) -> int:
+    """
+    Apply a DELETE/UPDATE to the rows matching conditions, chunk_size rows at a time.
+
+    Each chunk is `... WHERE pk IN (SELECT pk ... LIMIT n)` in its own
+    transaction, with a pause in between so locks stay short and WAL and
+    replication get time to catch up. Returns the number of rows affected.
+    """
+    pk = inspect(model).primary_key[0]
+    affected = 0
+    while True:
+        chunk = select(pk).where(*conditions).limit(chunk_size).scalar_subquery()
+        count = db.execute(build_statement(pk.in_(chunk))).rowcount
+        db.commit()
+
+        affected += count
+        if count < chunk_size:
+            return affected
+        time.sleep(pause_seconds)
+
+
+def purge(db: Session, model, conditions: list, chunk_size: int = None,
+          pause_seconds: float = None) -> dict:
+    """Delete the rows of model matching conditions in chunks, reporting rows removed and duration."""
+    started = time.monotonic()
+    rows = _run_in_chunks(
+        db, model, conditions,
+        lambda in_chunk: delete(model).where(in_chunk).execution_options(synchronize_session=False),
+        chunk_size or settings.RETENTION_CHUNK_SIZE,
+        settings.RETENTION_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+    )
+    return {"table": model.__tablename__, "rows": rows, "seconds": round(time.monotonic() - started, 3)}
+
+
+def purge_feedback_files(db: Session, cutoff: datetime) -> dict:
+    """Remove attachments of old feedback; the feedback itself is kept."""
+    started = time.monotonic()
+    chunk_size = settings.RETENTION_CHUNK_SIZE
+    rows = 0
+    while True:
+        # The paths are read before the columns are cleared (RETURNING would give the new NULLs)
+        chunk = db.execute(
+            select(Feedback.feedback_id, Feedback.file_path)
+            .where(Feedback.file_path.is_not(None), Feedback.created_at < cutoff)
+            .limit(chunk_size)
+        ).all()
+        # Files go first: if clearing the columns fails, the next run finds these rows again
+        for _, file_path in chunk:
+            Path(file_path).unlink(missing_ok=True)
+        if chunk:
+            db.execute(
+                update(Feedback).where(Feedback.feedback_id.in_([feedback_id for feedback_id, _ in chunk]))
+                .values(file_path=None, file_type=None, file_size=None)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+
+        rows += len(chunk)
+        if len(chunk) < chunk_size:
+            break
+        time.sleep(settings.RETENTION_PAUSE_SECONDS)
+    return {"table": "feedback files", "rows": rows, "seconds": round(time.monotonic() - started, 3)}
+
+
+def run_retention(db: Session) -> list:
+    """Apply every retention policy and return one report per table."""
+    now = datetime.now()
+
+    def older_than(days: int) -> datetime:
+        return now - timedelta(days=days)
+
+    notification_cutoff = older_than(settings.NOTIFICATION_RETENTION_DAYS)
+    return [
+        purge(db, Notification, [Notification.created_at < notification_cutoff]),
+        # Read markers go with their broadcast (ON DELETE CASCADE)
+        purge(db, BroadcastNotification, [BroadcastNotification.created_at < notification_cutoff]),
+        purge(db, ReputationEvent, [
+            ReputationEvent.applied_at < older_than(settings.REPUTATION_EVENT_RETENTION_DAYS)
+        ]),
+        purge(db, SystemLog, [SystemLog.log_time < older_than(settings.SYSTEM_LOG_RETENTION_DAYS)]),
+        purge(db, WeatherCondition, [
+            WeatherCondition.measurement_time < older_than(settings.WEATHER_RETENTION_DAYS)
+        ]),
+        purge_feedback_files(db, older_than(settings.FEEDBACK_FILE_RETENTION_DAYS)),
+        purge(db, BackgroundJob, [BackgroundJob.created_at < older_than(settings.JOB_RETENTION_DAYS)]),
+    ]
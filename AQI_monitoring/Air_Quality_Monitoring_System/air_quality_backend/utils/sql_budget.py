@@ -0,0 +1,105 @@
+# air_quality_backend/utils/sql_budget.py
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..config import settings
+from .query_profiler import normalize_sql
+
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+# Statements of the request being served; a mutable holder so threadpool endpoints report back into it
+_current_request: ContextVar[Optional[list]] = ContextVar("sql_budget_request", default=None)
+
+
+def query_budget(max_queries: int):
+    """
+    Declare the most SQL statements one request to an endpoint may issue.
+
+    Place it below the route decorator:
+
+        @router.get("/posts")
+        @query_budget(2)
+        async def get_posts(...):
+
+    Checked by the SQL budget middleware (SQL_BUDGET_CHECKS, always on in testing).
+    """
+    def decorate(endpoint):
+        setattr(endpoint, BUDGET_ATTRIBUTE, max_queries)
+        return endpoint
+    return decorate
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = _current_request.get()
+    if statements is not None:
+        statements.append(statement)
+
+
+def install_sql_budget(engine: Engine):
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    mode = "enforced" if sql_budget_enforced() else "warn only"
+    print(f"🧮 SQL budget checks enabled ({mode}, N+1 at {settings.SQL_N_PLUS_ONE_THRESHOLD} repeats)")
+
+
+def sql_budget_enabled() -> bool:
+    return settings.SQL_BUDGET_CHECKS or settings.ENVIRONMENT == "testing"
+
+
+def sql_budget_enforced() -> bool:
+    return settings.SQL_BUDGET_ENFORCE or settings.ENVIRONMENT == "testing"
+
+
+def analyze(statements: list, budget: Optional[int]) -> dict:
+    """Count statements, find repeated ones (N+1 patterns) and compare with the budget."""
+    repeats = Counter(normalize_sql(statement) for statement in statements)
+    n_plus_one = [
+        {"sql": sql, "count": count}
+        for sql, count in repeats.most_common()
+        if count >= settings.SQL_N_PLUS_ONE_THRESHOLD
+    ]
+    violations = []
+    if budget is not None and len(statements) > budget:
+        violations.append(f"{len(statements)} queries, budget is {budget}")
+    if n_plus_one:
+        violations.append(f"{len(n_plus_one)} repeated statement(s), likely N+1")
+    return {"queries": len(statements), "budget": budget, "n_plus_one": n_plus_one, "violations": violations}
+
+
+async def check_query_budget(request: Request, call_next):
+    """
+    Middleware counting SQL statements per request.
+
+    Every response gets an X-SQL-Queries header. Requests over their
+    endpoint's @query_budget, or repeating a statement SQL_N_PLUS_ONE_THRESHOLD
+    times or more, are logged; when enforced, they fail with a 500 describing
+    the statements, so tests catch regressions.
+    """
+    statements = []
+    token = _current_request.set(statements)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_request.reset(token)
+
+    route = request.scope.get("route")
+    budget = getattr(getattr(route, "endpoint", None), BUDGET_ATTRIBUTE, None)
+    report = analyze(statements, budget)
+
+    if report["violations"]:
+        name = f"{request.method} {route.path if route is not None else request.url.path}"
+        print(f"⚠️ SQL budget: {name}: {'; '.join(report['violations'])}")
+        for pattern in report["n_plus_one"]:
+            print(f"   {pattern['count']}x {pattern['sql'][:200]}")
+        if sql_budget_enforced():
+            return JSONResponse(
+                status_code=500,
+                content={"detail": f"SQL budget exceeded for {name}", **report},
+                headers={"X-SQL-Queries": str(report["queries"])}
+            )
+
+    response.headers["X-SQL-Queries"] = str(report["queries"])
+    return response
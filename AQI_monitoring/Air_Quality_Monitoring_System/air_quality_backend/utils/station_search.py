@@ -0,0 +1,278 @@
+# air_quality_backend/utils/station_search.py
+import bisect
+import heapq
+import string
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import Station
+
+# Query words below this trigram similarity to a name word do not match it
+MIN_WORD_SIMILARITY = 0.3
+# Shorter query words are matched as exact words or prefixes only
+MIN_FUZZY_LENGTH = 3
+# A word the query is a prefix of ranks just below an exact word
+PREFIX_SIMILARITY = 0.99
+# Popular autocomplete prefixes kept with their ranked results
+RESULT_CACHE_SIZE = 2048
+# Results per page of the search endpoint; the default page is warmed on rebuild
+DEFAULT_LIMIT = 10
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join("".join(c if c.isalnum() else " " for c in stripped.lower()).split())
+
+
+def trigrams(word: str) -> set:
+    """Trigrams of a word padded like pg_trgm: two spaces before, one after."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StationSearchIndex:
+    """
+    In-process search index over station names.
+
+    Names are split into words, and the distinct words form a vocabulary with:
+    - an inverted trigram index, so a misspelt query word finds the name
+      words it is similar to (shared trigrams over the union, as pg_trgm);
+    - a sorted word list, so the word still being typed resolves as a prefix
+      with a binary search.
+
+    A station matches when every query word matches one of its words; its
+    score is the mean of those word similarities (exact words count as 1,
+    prefixes just below). Results are ranked exact name > name prefix > all
+    words exact or prefix > fuzzy, then by score. Ranked results are cached per query in an
+    LRU that is emptied whenever the index changes.
+
+    Like the alert index, this is per process: loaded by a scheduler job right
+    after startup and rebuilt periodically, and kept in sync by the stations
+    router for its own writes. Until the first load, search_database answers.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self._cache = OrderedDict()
+        self.ready = False
+
+    def _reset(self):
+        self._stations = {}       # station_id -> {"name", "normalized", "latitude", "longitude"}
+        self._word_stations = {}  # word -> set(station_id)
+        self._word_grams = {}     # word -> trigrams
+        self._postings = {}       # trigram -> set(word)
+        self._vocabulary = []     # sorted words
+
+    def _add(self, station_id: int, name: str, latitude, longitude):
+        normalized = normalize(name)
+        self._stations[station_id] = {
+            "name": name,
+            "normalized": normalized,
+            "latitude": float(latitude) if latitude is not None else None,
+            "longitude": float(longitude) if longitude is not None else None
+        }
+        for word in set(normalized.split()):
+            stations = self._word_stations.get(word)
+            if stations is None:
+                stations = self._word_stations[word] = set()
+                self._word_grams[word] = trigrams(word)
+                for gram in self._word_grams[word]:
+                    self._postings.setdefault(gram, set()).add(word)
+                bisect.insort(self._vocabulary, word)
+            stations.add(station_id)
+
+    def _remove(self, station_id: int):
+        entry = self._stations.pop(station_id, None)
+        if entry is None:
+            return
+        for word in set(entry["normalized"].split()):
+            stations = self._word_stations.get(word)
+            if stations is None:
+                continue
+            stations.discard(station_id)
+            if stations:
+                continue
+            del self._word_stations[word]
+            for gram in self._word_grams.pop(word):
+                self._postings[gram].discard(word)
+                if not self._postings[gram]:
+                    del self._postings[gram]
+            self._vocabulary.pop(bisect.bisect_left(self._vocabulary, word))
+
+    def rebuild(self, db: Session) -> int:
+        """Reload every active station. Returns the number indexed."""
+        rows = db.query(
+            Station.station_id, Station.station_name, Station.latitude, Station.longitude
+        ).filter(Station.is_active).all()
+
+        # Built outside the lock, which searches on the event loop also take; only the swap holds it
+        staged = StationSearchIndex()
+        for row in rows:
+            staged._add(row.station_id, row.station_name, row.latitude, row.longitude)
+
+        with self._lock:
+            self._stations = staged._stations
+            self._word_stations = staged._word_stations
+            self._word_grams = staged._word_grams
+            self._postings = staged._postings
+            self._vocabulary = staged._vocabulary
+            self._cache.clear()
+            self.ready = True
+        return len(rows)
+
+    def upsert(self, station: Station):
+        with self._lock:
+            self._remove(station.station_id)
+            if station.is_active:
+                self._add(station.station_id, station.station_name, station.latitude, station.longitude)
+            self._cache.clear()
+
+    def remove(self, station_id: int):
+        with self._lock:
+            self._remove(station_id)
+            self._cache.clear()
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list:
+        """Ranked stations for a search box query, best first."""
+        normalized = normalize(query)
+        if not normalized:
+            return []
+
+        key = (normalized, limit)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+            results = self._rank(normalized, limit)
+
+            self._cache[key] = results
+            if len(self._cache) > RESULT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return results
+
+    def _word_matches(self, query_word: str, as_prefix: bool, fuzzy: bool) -> dict:
+        """{station_id: best similarity} of the stations having a word matching query_word."""
+        best = {}
+        if fuzzy and len(query_word) >= MIN_FUZZY_LENGTH:
+            query_grams = trigrams(query_word)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._postings.get(gram, ()))
+            for word, overlap in shared.items():
+                similarity = overlap / (len(query_grams) + len(self._word_grams[word]) - overlap)
+                if similarity >= MIN_WORD_SIMILARITY:
+                    for station_id in self._word_stations[word]:
+                        if similarity > best.get(station_id, 0):
+                            best[station_id] = similarity
+
+        if as_prefix:
+            start = bisect.bisect_left(self._vocabulary, query_word)
+            for word in self._vocabulary[start:]:
+                if not word.startswith(query_word):
+                    break
+                for station_id in self._word_stations[word]:
+                    best[station_id] = max(best.get(station_id, 0), PREFIX_SIMILARITY)
+        for station_id in self._word_stations.get(query_word, ()):
+            best[station_id] = 1.0
+        return best
+
+    def _rank(self, normalized: str, limit: int) -> list:
+        # Literal (exact and prefix) matches rank first, so the fuzzy pass is only
+        # needed when they do not fill the page
+        results = self._rank_pass(normalized, limit, fuzzy=False)
+        if len(results) < limit:
+            results = self._rank_pass(normalized, limit, fuzzy=True)
+        return results
+
+    def _rank_pass(self, normalized: str, limit: int, fuzzy: bool) -> list:
+        query_words = normalized.split()
+        # Every word but the last is complete; the last may still be being typed
+        matches = [
+            self._word_matches(word, as_prefix=(i == len(query_words) - 1), fuzzy=fuzzy)
+            for i, word in enumerate(query_words)
+        ]
+        candidates = set(min(matches, key=len))
+        for word_matches in matches:
+            candidates.intersection_update(word_matches)
+
+        scored = []
+        for station_id in candidates:
+            similarities = [word_matches[station_id] for word_matches in matches]
+            score = sum(similarities) / len(similarities)
+            name = self._stations[station_id]["normalized"]
+            if name == normalized:
+                rank = 3
+            elif name.startswith(normalized):
+                rank = 2
+            elif min(similarities) >= PREFIX_SIMILARITY:
+                rank = 1
+            else:
+                rank = 0
+            scored.append((rank, score, station_id))
+
+        best = heapq.nsmallest(limit, scored, key=lambda item: (
+            -item[0], -item[1], len(self._stations[item[2]]["name"])
+        ))
+        return [
+            {
+                "station_id": station_id,
+                "station_name": self._stations[station_id]["name"],
+                "latitude": self._stations[station_id]["latitude"],
+                "longitude": self._stations[station_id]["longitude"],
+                "score": round(rank + score, 4)
+            }
+            for rank, score, station_id in best
+        ]
+
+
+station_search = StationSearchIndex()
+
+
+def search_database(db: Session, query: str, limit: int = DEFAULT_LIMIT) -> list:
+    """
+    Name search in the database, served while the index is still loading.
+
+    Substring matches only (ILIKE, on the station_name trigram index), ranked
+    by pg_trgm similarity; no typo tolerance.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    similarity = func.similarity(Station.station_name, query)
+    rows = db.query(
+        Station.station_id, Station.station_name, Station.latitude, Station.longitude, similarity.label("score")
+    ).filter(
+        Station.is_active,
+        Station.station_name.icontains(query, autoescape=True)
+    ).order_by(similarity.desc(), func.length(Station.station_name)).limit(limit).all()
+    return [
+        {
+            "station_id": row.station_id,
+            "station_name": row.station_name,
+            "latitude": float(row.latitude) if row.latitude is not None else None,
+            "longitude": float(row.longitude) if row.longitude is not None else None,
+            "score": round(row.score, 4)
+        }
+        for row in rows
+    ]
+
+
+def rebuild_station_search():
+    """Reload the in-memory station search index"""
+    with SessionLocal() as db:
+        try:
+            indexed = station_search.rebuild(db)
+            # Single characters match the most stations and are the first thing typed
+            for char in string.ascii_lowercase + string.digits:
+                station_search.search(char)
+            print(f"🔎 Station search index loaded with {indexed} stations")
+        except Exception as e:
+            print(f"❌ Station search index rebuild failed: {str(e)}")
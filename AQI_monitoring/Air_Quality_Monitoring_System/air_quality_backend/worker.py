@@ -0,0 +1,30 @@
+# air_quality_backend/worker.py
+"""
+Standalone runner for the scheduled jobs (cleanup, predictions, reputation).
+
+    python -m air_quality_backend.worker
+
+Campaigns for the same advisory lock as the API processes, so any number of
+workers can run: one leads, the others stand by. Run the API with
+RUN_SCHEDULER_IN_API=false to keep inference out of the web workers.
+"""
+import signal
+from .config import settings
+from .scheduler import leader
+
+
+def main():
+    print(f"🛠️ Starting scheduler worker version {settings.VERSION}")
+
+    def shut_down(signum, frame):
+        print("🛑 Stopping scheduler worker...")
+        leader.stop()
+
+    signal.signal(signal.SIGTERM, shut_down)
+    signal.signal(signal.SIGINT, shut_down)
+    leader.run()
+    print("✅ Scheduler worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Serialization throughput of list endpoints, before and after the orjson response layer.
+
+"before" mirrors FastAPI's response_model path: validate every object with
+pydantic (from_attributes), dump to JSON-compatible Python, encode with json.
+"after" is utils/responses.py: pick schema fields, encode with orjson.
+
+No database is needed; rows are synthetic ORM-like objects.
+
+Usage (from AQI_monitoring/Air_Quality_Monitoring_System):
+    python benchmarks/bench_serialization.py --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+from air_quality_backend.schemas import MeasurementResponse, StationResponse, StationSummaryResponse  # noqa: E402
+from air_quality_backend.utils.responses import dumps, serializer_for  # noqa: E402
+
+
+def make_measurements(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        station = SimpleNamespace(station_id=i, station_name=f"Station {i}")
+        rows.append(SimpleNamespace(
+            measurement_id=i, station_id=i,
+            pm25=Decimal("35.20"), pm10=Decimal("51.00"), no2=Decimal("12.40"),
+            co=Decimal("0.80"), so2=Decimal("3.10"), ozone=Decimal("40.00"),
+            aqi=87, source="waqi", time1=now - timedelta(hours=1), timestamp=now,
+            created_at=now, station=station
+        ))
+    return rows
+
+
+def make_stations(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    measurements = make_measurements(count)
+    return [
+        SimpleNamespace(
+            station_id=i, station_name=f"Station {i}", latitude=Decimal("17.3850000"),
+            longitude=Decimal("78.4867000"), epa_name=None, epa_link=None, is_active=True,
+            source="waqi", created_at=now, updated_at=None, measurements=[measurements[i]]
+        )
+        for i in range(count)
+    ]
+
+
+def station_summary_rows(stations: list) -> tuple:
+    names = list(StationSummaryResponse.model_fields)
+    rows = []
+    for station in stations:
+        m = station.measurements[0]
+        rows.append((
+            station.station_id, station.station_name, station.latitude, station.longitude,
+            station.epa_name, station.epa_link, station.is_active, station.source,
+            station.created_at, station.updated_at, m.aqi, m.pm25, m.pm10, m.no2, m.co,
+            m.so2, m.ozone, m.timestamp
+        ))
+    return names, rows
+
+
+def before(schema, items) -> bytes:
+    adapter = TypeAdapter(List[schema])
+    value = adapter.validate_python(items, from_attributes=True)
+    content = adapter.dump_python(value, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def after(schema, items) -> bytes:
+    serialize = serializer_for(schema)
+    return dumps([serialize(item) for item in items])
+
+
+def after_rows(names, rows) -> bytes:
+    return dumps([dict(zip(names, row)) for row in rows])
+
+
+def timed(fn, repeat: int) -> tuple:
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - started)
+    return best, size
+
+
+def report(name: str, rows: int, baseline: tuple, candidate: tuple) -> dict:
+    (before_s, before_bytes), (after_s, after_bytes) = baseline, candidate
+    return {
+        "case": name,
+        "rows": rows,
+        "before": {"seconds": round(before_s, 4), "rows_per_sec": round(rows / before_s), "bytes": before_bytes},
+        "after": {"seconds": round(after_s, 4), "rows_per_sec": round(rows / after_s), "bytes": after_bytes},
+        "speedup": round(before_s / after_s, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    measurements = make_measurements(args.rows)
+    stations = make_stations(args.rows)
+    names, summary_rows = station_summary_rows(stations)
+
+    results = [
+        report("measurements list", args.rows,
+               timed(lambda: before(MeasurementResponse, measurements), args.repeat),
+               timed(lambda: after(MeasurementResponse, measurements), args.repeat)),
+        report("stations list (full response -> summary rows)", args.rows,
+               timed(lambda: before(StationResponse, stations), args.repeat),
+               timed(lambda: after_rows(names, summary_rows), args.repeat)),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Replay weighted traffic against a running API and report latency per route.
+
+Closed-loop driver: --concurrency virtual users each send a request, wait for
+the response and pick the next one, until --duration seconds have passed.
+Routes are chosen by weight (see SCENARIOS); the authenticated ones use
+tokens of seeded users, logged in before the clock starts. Ids and
+coordinates come from the manifest written by seed_loadtest.py.
+
+The report is JSON: per route, request count, error count, throughput and
+p50/p95/p99/max latency; plus the totals.
+
+Needs aiohttp (in requirements-dev.txt), already used by the ingest service.
+
+Usage (from AQI_monitoring/Air_Quality_Monitoring_System):
+    uvicorn air_quality_backend.main:app --port 8002 --workers 4
+    python benchmarks/run_load.py --base-url http://localhost:8002 --concurrency 50 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+
+def map_load(ctx):
+    return "GET", "/stations/", {"params": {"fields": "station_id,station_name,latitude,longitude,aqi"}}
+
+
+def nearby_lookup(ctx):
+    min_lat, min_lon, max_lat, max_lon = ctx.manifest["bbox"]
+    params = {"lat": ctx.rng.uniform(min_lat, max_lat), "lon": ctx.rng.uniform(min_lon, max_lon), "radius_km": 25}
+    return "GET", "/stations/nearby/", {"params": params}
+
+
+def station_forecast(ctx):
+    return "GET", f"/predictions/{ctx.random_id('predictions')}", {}
+
+
+def forum_feed(ctx):
+    return "GET", "/forum/posts", {"params": {"sort": "new"}, "headers": ctx.auth()}
+
+
+def post_comments(ctx):
+    return "GET", f"/forum/posts/{ctx.random_id('posts')}/comments", {"headers": ctx.auth()}
+
+
+def notification_poll(ctx):
+    return "GET", "/notifications/", {"params": {"limit": 20}, "headers": ctx.auth()}
+
+
+def login(ctx):
+    return "POST", "/auth/token", {"data": ctx.credentials()}
+
+
+# (name, weight, request builder)
+SCENARIOS = [
+    ("map load", 25, map_load),
+    ("nearby lookup", 20, nearby_lookup),
+    ("station forecast", 10, station_forecast),
+    ("forum feed", 15, forum_feed),
+    ("post comments", 10, post_comments),
+    ("notification poll", 15, notification_poll),
+    ("login", 5, login),
+]
+
+
+class Context:
+    def __init__(self, manifest: dict, tokens: list, rng: random.Random):
+        self.manifest = manifest
+        self.tokens = tokens
+        self.rng = rng
+
+    def random_id(self, table: str) -> int:
+        ids = self.manifest["ids"][table]
+        return self.rng.randint(ids["first"], ids["last"])
+
+    def credentials(self) -> dict:
+        active = self.manifest["active_users"]
+        user_id = self.rng.randint(active["first"], active["last"])
+        return {"username": self.manifest["username_pattern"].format(user_id=user_id),
+                "password": self.manifest["password"]}
+
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies: list, errors: int, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / seconds, 1),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+async def log_in_users(session: aiohttp.ClientSession, base_url: str, ctx: Context, count: int) -> list:
+    async def one():
+        async with session.post(f"{base_url}/auth/token", data=ctx.credentials()) as response:
+            if response.status == 200:
+                return (await response.json())["access_token"]
+            return None
+
+    tokens = await asyncio.gather(*[one() for _ in range(count)])
+    return [token for token in tokens if token]
+
+
+async def virtual_user(session, base_url: str, ctx: Context, deadline: float, results: dict):
+    names = [name for name, _, _ in SCENARIOS]
+    weights = [weight for _, weight, _ in SCENARIOS]
+    builders = {name: builder for name, _, builder in SCENARIOS}
+
+    while time.monotonic() < deadline:
+        name = ctx.rng.choices(names, weights)[0]
+        method, path, kwargs = builders[name](ctx)
+        started = time.perf_counter()
+        try:
+            async with session.request(method, base_url + path, **kwargs) as response:
+                await response.read()
+                ok = response.status < 400
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            ok = False
+        elapsed = time.perf_counter() - started
+
+        entry = results[name]
+        entry["latencies"].append(elapsed)
+        if not ok:
+            entry["errors"] += 1
+
+
+async def run(args, manifest: dict) -> dict:
+    rng = random.Random(args.seed)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        setup = Context(manifest, [], rng)
+        tokens = await log_in_users(session, args.base_url, setup, args.logged_in_users)
+        if not tokens:
+            raise SystemExit("❌ No seeded user could log in; check --manifest and the database")
+
+        results = {name: {"latencies": [], "errors": 0} for name, _, _ in SCENARIOS}
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            virtual_user(session, args.base_url, Context(manifest, tokens, random.Random(rng.random())),
+                         deadline, results)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.monotonic() - started
+
+    all_latencies = [latency for entry in results.values() for latency in entry["latencies"]]
+    return {
+        "load_test": args.base_url,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "concurrency": args.concurrency,
+        "duration_seconds": round(elapsed, 1),
+        "logged_in_users": len(tokens),
+        "routes": {name: summarize(entry["latencies"], entry["errors"], elapsed)
+                   for name, entry in results.items()},
+        "total": summarize(all_latencies, sum(entry["errors"] for entry in results.values()), elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    parser.add_argument("--concurrency", type=int, default=50, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of traffic")
+    parser.add_argument("--logged-in-users", type=int, default=100, help="Tokens shared by authenticated routes")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+
+    report = asyncio.run(run(args, manifest))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
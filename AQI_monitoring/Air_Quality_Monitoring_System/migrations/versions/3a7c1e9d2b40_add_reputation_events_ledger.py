@@ -0,0 +1,43 @@
+"""add reputation events ledger
+
+Revision ID: 3a7c1e9d2b40
+Revises: b7e12b8e6b53
+Create Date: 2026-10-19 09:12:31.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7c1e9d2b40'
+down_revision: Union[str, None] = 'b7e12b8e6b53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reputation_events',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=20), nullable=False),
+    sa.Column('aura_delta', sa.Integer(), nullable=False),
+    sa.Column('credibility_delta', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('applied_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_index(op.f('ix_reputation_events_event_id'), 'reputation_events', ['event_id'], unique=False)
+    op.create_index('ix_reputation_events_pending', 'reputation_events', ['event_id'], unique=False,
+                    postgresql_where=sa.text('applied_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reputation_events_pending', table_name='reputation_events')
+    op.drop_index(op.f('ix_reputation_events_event_id'), table_name='reputation_events')
+    op.drop_table('reputation_events')
@@ -0,0 +1,44 @@
+"""add alert states
+
+Revision ID: 8d4f2a61c5e7
+Revises: 3a7c1e9d2b40
+Create Date: 2026-10-19 11:40:05.217364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2a61c5e7'
+down_revision: Union[str, None] = '3a7c1e9d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('alert_states',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('station_id', sa.Integer(), nullable=False),
+    sa.Column('pollutant', sa.String(length=10), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('threshold', sa.DECIMAL(precision=10, scale=2), nullable=False),
+    sa.Column('last_value', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('entered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_alerted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('cleared_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['station_id'], ['stations.station_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'station_id', 'pollutant')
+    )
+    op.create_index('ix_alert_states_station_active', 'alert_states', ['station_id'], unique=False,
+                    postgresql_where=sa.text('is_active IS true'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_alert_states_station_active', table_name='alert_states')
+    op.drop_table('alert_states')
@@ -0,0 +1,56 @@
+"""add broadcast notifications
+
+Revision ID: c51f07a9e3d2
+Revises: 8d4f2a61c5e7
+Create Date: 2026-10-19 13:05:41.902315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51f07a9e3d2'
+down_revision: Union[str, None] = '8d4f2a61c5e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('broadcast_notifications',
+    sa.Column('broadcast_id', sa.Integer(), nullable=False),
+    sa.Column('notification_type', postgresql.ENUM('threshold_alert', 'forecast_alert', 'system_update',
+                                                   name='notification_type', create_type=False), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('message', sa.String(), nullable=False),
+    sa.Column('station_id', sa.Integer(), nullable=True),
+    sa.Column('aqi_value', sa.Integer(), nullable=True),
+    sa.Column('aqi_category', postgresql.ENUM('good', 'moderate', 'unhealthy_sensitive', 'unhealthy',
+                                              'very_unhealthy', 'hazardous',
+                                              name='aqi_category', create_type=False), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['station_id'], ['stations.station_id'], ),
+    sa.PrimaryKeyConstraint('broadcast_id')
+    )
+    op.create_index(op.f('ix_broadcast_notifications_broadcast_id'), 'broadcast_notifications', ['broadcast_id'], unique=False)
+    op.create_index(op.f('ix_broadcast_notifications_created_at'), 'broadcast_notifications', ['created_at'], unique=False)
+    op.create_table('broadcast_reads',
+    sa.Column('broadcast_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('read_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['broadcast_id'], ['broadcast_notifications.broadcast_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('broadcast_id', 'user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('broadcast_reads')
+    op.drop_index(op.f('ix_broadcast_notifications_created_at'), table_name='broadcast_notifications')
+    op.drop_index(op.f('ix_broadcast_notifications_broadcast_id'), table_name='broadcast_notifications')
+    op.drop_table('broadcast_notifications')
@@ -0,0 +1,45 @@
+"""add hot path indexes
+
+Revision ID: d2e8b4f67a13
+Revises: c51f07a9e3d2
+Create Date: 2026-10-19 14:22:09.517830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e8b4f67a13'
+down_revision: Union[str, None] = 'c51f07a9e3d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_notifications_user_created', 'notifications',
+                    ['user_id', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_user_preferences_station_id', 'user_preferences', ['station_id'], unique=False)
+    op.create_index('ix_comments_post_id', 'comments', ['post_id'], unique=False)
+    op.create_index('ix_public_contributions_status_created', 'public_contributions',
+                    ['status', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_posts_created_at', 'posts', [sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_stations_active_name', 'stations', ['station_name'], unique=False,
+                    postgresql_where=sa.text('is_active IS true'))
+    op.create_index('ix_stations_source_trgm', 'stations', ['source'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'source': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stations_source_trgm', table_name='stations')
+    op.drop_index('ix_stations_active_name', table_name='stations')
+    op.drop_index('ix_posts_created_at', table_name='posts')
+    op.drop_index('ix_public_contributions_status_created', table_name='public_contributions')
+    op.drop_index('ix_comments_post_id', table_name='comments')
+    op.drop_index('ix_user_preferences_station_id', table_name='user_preferences')
+    op.drop_index('ix_notifications_user_created', table_name='notifications')
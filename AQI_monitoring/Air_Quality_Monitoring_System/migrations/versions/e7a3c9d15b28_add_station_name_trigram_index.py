@@ -0,0 +1,30 @@
+"""add station name trigram index
+
+Revision ID: e7a3c9d15b28
+Revises: d2e8b4f67a13
+Create Date: 2026-10-19 15:03:27.184406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c9d15b28'
+down_revision: Union[str, None] = 'd2e8b4f67a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_stations_name_trgm', 'stations', ['station_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'station_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stations_name_trgm', table_name='stations')
@@ -0,0 +1,42 @@
+"""store predictions as real arrays
+
+Revision ID: f4b1d8e26c97
+Revises: e7a3c9d15b28
+Create Date: 2026-10-19 16:41:09.512873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b1d8e26c97'
+down_revision: Union[str, None] = 'e7a3c9d15b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREDICTED_COLUMNS = (
+    'pm25_predicted', 'pm10_predicted', 'no2_predicted',
+    'co_predicted', 'so2_predicted', 'ozone_predicted'
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in PREDICTED_COLUMNS:
+        op.alter_column('predictions', column,
+                        existing_type=postgresql.ARRAY(sa.DECIMAL(precision=10, scale=4)),
+                        type_=postgresql.ARRAY(sa.REAL()),
+                        postgresql_using=f'{column}::real[]')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in PREDICTED_COLUMNS:
+        op.alter_column('predictions', column,
+                        existing_type=postgresql.ARRAY(sa.REAL()),
+                        type_=postgresql.ARRAY(sa.DECIMAL(precision=10, scale=4)),
+                        postgresql_using=f'{column}::numeric(10,4)[]')
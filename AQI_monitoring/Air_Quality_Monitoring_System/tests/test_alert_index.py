@@ -0,0 +1,77 @@
+"""
+ThresholdIndex: the subscribers a reading exceeds, found by binary search over
+each (station, pollutant) column of (threshold, user_id), and kept in step
+with preference upserts and removals.
+
+No database is needed: preferences are plain objects.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+DEFAULTS = {'pm25': 35.0, 'pm10': 50.0, 'no2': 40.0, 'co': 4.0, 'so2': 20.0, 'ozone': 50.0, 'aqi': 100}
+STATION = 7
+
+
+def preference(user_id: int, station_id: int = STATION, **limits):
+    values = {pollutant: None for pollutant in DEFAULTS}
+    values.update(limits)
+    return SimpleNamespace(user_id=user_id, station_id=station_id, **values)
+
+
+def reading(**values):
+    return {pollutant: values.get(pollutant) for pollutant in DEFAULTS}
+
+
+@pytest.fixture
+def index():
+    from air_quality_backend.utils.alert_index import ThresholdIndex
+
+    index = ThresholdIndex(DEFAULTS)
+    index.upsert(preference(1, pm25=20))
+    index.upsert(preference(2, pm25=60))
+    index.upsert(preference(3))  # Every limit at its default
+    return index
+
+
+def test_exceeded_is_a_strict_prefix(index):
+    assert index.exceeded(STATION, reading(pm25=20)) == {}
+    assert index.exceeded(STATION, reading(pm25=35)) == {1: [('pm25', 35, 20.0)]}
+    crossed = index.exceeded(STATION, reading(pm25=61))
+    assert crossed == {1: [('pm25', 61, 20.0)], 2: [('pm25', 61, 60.0)], 3: [('pm25', 61, 35.0)]}
+
+
+def test_every_crossed_pollutant_is_listed(index):
+    crossed = index.exceeded(STATION, reading(pm25=40, aqi=150))
+    assert crossed[3] == [('pm25', 40, 35.0), ('aqi', 150, 100.0)]
+    assert crossed[1] == [('pm25', 40, 20.0), ('aqi', 150, 100.0)]
+    assert crossed[2] == [('aqi', 150, 100.0)]
+
+
+def test_missing_and_zero_values_cross_nothing(index):
+    assert index.exceeded(STATION, reading(pm25=None, aqi=0)) == {}
+
+
+def test_other_stations_are_not_matched(index):
+    assert index.exceeded(STATION + 1, reading(pm25=500)) == {}
+
+
+def test_upsert_replaces_the_previous_limits(index):
+    index.upsert(preference(1, pm25=50))
+    assert 1 not in index.exceeded(STATION, reading(pm25=40))
+    assert index.exceeded(STATION, reading(pm25=55))[1] == [('pm25', 55, 50.0)]
+
+
+def test_users_sharing_a_threshold(index):
+    index.upsert(preference(4, pm25=20))
+    assert set(index.exceeded(STATION, reading(pm25=21))) == {1, 4}
+    index.remove(STATION, 1)
+    assert set(index.exceeded(STATION, reading(pm25=21))) == {4}
+
+
+def test_remove(index):
+    for user_id in (1, 2, 3):
+        index.remove(STATION, user_id)
+    assert index.exceeded(STATION, reading(pm25=500, aqi=500)) == {}
+    # Removing an unknown subscription is a no-op
+    index.remove(STATION, 99)
@@ -0,0 +1,102 @@
+"""
+Threshold alert states: an exceedance alerts once, repeats are suppressed,
+the state clears only below the hysteresis band (or when the pollutant is
+missing from a reading), and a re-entry alerts again only after
+ALERT_REALERT_MINUTES.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+LIMIT = 50
+
+
+@pytest.fixture
+def subscription(seed):
+    """A pm25 limit of LIMIT for one user on one station, with no alert history."""
+    from air_quality_backend.database import SessionLocal
+    from air_quality_backend.models import AlertState, Notification, Station, UserPreference
+
+    user_id = seed["user_ids"][1]
+    with SessionLocal() as db:
+        station = db.query(Station).filter(Station.station_name == "Station 1").one()
+        for model in (AlertState, Notification, UserPreference):
+            db.query(model).filter(model.user_id == user_id).delete()
+        db.add(UserPreference(user_id=user_id, station_id=station.station_id, pm25=LIMIT))
+        db.commit()
+        return user_id, station.station_id
+
+
+def evaluate(station_id: int, **values) -> list:
+    """Run the alert check for a new reading; returns the users alerted."""
+    from air_quality_backend.database import SessionLocal
+    from air_quality_backend.models import Measurement, Station
+    from air_quality_backend.utils.notifications import check_measurement_thresholds
+
+    with SessionLocal() as db:
+        station = db.query(Station).get(station_id)
+        reading = Measurement(station_id=station_id, time1=None, timestamp=datetime.now(timezone.utc), **values)
+        created = check_measurement_thresholds(db, reading, station)
+        db.commit()
+    return [row["user_id"] for row in created]
+
+
+def state_of(user_id: int, station_id: int):
+    from air_quality_backend.database import SessionLocal
+    from air_quality_backend.models import AlertState
+
+    with SessionLocal() as db:
+        return db.query(AlertState).filter_by(user_id=user_id, station_id=station_id, pollutant="pm25").one()
+
+
+def backdate_last_alert(user_id: int, station_id: int, minutes: int):
+    from air_quality_backend.database import SessionLocal
+    from air_quality_backend.models import AlertState
+
+    with SessionLocal() as db:
+        db.query(AlertState).filter_by(user_id=user_id, station_id=station_id).update(
+            {AlertState.last_alerted_at: datetime.now(timezone.utc) - timedelta(minutes=minutes)}
+        )
+        db.commit()
+
+
+def test_enter_repeat_clear_realert(subscription):
+    from air_quality_backend.config import settings
+
+    user_id, station_id = subscription
+    band_floor = LIMIT * (1 - settings.ALERT_HYSTERESIS_RATIO)
+
+    # Entering the exceeded state alerts
+    assert evaluate(station_id, pm25=LIMIT + 10) == [user_id]
+    assert state_of(user_id, station_id).is_active
+
+    # Staying exceeded within the re-alert interval does not
+    assert evaluate(station_id, pm25=LIMIT + 20) == []
+
+    # Just under the limit but inside the hysteresis band: still active
+    assert evaluate(station_id, pm25=band_floor + 1) == []
+    assert state_of(user_id, station_id).is_active
+
+    # Below the band: cleared
+    assert evaluate(station_id, pm25=band_floor - 1) == []
+    state = state_of(user_id, station_id)
+    assert not state.is_active
+    assert state.cleared_at is not None
+
+    # Re-entering right away is suppressed by the re-alert interval, but the state is active again
+    assert evaluate(station_id, pm25=LIMIT + 10) == []
+    assert state_of(user_id, station_id).is_active
+
+    # Once the interval has passed, a reading still over the limit alerts again
+    backdate_last_alert(user_id, station_id, settings.ALERT_REALERT_MINUTES + 1)
+    assert evaluate(station_id, pm25=LIMIT + 10) == [user_id]
+
+
+def test_missing_pollutant_clears_its_state(subscription):
+    user_id, station_id = subscription
+
+    assert evaluate(station_id, pm25=LIMIT + 10) == [user_id]
+    assert evaluate(station_id, pm25=None, pm10=10) == []
+    state = state_of(user_id, station_id)
+    assert not state.is_active
+    assert state.cleared_at is not None
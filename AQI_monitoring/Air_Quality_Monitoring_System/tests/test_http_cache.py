@@ -0,0 +1,100 @@
+"""
+HttpCache middleware: cached hits are labelled with their route template for
+the middlewares around it, streamed lists are cached up to the body cap and
+passed through beyond it, and throttled invalidations run at most once per
+window.
+
+These tests build their own small app and need no database.
+"""
+import pytest
+
+
+@pytest.fixture
+def cached_app():
+    pytest.importorskip("httpx")
+    from fastapi import APIRouter, FastAPI
+    from air_quality_backend.http_cache import build_cache, cache_policy
+    from air_quality_backend.utils.responses import json_list, STREAM_THRESHOLD
+    from air_quality_backend.utils.metrics import instrument_requests
+
+    router = APIRouter(prefix="/_test")
+
+    @router.get("/cached/{station_id}")
+    @cache_policy(ttl=60, tags=("stations",))
+    def cached_station(station_id: int):
+        return {"station_id": station_id}
+
+    @router.get("/streamed")
+    @cache_policy(ttl=60, tags=("stations",))
+    def streamed_rows(count: int = STREAM_THRESHOLD + 1):
+        return json_list([{"station_id": i} for i in range(count)])
+
+    app = FastAPI()
+    app.include_router(router)
+    cache = build_cache(None, max_entries=100, max_bytes=1 << 20, max_body_bytes=1 << 18)
+    # Same order as main.py: the cache is innermost, metrics wrap it
+    app.middleware("http")(cache)
+    app.middleware("http")(instrument_requests)
+    return app, cache
+
+
+def requests_by_route(route: str) -> int:
+    from air_quality_backend.utils.metrics import http_requests
+
+    return sum(value for _, key, _, value in http_requests.samples() if key == ("GET", route, 200))
+
+
+def test_hit_is_labelled_with_route_template(cached_app):
+    from fastapi.testclient import TestClient
+
+    app, cache = cached_app
+    client = TestClient(app)
+    before = requests_by_route("/_test/cached/{station_id}")
+
+    assert client.get("/_test/cached/1").headers["x-cache"] == "MISS"
+    hit = client.get("/_test/cached/1")
+    assert hit.headers["x-cache"] == "HIT"
+    assert hit.json() == {"station_id": 1}
+    assert cache.counts["hit"] == 1
+    assert requests_by_route("/_test/cached/{station_id}") == before + 2
+    assert requests_by_route("unmatched") == 0
+
+
+def test_streamed_list_is_cached(cached_app):
+    from fastapi.testclient import TestClient
+    from air_quality_backend.utils.responses import STREAM_THRESHOLD
+
+    app, cache = cached_app
+    client = TestClient(app)
+
+    miss = client.get("/_test/streamed")
+    assert miss.headers["x-cache"] == "MISS"
+    hit = client.get("/_test/streamed")
+    assert hit.headers["x-cache"] == "HIT"
+    assert hit.content == miss.content
+    assert len(hit.json()) == STREAM_THRESHOLD + 1
+
+
+def test_streamed_list_over_cap_passes_through(cached_app):
+    from fastapi.testclient import TestClient
+
+    app, cache = cached_app
+    client = TestClient(app)
+    count = 20000  # About 400 kB, over the fixture's 256 kB cap
+
+    for _ in range(2):
+        response = client.get("/_test/streamed", params={"count": count})
+        assert "x-cache" not in response.headers
+        assert response.json() == [{"station_id": i} for i in range(count)]
+    assert cache.counts["uncacheable"] == 2
+    assert cache.backend.stats()["entries"] == 0
+
+
+def test_throttled_invalidation():
+    from air_quality_backend.http_cache import build_cache
+
+    cache = build_cache(None, max_entries=100, max_bytes=1 << 20, max_body_bytes=1 << 16)
+    assert cache.invalidate_throttled("measurements", 60)
+    assert not cache.invalidate_throttled("measurements", 60)
+    assert cache.invalidate_throttled("stations", 60)
+    assert cache.counts["invalidation"] == 2
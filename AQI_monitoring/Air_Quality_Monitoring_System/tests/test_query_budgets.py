@@ -0,0 +1,76 @@
+"""
+@query_budget enforcement: the budgeted routes stay within their declared
+SQL statement counts, and a route over its budget fails with a 500.
+"""
+import pytest
+
+
+def budget_of(endpoint) -> int:
+    from air_quality_backend.utils.sql_budget import BUDGET_ATTRIBUTE
+
+    return getattr(endpoint, BUDGET_ATTRIBUTE)
+
+
+def assert_within_budget(response, endpoint):
+    assert response.status_code < 300, response.text
+    assert int(response.headers["X-SQL-Queries"]) <= budget_of(endpoint)
+
+
+def test_send_notification(client, admin_headers, seed):
+    from air_quality_backend.routers.notifications import send_notification
+
+    response = client.post("/notifications/send", headers=admin_headers, json={
+        "notification_type": "system_update",
+        "title": "Maintenance",
+        "message": "Readings may be delayed tonight",
+        "user_ids": seed["user_ids"],
+    })
+    assert_within_budget(response, send_notification)
+    assert response.json()["message"] == f"Notifications sent to {len(seed['user_ids'])} users"
+
+
+@pytest.mark.parametrize("sort", ["new", "top", "trending"])
+def test_get_posts(client, user_headers, sort):
+    from air_quality_backend.routers.forum import get_posts
+
+    response = client.get("/forum/posts", headers=user_headers, params={"sort": sort})
+    assert_within_budget(response, get_posts)
+
+
+def test_get_comments(client, user_headers, seed):
+    from air_quality_backend.routers.forum import get_comments
+
+    response = client.get(f"/forum/posts/{seed['post_id']}/comments", headers=user_headers)
+    assert_within_budget(response, get_comments)
+    assert len(response.json()) == len(seed["user_ids"])
+
+
+def test_nearby_measurements(client, seed):
+    from air_quality_backend.routers.measurements import get_nearby_measurements
+
+    lat, lon = seed["station"]
+    response = client.get("/measurements/nearby/", params={"lat": lat, "lon": lon, "radius_km": 25})
+    assert_within_budget(response, get_nearby_measurements)
+    assert len(response.json()) == 5
+
+
+def test_over_budget_route_fails(app, client, seed):
+    from fastapi import Depends
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from air_quality_backend.database import get_db
+    from air_quality_backend.utils.sql_budget import query_budget
+
+    @app.get("/_test/over-budget")
+    @query_budget(1)
+    def over_budget(db: Session = Depends(get_db)):
+        for _ in range(2):
+            db.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    response = client.get("/_test/over-budget")
+    assert response.status_code == 500
+    assert response.headers["X-SQL-Queries"] == "2"
+    report = response.json()
+    assert report["detail"] == "SQL budget exceeded for GET /_test/over-budget"
+    assert report["violations"] == ["2 queries, budget is 1"]
@@ -0,0 +1,57 @@
+"""
+Read-your-writes: a write pins the user's reads to the primary in every
+process, through the announcement another process's listener applies.
+
+No database is needed: the engines are never connected.
+"""
+import pytest
+
+
+@pytest.fixture
+def routers():
+    pytest.importorskip("fastapi")
+    from sqlalchemy import create_engine
+    from air_quality_backend.utils.replicas import ReplicaRouter
+
+    primary = create_engine("postgresql+psycopg2://primary/aqi")
+    replica = create_engine("postgresql+psycopg2://replica/aqi")
+
+    def router():
+        replica_router = ReplicaRouter(primary, [replica])
+        replica_router.replicas[0]["lag"] = 0.0
+        return replica_router
+
+    return router(), router(), primary, replica
+
+
+def request_for(email: str = None):
+    from starlette.requests import Request
+    from air_quality_backend.config import settings
+    from air_quality_backend.utils.auth import create_access_token
+
+    headers = []
+    if email:
+        token = create_access_token({"sub": email}, settings.SECRET_KEY.get_secret_value())
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_announced_write_pins_reads_in_other_process(routers):
+    writer, other, primary, replica = routers
+    assert other.engine_for(request_for("user@example.com")) is replica
+
+    key, until = writer.mark_write(request_for("user@example.com"))
+    assert key == "user@example.com"
+    assert writer.engine_for(request_for("user@example.com")) is primary
+
+    # What other's listener receives once announce_write's NOTIFY is delivered
+    other.apply_announced_writes([f"{until:.3f}:{key}"])
+    assert other.engine_for(request_for("user@example.com")) is primary
+    assert other.engine_for(request_for("someone@example.com")) is replica
+    assert other.engine_for(request_for()) is replica
+
+
+def test_anonymous_write_is_not_tracked(routers):
+    writer, _, _, replica = routers
+    assert writer.mark_write(request_for()) is None
+    assert writer.engine_for(request_for()) is replica
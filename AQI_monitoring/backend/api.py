@@ -1,10 +1,15 @@
 from fastapi import FastAPI, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import func, or_, case
 from sqlalchemy.orm import Session
-from .database import get_db
+from .database import get_db, engine
+from .engine_factory import pool_stats
+from .http_cache import build_cache, cache_policy
 from .models import StationInfo, TSPAQI, FactsAqi  # Corrected model name
 import math
+import os
 import random
+import time
 
 app = FastAPI()
 
@@ -17,34 +22,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Public reads are served from cache; ingest writes show up within each route's TTL.
+# Set HTTP_CACHE_REDIS_URL to share it between workers (needs the redis package).
+response_cache = build_cache(
+    os.getenv("HTTP_CACHE_REDIS_URL"),
+    max_entries=int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "2000")),
+    max_bytes=int(os.getenv("HTTP_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    max_body_bytes=int(os.getenv("HTTP_CACHE_MAX_BODY_BYTES", str(4 * 1024 * 1024))),
+    prefix="httpcache:legacy:"
+)
+app.middleware("http")(response_cache)
+
 from sqlalchemy.exc import SQLAlchemyError
 
+# Facts rarely change; each request picks from the list loaded at most this often
+FACTS_CACHE_SECONDS = 600
+_facts = {"at": 0.0, "values": []}
+
+def load_facts(db: Session) -> list:
+    if time.time() - _facts["at"] > FACTS_CACHE_SECONDS:
+        _facts["values"] = [row.fact for row in db.query(FactsAqi.fact).all()]
+        _facts["at"] = time.time()
+        print(f"Number of facts retrieved: {len(_facts['values'])}")
+    return _facts["values"]
+
+@app.get("/pool")
+def get_pool_stats():
+    """Connection pool occupancy of this process"""
+    return pool_stats(engine)
+
 @app.get("/random_fact")
 def get_random_fact(db: Session = Depends(get_db)):
     try:
-        facts = db.query(FactsAqi).all()
-        print(f"Number of facts retrieved: {len(facts)}")
+        facts = load_facts(db)
         if not facts:
             return {"fact": "Air pollution is a leading environmental health risk."}
-        random_fact = random.choice(facts)
-        return {"fact": random_fact.fact}
+        return {"fact": random.choice(facts)}
     except SQLAlchemyError as e:
         print(f"Database error: {e}")
         return {"fact": "Error retrieving fact from database."}
 
 @app.get("/stations")
+@cache_policy(ttl=60, vary_query=False)
 def get_stations(db: Session = Depends(get_db)):
-    stations = db.query(StationInfo).all()
+    # measurements holds one row per station, so a single outer join replaces a query per station
+    rows = (
+        db.query(StationInfo, TSPAQI)
+        .outerjoin(TSPAQI, TSPAQI.station_id == StationInfo.station_id)
+        .all()
+    )
     response = []
 
-    for station in stations:
-        latest_aqi = (
-            db.query(TSPAQI)  # Corrected model name
-            .filter(TSPAQI.station_id == station.station_id)
-            .order_by(TSPAQI.timestamp.desc())
-            .first()
-        )
-
+    for station, latest_aqi in rows:
         response.append({
             "station_id": station.station_id,
             "station_name": station.station_name,
@@ -89,6 +118,26 @@ def get_station_by_id(station_id: int, db: Session = Depends(get_db)):
         "pm10": latest_aqi.pm10 if latest_aqi else "N/A",
     }
 
+def name_search(db: Session, text: str):
+    """
+    Stations whose name contains text or is trigram-similar to it, best first.
+
+    Both conditions are served by the pg_trgm GIN index on station_name;
+    substring matches rank above fuzzy ones, then by similarity.
+    """
+    similarity = func.similarity(StationInfo.station_name, text)
+    return db.query(StationInfo).filter(
+        or_(
+            StationInfo.station_name.ilike(f"%{text}%"),
+            StationInfo.station_name.op("%")(text)
+        )
+    ).order_by(
+        case((StationInfo.station_name.ilike(f"{text}%"), 0),
+             (StationInfo.station_name.ilike(f"%{text}%"), 1), else_=2),
+        similarity.desc()
+    )
+
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     return math.sqrt((lat1 - float(lat2)) ** 2 + (lon1 - float(lon2)) ** 2)
 
@@ -132,7 +181,7 @@ def get_nearest_station(lat: float, lon: float, db: Session = Depends(get_db)):
 
 @app.get("/station_by_name")
 def get_station_by_name(name: str, db: Session = Depends(get_db)):
-    station = db.query(StationInfo).filter(StationInfo.station_name.ilike(f"%{name}%")).first()
+    station = name_search(db, name).first()
 
     if not station:
         return {"error": "Station not found"}
@@ -159,8 +208,9 @@ def get_station_by_name(name: str, db: Session = Depends(get_db)):
     }
 
 @app.get("/search_stations")
+@cache_policy(ttl=300, vary_query=["query"])
 def search_stations(query: str = Query(..., min_length=1), db: Session = Depends(get_db)):
-    stations = db.query(StationInfo).filter(StationInfo.station_name.ilike(f"%{query}%")).limit(10).all()
+    stations = name_search(db, query).limit(10).all()
     
     return [
         {
@@ -0,0 +1,22 @@
+# http_cache.py
+#
+# Re-exports the shared HTTP response cache, which lives in the API:
+# Air_Quality_Monitoring_System/air_quality_backend/http_cache.py. Like
+# engine_factory.py, it is loaded by file path, since the services have no
+# common package on sys.path.
+import importlib.util
+import os
+import sys
+
+_MODULE = "aqi_http_cache"
+_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                     "Air_Quality_Monitoring_System", "air_quality_backend", "http_cache.py")
+
+if _MODULE not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(_MODULE, _PATH)
+    sys.modules[_MODULE] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules[_MODULE])
+
+build_cache = sys.modules[_MODULE].build_cache
+cache_policy = sys.modules[_MODULE].cache_policy
+HttpCache = sys.modules[_MODULE].HttpCache
@@ -34,9 +34,10 @@ const Notifications = () => {
     fetchNotifications();
   }, [location]); // Refresh when navigating to this page
 
-  const markAsRead = async (notificationId) => {
+  const markAsRead = async (notificationId, isBroadcast) => {
+    const path = isBroadcast ? `broadcasts/${notificationId}` : notificationId;
     try {
-      const response = await fetch(`http://localhost:8002/notifications/${notificationId}/read`, {
+      const response = await fetch(`http://localhost:8002/notifications/${path}/read`, {
         method: 'PATCH',
         headers: {
           'Authorization': `Bearer ${localStorage.getItem('access_token')}`
@@ -44,7 +45,9 @@ const Notifications = () => {
       });
       if (response.ok) {
         setNotifications(notifications.map(notif =>
-          notif.notification_id === notificationId ? { ...notif, is_read: true } : notif
+          notif.notification_id === notificationId && !!notif.is_broadcast === !!isBroadcast
+            ? { ...notif, is_read: true }
+            : notif
         ));
       } else {
         console.error('Failed to mark as read');
@@ -66,7 +69,7 @@ const Notifications = () => {
         <ul>
           {notifications.map(notif => (
             <li
-              key={notif.notification_id}
+              key={`${notif.is_broadcast ? 'b' : 'n'}-${notif.notification_id}`}
               className={`${notif.is_read ? 'read' : 'unread'} ${
                 notif.notification_type === 'threshold_alert' ? 'threshold-alert' : ''
               }`}
@@ -78,7 +81,7 @@ const Notifications = () => {
               </div>
               <div className="notification-actions">
                 {!notif.is_read && (
-                  <button onClick={() => markAsRead(notif.notification_id)}>Mark as Read</button>
+                  <button onClick={() => markAsRead(notif.notification_id, notif.is_broadcast)}>Mark as Read</button>
                 )}
               </div>
             </li>
@@ -1,8 +1,13 @@
 import aiohttp
+import os
+
+DEFAULT_WAQI_BASE_URL = "https://api.waqi.info"
 
 async def fetch_aqi_data(station_id: str, session: aiohttp.ClientSession, token: str):
     """Fetch AQI data for a station ID asynchronously using aiohttp."""
-    url = f"https://api.waqi.info/feed/@{station_id}/?token={token}"
+    # WAQI_BASE_URL points the ingest at a stand-in feed (see fake_waqi.py)
+    base_url = os.getenv("WAQI_BASE_URL", DEFAULT_WAQI_BASE_URL)
+    url = f"{base_url}/feed/@{station_id}/?token={token}"
     try:
         async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
             if response.status == 200:
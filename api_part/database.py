@@ -1,10 +1,11 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import os
+from engine_factory import build_engine, pool_options_from_env
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+# Pool size, timeouts and PgBouncer mode come from the DB_* variables
+engine = build_engine(DATABASE_URL, application_name="aqi-ingest", **pool_options_from_env())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
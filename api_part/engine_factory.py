@@ -0,0 +1,22 @@
+# engine_factory.py
+#
+# Re-exports the shared engine setup, which lives in the API:
+# AQI_monitoring/Air_Quality_Monitoring_System/air_quality_backend/engine_factory.py.
+# The services have no common package on sys.path, so it is loaded by file path.
+import importlib.util
+import os
+import sys
+
+_MODULE = "aqi_engine_factory"
+_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "AQI_monitoring",
+                     "Air_Quality_Monitoring_System", "air_quality_backend", "engine_factory.py")
+
+# One module per process, whichever service loads it first
+if _MODULE not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(_MODULE, _PATH)
+    sys.modules[_MODULE] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules[_MODULE])
+
+build_engine = sys.modules[_MODULE].build_engine
+pool_options_from_env = sys.modules[_MODULE].pool_options_from_env
+pool_stats = sys.modules[_MODULE].pool_stats
@@ -0,0 +1,104 @@
+"""
+Local stand-in for the WAQI feed API, for exercising the ingest loop offline.
+
+Serves /feed/@{station_id}/ in the shape of https://api.waqi.info with
+configurable latency, error rate and payload variation. Point the ingest at
+it with WAQI_BASE_URL:
+
+    python fake_waqi.py --port 8765 --latency-ms 120 --jitter-ms 80 --error-rate 0.02
+    WAQI_BASE_URL=http://localhost:8765 python main.py
+
+Readings are timestamped when served (time.v is epoch seconds), which
+bench_ingest.py uses to measure end-to-end staleness.
+"""
+import argparse
+import asyncio
+import random
+import time
+from aiohttp import web
+
+POLLUTANT_RANGES = {
+    "pm25": (5, 250),
+    "pm10": (10, 400),
+    "no2": (2, 120),
+    "co": (0.1, 5),
+    "so2": (1, 60),
+    "o3": (5, 180),
+}
+
+
+def make_reading(station_id: int, rng: random.Random, missing_rate: float) -> dict:
+    now = time.time()
+    iaqi = {
+        name: {"v": round(rng.uniform(low, high), 1)}
+        for name, (low, high) in POLLUTANT_RANGES.items()
+        if rng.random() >= missing_rate
+    }
+    # WAQI reports "-" when a station has no current AQI
+    aqi = "-" if rng.random() < missing_rate else rng.randint(10, 450)
+    return {
+        "status": "ok",
+        "data": {
+            "aqi": aqi,
+            "idx": station_id,
+            "attributions": [{"url": "http://localhost", "name": "Fake WAQI"}],
+            "city": {"geo": [round(rng.uniform(8, 35), 4), round(rng.uniform(68, 97), 4)],
+                     "name": f"Fake Station {station_id}", "url": "http://localhost"},
+            "dominentpol": "pm25",
+            "iaqi": iaqi,
+            "time": {"s": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now)), "tz": "+00:00", "v": now},
+        },
+    }
+
+
+def create_app(latency_ms: float, jitter_ms: float, error_rate: float, missing_rate: float, seed: int):
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0}
+
+    async def feed(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000 if jitter_ms else latency_ms / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            # Both failure modes of the real API: HTTP errors and "status": "error" bodies
+            if rng.random() < 0.5:
+                return web.json_response({"status": "error", "data": "Over quota"})
+            return web.Response(status=503, text="Service Unavailable")
+
+        station_id = request.match_info["station_id"]
+        if not station_id.isdigit():
+            return web.json_response({"status": "error", "data": "Unknown station"})
+        return web.json_response(make_reading(int(station_id), rng, missing_rate))
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get("/feed/@{station_id}/", feed)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=100, help="Mean response delay")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Standard deviation of the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--missing-rate", type=float, default=0.1,
+                        help="Probability that each pollutant (and the AQI) is missing from a reading")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.missing_rate, args.seed)
+    print(f"Fake WAQI feed on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms, errors {args.error_rate:.0%})")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import asyncio
 import aiohttp
 from itertools import cycle
 from database import SessionLocal, Base, engine
+from engine_factory import pool_stats
 from utils import fetch_aqi_data, store_aqi_data
 from dotenv import load_dotenv
 import os
@@ -15,6 +16,8 @@ load_dotenv()
 WAQI_API_TOKEN = os.getenv("API_TOKEN")
 if not WAQI_API_TOKEN:
     raise ValueError("API_TOKEN not found in .env file")
+# Stations fetched concurrently per batch
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
 
 # Initialize FastAPI application
 app = FastAPI()
@@ -72,6 +75,11 @@ async def lifespan(app: FastAPI):
 # Re-initialize FastAPI app with lifespan
 app = FastAPI(lifespan=lifespan)
 
+@app.get("/pool")
+def get_pool_stats():
+    """Connection pool occupancy of this ingest process"""
+    return pool_stats(engine)
+
 # Background task to periodically update AQI data
 async def update_aqi_loop():
     """Run an infinite loop to fetch and store AQI data in batches."""
@@ -82,7 +90,7 @@ async def update_aqi_loop():
         while True:
             print(f"Starting AQI fetch cycle at {time.strftime('%Y-%m-%d %H:%M:%S')}")
             await process_batch(session)
-            processed_stations += 100  # Process 100 stations per batch
+            processed_stations += BATCH_SIZE
             
             if processed_stations >= total_stations:
                 print(f"Completed one full cycle. Resting for 20 minutes...")
@@ -91,17 +99,17 @@ async def update_aqi_loop():
             else:
                 await asyncio.sleep(2)  # Short delay between batches
 
-# Process a batch of 100 stations
+# Process a batch of stations
 async def process_batch(session):
-    """Fetch and store AQI data for a batch of 100 stations."""
-    station_ids_batch = [next(station_iterator) for _ in range(100)]
+    """Fetch and store AQI data for a batch of BATCH_SIZE stations."""
+    station_ids_batch = [next(station_iterator) for _ in range(BATCH_SIZE)]
     tasks = [fetch_aqi_data(station_id, session, WAQI_API_TOKEN) for station_id in station_ids_batch]
     results = await asyncio.gather(*tasks)
     with SessionLocal() as db:
         for result in results:
             if result:
                 store_aqi_data(result, db)  # Assumes store_aqi_data handles "N/A" correctly
-    print(f"Processed batch of 100 stations: {station_ids_batch}")
+    print(f"Processed batch of {len(station_ids_batch)} stations: {station_ids_batch}")
 
 # Run the FastAPI application
 if __name__ == "__main__":
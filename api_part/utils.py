@@ -1,11 +1,16 @@
 import aiohttp
+import os
 from datetime import datetime
 from models import TSPAQI
 from sqlalchemy.orm import Session
 
+DEFAULT_WAQI_BASE_URL = "https://api.waqi.info"
+
 async def fetch_aqi_data(station_id: str, session: aiohttp.ClientSession, token: str):
     """Fetch AQI data for a station ID asynchronously using aiohttp."""
-    url = f"https://api.waqi.info/feed/@{station_id}/?token={token}"
+    # WAQI_BASE_URL points the ingest at a stand-in feed (see fake_waqi.py)
+    base_url = os.getenv("WAQI_BASE_URL", DEFAULT_WAQI_BASE_URL)
+    url = f"{base_url}/feed/@{station_id}/?token={token}"
     try:
         async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
             if response.status == 200:
@@ -18,6 +23,7 @@ async def fetch_aqi_data(station_id: str, session: aiohttp.ClientSession, token:
         print(f"Error fetching AQI for station {station_id}: {e}")
     return None
 
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from datetime import datetime
 from models import TSPAQI  # Replace with your actual model name if different
@@ -83,6 +89,9 @@ def store_aqi_data(data, db: Session):
             db.add(new_data)
             print(f"🆕 Added new AQI data for station {station_id} at {timestamp}")
 
+        # Tell the main backend a reading changed; delivered once the transaction commits
+        db.execute(text("SELECT pg_notify('aqi_updates', :station_id)"), {"station_id": str(station_id)})
+
         # Commit the transaction
         db.commit()
 